@@ -0,0 +1,6 @@
+"""
+ml-validator Benchmarks
+Synthetic design generation, rule micro-benchmarks, load tests against a
+mock LLM backend, and baseline comparison. Run `python -m benchmarks -h`
+from the ml-validator directory.
+"""
@@ -0,0 +1,270 @@
+"""
+Benchmark command line
+
+    python -m benchmarks micro   [--sizes 5,50,500,5000,50000] [--out micro.json]
+    python -m benchmarks similarity [--entries 10000,100000,300000] [--out similarity.json]
+    python -m benchmarks serialization [--sizes 10,1000,50000] [--out serialization.json]
+    python -m benchmarks startup [--runs 5] [--budget-ms 750] [--out startup.json]
+    python -m benchmarks load    [--mode inprocess|uvicorn] [--concurrency 32] [--out load.json]
+    python -m benchmarks scaling [--workers 1,2,4,8] [--sizes 500,2000] [--out scaling.json]
+    python -m benchmarks compare baseline.json current.json [--tolerance 0.15]
+
+`compare` exits with status 1 when any benchmark regressed, so it can gate CI.
+"""
+
+from typing import List
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+from benchmarks.designs import GENERIC
+from benchmarks.report import compare, load_baseline, print_table, save_baseline
+from benchmarks.startup import COLD_START_BUDGET_MS
+
+
+def _ints(text: str) -> List[int]:
+    return [int(part) for part in text.split(",") if part]
+
+
+def _config(args):
+    return {key: value for key, value in vars(args).items() if key != "func"}
+
+
+def _worker_counts() -> List[int]:
+    """1, 2, 4, ... up to the CPU count"""
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def _problem_ids(text: str, problems) -> List[str]:
+    if text == "all":
+        return [GENERIC, *problems]
+    return text.split(",")
+
+
+def _service_env():
+    """Configure the service before main is imported: no history or job files"""
+    os.environ.setdefault("VALIDATOR_LLM_BACKEND", "none")
+    from benchmarks.load import NO_PERSISTENCE
+    os.environ.update(NO_PERSISTENCE)
+
+
+def _catalog():
+    """The catalog the service would load"""
+    from catalog import DEFAULT_CATALOG_PATH, load_catalog
+    return load_catalog(os.getenv("VALIDATOR_CATALOG") or DEFAULT_CATALOG_PATH)
+
+
+def cmd_micro(args) -> int:
+    _service_env()
+    from main import DesignModel, validator
+    from benchmarks.micro import run_micro
+
+    catalog = validator.catalog
+    results = run_micro(
+        validator, DesignModel, catalog.component_types, catalog.problems,
+        _problem_ids(args.problems, catalog.problems), _ints(args.sizes),
+        samples=args.samples, budget_s=args.budget, methods=args.methods.split(",") if args.methods else ()
+    )
+    print_table(results, ("connections", "p50_ms", "p95_ms", "p99_ms", "peak_kb"))
+    if args.out:
+        save_baseline(args.out, "micro", results, _config(args))
+    return 0
+
+
+def cmd_similarity(args) -> int:
+    _service_env()
+    from benchmarks.micro import run_similarity
+
+    catalog = _catalog()
+    results = run_similarity(catalog.component_types, catalog.problems, _ints(args.entries),
+                             samples=args.samples, budget_s=args.budget, seed=args.seed)
+    print_table(results, ("entries", "p50_ms", "p95_ms", "p99_ms", "memory_mb"))
+    if args.out:
+        save_baseline(args.out, "similarity", results, _config(args))
+    return 0
+
+
+def cmd_serialization(args) -> int:
+    _service_env()
+    from main import ColumnarDesignModel, DesignModel, validator
+    from benchmarks.micro import run_serialization
+
+    catalog = validator.catalog
+    results = run_serialization(validator, DesignModel, ColumnarDesignModel, catalog.component_types, catalog.problems,
+                                _ints(args.sizes), samples=args.samples, budget_s=args.budget)
+    print_table(results, ("kb", "p50_ms", "p95_ms", "p99_ms"))
+    if args.out:
+        save_baseline(args.out, "serialization", results, _config(args))
+    return 0
+
+
+def cmd_startup(args) -> int:
+    from benchmarks.startup import run_startup
+
+    results, breakdown = run_startup(args.runs, {"VALIDATOR_LLM_BACKEND": os.getenv("VALIDATOR_LLM_BACKEND", "none")})
+    print_table(results, ("p50_ms", "p95_ms", "mean_ms"))
+    if breakdown:
+        print(f"\nImport of main ({breakdown[0]['total_ms']:.1f}ms, {breakdown[0]['self_ms']:.1f}ms in its own body):")
+        print_table([{"name": row["module"], **row} for row in breakdown[1:args.top + 1]], ("self_ms", "total_ms"))
+    if args.out:
+        save_baseline(args.out, "startup", results, _config(args))
+    cold_start = next(r for r in results if r["name"] == "startup/process")["p50_ms"]
+    if cold_start > args.budget_ms:
+        print(f"\nCold start {cold_start:.0f}ms exceeds the {args.budget_ms:.0f}ms budget")
+        return 1
+    print(f"\nCold start {cold_start:.0f}ms, within the {args.budget_ms:.0f}ms budget")
+    return 0
+
+
+def cmd_load(args) -> int:
+    from benchmarks.load import mock_llm_env, request_bodies, run_in_process, run_uvicorn
+
+    env = mock_llm_env(args.llm_latency_ms, args.llm_jitter_ms, args.llm_distribution,
+                       args.llm_error_rate, args.seed, args.llm_concurrency)
+    # Configuration is read when main is imported, so apply it first
+    for key, value in env.items():
+        os.environ.setdefault(key, value)
+    _service_env()
+    catalog = _catalog()
+
+    bodies = request_bodies(catalog.component_types, catalog.problems, _problem_ids(args.problems, catalog.problems),
+                            _ints(args.sizes), args.requests, distinct=args.distinct, seed=args.seed)
+    if args.mode == "uvicorn":
+        extra = ["--workers", str(args.workers)] if args.workers > 1 else []
+        result = asyncio.run(run_uvicorn(bodies, env, args.path, args.concurrency, args.port, extra))
+    else:
+        from main import app
+        result = asyncio.run(run_in_process(app, bodies, args.path, args.concurrency))
+
+    result = {"name": f"load/{args.mode}{args.path}/c{args.concurrency}", **result}
+    print_table([result], ("requests", "rps", "p50_ms", "p95_ms", "p99_ms", "errors", "served_by_fallback", "rss_mb"))
+    if args.out:
+        save_baseline(args.out, "load", [result], _config(args))
+    return 0
+
+
+def cmd_scaling(args) -> int:
+    from benchmarks.load import NO_PERSISTENCE, request_bodies, run_scaling
+
+    # Rule path only: throughput is bound by CPU, not by the (absent) LLM
+    env = {"VALIDATOR_LLM_BACKEND": "none", **NO_PERSISTENCE}
+    _service_env()
+    catalog = _catalog()
+
+    bodies = request_bodies(catalog.component_types, catalog.problems, _problem_ids(args.problems, catalog.problems),
+                            _ints(args.sizes), args.requests, seed=args.seed)
+    results = asyncio.run(run_scaling(bodies, env, _ints(args.workers), args.path, args.concurrency, args.port))
+    print_table(results, ("workers", "rps", "efficiency", "p50_ms", "p95_ms", "errors"))
+    if args.out:
+        save_baseline(args.out, "scaling", results, _config(args))
+    return 0
+
+
+def cmd_compare(args) -> int:
+    rows, regressions = compare(load_baseline(args.baseline), load_baseline(args.current),
+                                tolerance=args.tolerance, min_delta_ms=args.min_delta_ms,
+                                metrics=args.metrics.split(","))
+    for row in rows:
+        flag = "REGRESSED" if row["regressed"] else ""
+        print(f"{row['name']:<48}{row['metric']:>8}{row['before']:>12}{row['after']:>12}{row['change']:>+9.1%}  {flag}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions across {len(rows)} comparisons")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="ml-validator benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    micro = sub.add_parser("micro", help="Time each rule method across design sizes")
+    micro.add_argument("--sizes", default="5,50,500,5000,50000", help="Comma-separated component counts")
+    micro.add_argument("--problems", default="all", help="Comma-separated problem ids, 'generic', or 'all'")
+    micro.add_argument("--methods", default="", help="Comma-separated subset of methods to time")
+    micro.add_argument("--samples", type=int, default=50, help="Timed calls per method and size")
+    micro.add_argument("--budget", type=float, default=2.0, help="Seconds allowed per method and size")
+    micro.add_argument("--out", help="Write results as a JSON baseline")
+    micro.set_defaults(func=cmd_micro)
+
+    similar = sub.add_parser("similarity", help="Time near-duplicate lookups as the index grows")
+    similar.add_argument("--entries", default="10000,100000,300000", help="Comma-separated index sizes")
+    similar.add_argument("--samples", type=int, default=200, help="Timed lookups per index size")
+    similar.add_argument("--budget", type=float, default=2.0, help="Seconds allowed per index size")
+    similar.add_argument("--seed", type=int, default=0)
+    similar.add_argument("--out", help="Write results as a JSON baseline")
+    similar.set_defaults(func=cmd_similarity)
+
+    serialization = sub.add_parser("serialization", help="Time request parsing and response serialization")
+    serialization.add_argument("--sizes", default="10,1000,50000", help="Comma-separated component counts")
+    serialization.add_argument("--samples", type=int, default=20, help="Timed calls per step and size")
+    serialization.add_argument("--budget", type=float, default=5.0, help="Seconds allowed per step and size")
+    serialization.add_argument("--out", help="Write results as a JSON baseline")
+    serialization.set_defaults(func=cmd_serialization)
+
+    startup = sub.add_parser("startup", help="Time worker cold start in fresh interpreters")
+    startup.add_argument("--runs", type=int, default=5, help="Timed cold starts")
+    startup.add_argument("--budget-ms", type=float, default=COLD_START_BUDGET_MS,
+                         help="Fail when the p50 spawn-to-ready time exceeds this")
+    startup.add_argument("--top", type=int, default=15, help="Direct imports of main to list")
+    startup.add_argument("--out", help="Write results as a JSON baseline")
+    startup.set_defaults(func=cmd_startup)
+
+    load = sub.add_parser("load", help="Drive the service with concurrent clients against the mock LLM")
+    load.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    load.add_argument("--path", default="/validate", help="Endpoint to POST designs to")
+    load.add_argument("--concurrency", type=int, default=32, help="Concurrent client connections")
+    load.add_argument("--requests", type=int, default=500, help="Total requests to send")
+    load.add_argument("--sizes", default="5,20,100", help="Comma-separated component counts")
+    load.add_argument("--problems", default="all", help="Comma-separated problem ids, 'generic', or 'all'")
+    load.add_argument("--distinct", action="store_true", help="Make every design unique (no cache hits)")
+    load.add_argument("--seed", type=int, default=0)
+    load.add_argument("--llm-latency-ms", type=float, default=800.0)
+    load.add_argument("--llm-jitter-ms", type=float, default=200.0)
+    load.add_argument("--llm-distribution", choices=("fixed", "uniform", "lognormal"), default="lognormal")
+    load.add_argument("--llm-error-rate", type=float, default=0.0)
+    load.add_argument("--llm-concurrency", type=int, default=64, help="Service-side LLM concurrency cap")
+    load.add_argument("--port", type=int, default=8765, help="Port for --mode uvicorn")
+    load.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    load.add_argument("--out", help="Write results as a JSON baseline")
+    load.set_defaults(func=cmd_load)
+
+    scaling = sub.add_parser("scaling", help="Rule-path throughput across serve.py worker counts")
+    scaling.add_argument("--workers", default=",".join(str(n) for n in _worker_counts()),
+                         help="Comma-separated worker counts")
+    scaling.add_argument("--path", default="/validate", help="Endpoint to POST designs to")
+    scaling.add_argument("--concurrency", type=int, default=64, help="Concurrent client connections")
+    scaling.add_argument("--requests", type=int, default=2000, help="Requests per worker count")
+    scaling.add_argument("--sizes", default="500,2000", help="Comma-separated component counts")
+    scaling.add_argument("--problems", default="all", help="Comma-separated problem ids, 'generic', or 'all'")
+    scaling.add_argument("--seed", type=int, default=0)
+    scaling.add_argument("--port", type=int, default=8765)
+    scaling.add_argument("--out", help="Write results as a JSON baseline")
+    scaling.set_defaults(func=cmd_scaling)
+
+    comparison = sub.add_parser("compare", help="Fail when current results regress against a baseline")
+    comparison.add_argument("baseline")
+    comparison.add_argument("current")
+    comparison.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown")
+    comparison.add_argument("--min-delta-ms", type=float, default=0.05,
+                            help="Ignore latency changes smaller than this")
+    comparison.add_argument("--metrics", default="p50_ms,p95_ms,rps")
+    comparison.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
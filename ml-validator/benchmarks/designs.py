@@ -0,0 +1,71 @@
+"""
+Synthetic Designs
+Seeded generator of canvas-shaped design payloads for every problem
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import random
+
+GENERIC = "generic"
+
+
+def synthetic_design(component_types: Dict[str, Dict], problems: Dict[str, Dict],
+                     problem_id: Optional[str], size: int, seed: int = 0,
+                     edge_factor: float = 1.5, valid_ratio: float = 0.8) -> Dict:
+    """One design payload as the frontend would POST it.
+
+    The problem's required components come first (so larger designs pass
+    the required checks), followed by its optional components and then
+    random catalog types. About `edge_factor * size` connections are
+    drawn; `valid_ratio` of them follow the component connection rules,
+    the rest join random pairs.
+    """
+    rng = random.Random(f"{problem_id}:{size}:{seed}")
+    problem = problems.get(problem_id) if problem_id and problem_id != GENERIC else None
+    catalog = list(component_types)
+    preferred = (problem['required_components'] + problem.get('optional_components', [])) if problem else []
+
+    types: List[str] = []
+    for i in range(size):
+        types.append(preferred[i] if i < len(preferred) else rng.choice(catalog))
+    ids = [f"dndnode_{seed}_{i}" for i in range(size)]
+
+    by_type: Dict[str, List[int]] = {}
+    for i, comp_type in enumerate(types):
+        by_type.setdefault(comp_type, []).append(i)
+
+    connections = []
+    if size > 1:
+        for _ in range(int(size * edge_factor)):
+            src = rng.randrange(size)
+            rules = component_types.get(types[src], {})
+            targets = [t for t in rules.get('required_connections', []) + rules.get('optional_connections', [])
+                       if t in by_type]
+            if targets and rng.random() < valid_ratio:
+                dst = rng.choice(by_type[rng.choice(targets)])
+            else:
+                dst = rng.randrange(size)
+            if dst != src:
+                connections.append({"from_component": ids[src], "to_component": ids[dst]})
+
+    return {
+        "components": [
+            {"id": comp_id, "type": comp_type, "position": {"x": float(i % 40) * 120, "y": float(i // 40) * 80}}
+            for i, (comp_id, comp_type) in enumerate(zip(ids, types))
+        ],
+        "connections": connections,
+        "problem_id": None if problem_id == GENERIC else problem_id,
+    }
+
+
+def design_suite(component_types: Dict[str, Dict], problems: Dict[str, Dict],
+                 problem_ids: Iterable[str], sizes: Iterable[int],
+                 variants: int = 1, seed: int = 0) -> Iterator[Tuple[str, int, Dict]]:
+    """(problem_id, size, payload) for every problem/size pair"""
+    sizes = list(sizes)
+    for problem_id in problem_ids:
+        for size in sizes:
+            for variant in range(variants):
+                yield problem_id, size, synthetic_design(
+                    component_types, problems, problem_id, size, seed=seed + variant
+                )
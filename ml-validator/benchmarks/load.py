@@ -0,0 +1,201 @@
+"""
+Load Tests
+Concurrent clients driving the FastAPI app in-process (ASGI transport) or
+through a uvicorn subprocess, with the mock LLM backend standing in for
+Gemini
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.designs import design_suite
+from benchmarks.report import summarize
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmarked services keep no evaluation history and no job database, so
+# synthetic traffic never reaches the analytics a deployment collects
+NO_PERSISTENCE = {"VALIDATOR_EVAL_DB": "", "VALIDATOR_JOB_DB": ""}
+
+
+def mock_llm_env(latency_ms: float = 800.0, jitter_ms: float = 200.0, distribution: str = "lognormal",
+                 error_rate: float = 0.0, seed: int = 0, llm_concurrency: int = 64) -> Dict[str, str]:
+    """Service configuration for a load test: mock backend, no rate limit, nothing persisted"""
+    return {
+        "VALIDATOR_LLM_BACKEND": "mock",
+        "VALIDATOR_MOCK_LATENCY_MS": str(latency_ms),
+        "VALIDATOR_MOCK_JITTER_MS": str(jitter_ms),
+        "VALIDATOR_MOCK_LATENCY_DIST": distribution,
+        "VALIDATOR_MOCK_ERROR_RATE": str(error_rate),
+        "VALIDATOR_MOCK_SEED": str(seed),
+        "VALIDATOR_LLM_RPM": "0",
+        "VALIDATOR_LLM_CONCURRENCY": str(llm_concurrency),
+        **NO_PERSISTENCE,
+    }
+
+
+def request_bodies(component_types: Dict[str, Dict], problems: Dict[str, Dict],
+                   problem_ids: Iterable[str], sizes: Iterable[int], requests: int,
+                   distinct: bool = False, seed: int = 0) -> List[bytes]:
+    """Pre-serialized request bodies, so client-side encoding is not timed.
+
+    By default a pool of one design per problem/size is cycled, which lets
+    the result cache serve repeats; `distinct` makes every body unique.
+    """
+    problem_ids = list(problem_ids)
+    sizes = list(sizes)
+    pool_size = len(problem_ids) * len(sizes)
+    variants = -(-requests // pool_size) if distinct else 1
+    pool = [
+        json.dumps(payload).encode("utf-8")
+        for _, _, payload in design_suite(component_types, problems, problem_ids, sizes,
+                                          variants=variants, seed=seed)
+    ]
+    return [pool[i % len(pool)] for i in range(requests)]
+
+
+async def drive(client: httpx.AsyncClient, path: str, bodies: List[bytes], concurrency: int) -> Dict[str, Any]:
+    """Send every body with `concurrency` workers; latency and status counts"""
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    failures = 0
+    pending = iter(bodies)
+
+    async def worker():
+        nonlocal failures
+        for body in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, content=body, headers={"content-type": "application/json"})
+                await response.aread()
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            except httpx.HTTPError:
+                failures += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    errors = failures + sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        "requests": len(bodies),
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(bodies) / elapsed, 2) if elapsed else 0.0,
+        "errors": errors,
+        "error_rate": round(errors / len(bodies), 4) if bodies else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        **summarize(latencies),
+    }
+
+
+def _health_summary(health: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "cache_hit_ratio": health.get("cache", {}).get("hit_ratio"),
+        "llm_calls": health.get("llm", {}).get("calls"),
+        "coalesced": health.get("inflight", {}).get("coalesced"),
+        "served_by_fallback": health.get("evaluation", {}).get("served_by_fallback"),
+        "hedges": health.get("llm", {}).get("hedges"),
+    }
+
+
+async def run_in_process(app, bodies: List[bytes], path: str = "/validate", concurrency: int = 32) -> Dict[str, Any]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        result = await drive(client, path, bodies, concurrency)
+        health = (await client.get("/health")).json()
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+    return {**result, "rss_mb": round(rss_mb, 1) if rss_mb else None, **_health_summary(health)}
+
+
+def _process_rss_mb(pid: int) -> Optional[float]:
+    """Peak resident set of a child process (Linux /proc only)"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+async def _wait_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready")
+
+
+async def run_uvicorn(bodies: List[bytes], env: Dict[str, str], path: str = "/validate",
+                      concurrency: int = 32, port: int = 8765,
+                      extra_args: Iterable[str] = ()) -> Dict[str, Any]:
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning", *extra_args]
+    return await _run_server(command, bodies, env, path, concurrency, port)
+
+
+async def run_served(bodies: List[bytes], env: Dict[str, str], workers: int, path: str = "/validate",
+                     concurrency: int = 32, port: int = 8765) -> Dict[str, Any]:
+    """Load test through serve.py, with shared cache and rate limit across workers"""
+    command = [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning"]
+    return await _run_server(command, bodies, env, path, concurrency, port)
+
+
+async def run_scaling(bodies: List[bytes], env: Dict[str, str], worker_counts: Iterable[int],
+                      path: str = "/validate", concurrency: int = 64, port: int = 8765) -> List[Dict[str, Any]]:
+    """Throughput at each worker count, with efficiency relative to one worker.
+
+    Efficiency is rps / (workers * rps at the lowest count); 1.0 is linear.
+    Use designs large enough that the service, not this single-process
+    client, is the bottleneck.
+    """
+    results = []
+    for workers in worker_counts:
+        result = await run_served(bodies, env, workers, path, concurrency, port)
+        results.append({"name": f"scaling{path}/w{workers}", "workers": workers, **result})
+    base = results[0] if results else None
+    for result in results:
+        ideal = base["rps"] * result["workers"] / base["workers"]
+        result["efficiency"] = round(result["rps"] / ideal, 3) if ideal else 0.0
+    return results
+
+
+async def _run_server(command: List[str], bodies: List[bytes], env: Dict[str, str], path: str,
+                      concurrency: int, port: int) -> Dict[str, Any]:
+    # Per-request service logging is discarded so it does not flood the report
+    server = subprocess.Popen(command, cwd=SERVICE_DIR, env={**os.environ, **env},
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=None) as client:
+            await _wait_ready(client, server)
+            result = await drive(client, path, bodies, concurrency)
+            health = (await client.get("/health")).json()
+        return {**result, "rss_mb": _process_rss_mb(server.pid), **_health_summary(health)}
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
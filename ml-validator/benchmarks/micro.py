@@ -0,0 +1,178 @@
+"""
+Rule Micro-benchmarks
+Per-call timing and peak allocation of the validator's rule methods
+across synthetic design sizes
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import time
+import tracemalloc
+
+from benchmarks.designs import GENERIC, synthetic_design
+from benchmarks.report import summarize
+
+DEFAULT_SIZES = (5, 50, 500, 5000, 50000)
+
+
+def rule_methods(validator) -> List[Tuple[str, Callable[[Any, Any], Any]]]:
+    """(label, fn(design, problem_id)) for each benchmarked method"""
+    return [
+        ("required_components", lambda d, p: validator._validate_required_components(d, p)),
+        ("connections", lambda d, p: validator._validate_connections(d)),
+        ("architecture_patterns", lambda d, p: validator._validate_architecture_patterns(d)),
+        ("best_practices", lambda d, p: validator._validate_best_practices(d)),
+        ("graph_analysis", lambda d, p: validator._analyze_graph(d)),
+        ("validate_with_rules", lambda d, p: validator._validate_with_rules(d, p)),
+    ]
+
+
+def time_calls(fn: Callable[[], Any], samples: int, budget_s: float) -> List[float]:
+    """Up to `samples` per-call timings in ms, stopping once `budget_s` is spent"""
+    fn()  # warm-up
+    timings: List[float] = []
+    deadline = time.perf_counter() + budget_s
+    for _ in range(samples):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+        if time.perf_counter() > deadline:
+            break
+    return timings
+
+
+def peak_kb(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def run_micro(validator, design_model, component_types: Dict[str, Dict], problems: Dict[str, Dict],
+              problem_ids: Iterable[str], sizes: Iterable[int] = DEFAULT_SIZES,
+              samples: int = 50, budget_s: float = 2.0, methods: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    results = []
+    wanted = set(methods)
+    sizes = list(sizes)
+    for problem_id in problem_ids:
+        for size in sizes:
+            payload = synthetic_design(component_types, problems, problem_id, size)
+            started = time.perf_counter()
+            design = design_model.model_validate(payload)
+            parse_ms = (time.perf_counter() - started) * 1000
+            pid = None if problem_id == GENERIC else problem_id
+            for label, method in rule_methods(validator):
+                if wanted and label not in wanted:
+                    continue
+                call = lambda: method(design, pid)
+                results.append({
+                    "name": f"{label}/{problem_id}/{size}",
+                    "method": label,
+                    "problem_id": problem_id,
+                    "size": size,
+                    "connections": len(payload["connections"]),
+                    "parse_ms": round(parse_ms, 4),
+                    **summarize(time_calls(call, samples, budget_s)),
+                    "peak_kb": peak_kb(call),
+                })
+    return results
+
+
+def run_similarity(component_types: Dict[str, Dict], problems: Dict[str, Dict],
+                   entry_counts: Iterable[int] = (10_000, 100_000, 300_000),
+                   sizes: Iterable[int] = range(5, 31), samples: int = 200, budget_s: float = 2.0,
+                   seed: int = 0) -> List[Dict[str, Any]]:
+    """Feature extraction and nearest-neighbour lookup cost as the index grows.
+
+    The index is filled with jittered copies of real design vectors, spread
+    over the given component counts, so partitions hold realistic numbers.
+    """
+    import numpy as np
+    from similarity import DesignFeatures, SimilarityIndex
+
+    rng = np.random.default_rng(seed)
+    features = DesignFeatures(component_types)
+    problem_ids = list(problems)
+    sizes = list(sizes)
+    designs = [synthetic_design(component_types, problems, problem_ids[i % len(problem_ids)], size, seed=seed + i)
+               for i, size in enumerate(sizes)]
+    vectors = [features.vector(((c["id"], c["type"]) for c in d["components"]),
+                               ((c["from_component"], c["to_component"]) for c in d["connections"]))
+               for d in designs]
+
+    results = [{
+        "name": "similarity/features",
+        "entries": 0,
+        **summarize(time_calls(lambda: features.vector(
+            ((c["id"], c["type"]) for c in designs[-1]["components"]),
+            ((c["from_component"], c["to_component"]) for c in designs[-1]["connections"])
+        ), samples, budget_s)),
+    }]
+    for count in entry_counts:
+        index = SimilarityIndex(features.dims, max_entries=count)
+        for i in range(count):
+            j = i % len(sizes)
+            noisy = vectors[j] + rng.normal(0, 0.05, features.dims).astype(np.float32)
+            index.add("bench", sizes[j], noisy / np.linalg.norm(noisy), str(i), 50)
+        query = vectors[len(sizes) // 2]
+        size = sizes[len(sizes) // 2]
+        results.append({
+            "name": f"similarity/nearest/{count}",
+            "entries": count,
+            **summarize(time_calls(lambda: index.nearest("bench", size, query), samples, budget_s)),
+            "memory_mb": round(index.memory_bytes() / 2 ** 20, 1),
+        })
+    return results
+
+
+def run_serialization(validator, design_model, columnar_model, component_types: Dict[str, Dict],
+                      problems: Dict[str, Dict], sizes: Iterable[int] = (10, 1000, 50000),
+                      problem_id: str = "url-shortener", samples: int = 20,
+                      budget_s: float = 5.0) -> List[Dict[str, Any]]:
+    """Request parse and response serialization cost, generic path vs fast path.
+
+    Parsing decodes the raw body and validates a DesignModel, with the
+    stdlib json module (FastAPI's default) and with orjson (FastJSONRoute),
+    then the same design as columnar JSON and as a packed buffer.
+    Serializing renders the design's rule-based ValidationResult, through a
+    dict and json.dumps and with FastJSONResponse.
+    """
+    import json
+    import orjson
+    import columnar
+    from fast_json import FastJSONResponse
+
+    results = []
+    for size in sizes:
+        payload = synthetic_design(component_types, problems, problem_id, size)
+        body = json.dumps(payload).encode("utf-8")
+        design = design_model.model_validate(orjson.loads(body))
+        result = validator._validate_with_rules(design, problem_id)
+        types = sorted({c["type"] for c in payload["components"]})
+        index = {c["id"]: i for i, c in enumerate(payload["components"])}
+        columns = {
+            "types": types,
+            "components": [types.index(c["type"]) for c in payload["components"]],
+            "connections": [index[e] for c in payload["connections"] for e in (c["from_component"], c["to_component"])],
+            "ids": list(index),
+            "problem_id": problem_id,
+        }
+        columnar_body = orjson.dumps(columns)
+        packed = columnar.pack(**columns)
+        calls = (
+            ("parse/json", lambda: design_model.model_validate(json.loads(body)), len(body)),
+            ("parse/orjson", lambda: design_model.model_validate(orjson.loads(body)), len(body)),
+            ("parse/columnar", lambda: columnar_model.model_validate(orjson.loads(columnar_body)), len(columnar_body)),
+            ("parse/packed", lambda: columnar_model.model_validate(columnar.unpack(packed)), len(packed)),
+            ("serialize/json", lambda: json.dumps(result.model_dump(exclude_none=True)).encode("utf-8"), None),
+            ("serialize/fast", lambda: FastJSONResponse(result).body, None),
+        )
+        for label, call, size_bytes in calls:
+            results.append({
+                "name": f"serialization/{label}/{size}",
+                "size": size,
+                "kb": round((size_bytes or len(call())) / 1024, 1),
+                **summarize(time_calls(call, samples, budget_s)),
+            })
+    return results
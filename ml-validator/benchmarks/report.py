@@ -0,0 +1,96 @@
+"""
+Benchmark Reports
+Latency summaries, JSON baselines and regression comparison
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+# Metrics where a larger value is a regression, and where a smaller one is
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "mean_ms", "peak_kb", "rss_mb", "error_rate")
+HIGHER_IS_BETTER = ("rps", "efficiency")
+
+
+def summarize(samples_ms: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean of latency samples in milliseconds"""
+    if not len(samples_ms):
+        return {"samples": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    values = np.asarray(samples_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "samples": int(values.size),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(values.mean()), 4),
+    }
+
+
+def save_baseline(path: str, kind: str, results: List[Dict[str, Any]], config: Dict[str, Any]):
+    document = {
+        "kind": kind,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.15,
+            min_delta_ms: float = 0.05, metrics: Sequence[str] = ("p50_ms", "p95_ms", "rps")
+            ) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Rows of (name, metric, before, after, change) and the list of regressions.
+
+    A latency metric regresses when it grows by more than `tolerance` and
+    by more than `min_delta_ms` (which keeps microsecond-scale noise out);
+    throughput regresses when it drops by more than `tolerance`.
+    """
+    before = {row["name"]: row for row in baseline.get("results", [])}
+    rows: List[Dict[str, Any]] = []
+    regressions: List[str] = []
+    for row in current.get("results", []):
+        old = before.get(row["name"])
+        if old is None:
+            continue
+        for metric in metrics:
+            if metric not in row or metric not in old or not old[metric]:
+                continue
+            change = row[metric] / old[metric] - 1
+            regressed = False
+            if metric in HIGHER_IS_BETTER:
+                regressed = change < -tolerance
+            elif metric in LOWER_IS_BETTER:
+                delta = row[metric] - old[metric]
+                if metric.endswith("_ms") and delta < min_delta_ms:
+                    regressed = False
+                else:
+                    regressed = change > tolerance
+            rows.append({
+                "name": row["name"], "metric": metric,
+                "before": old[metric], "after": row[metric],
+                "change": round(change, 4), "regressed": regressed,
+            })
+            if regressed:
+                regressions.append(f"{row['name']} {metric}: {old[metric]} -> {row[metric]} ({change:+.1%})")
+    return rows, regressions
+
+
+def print_table(results: List[Dict[str, Any]], columns: Sequence[str]):
+    width = max([len(r["name"]) for r in results] + [4]) + 2
+    print(f"{'name':<{width}}" + "".join(f"{c:>12}" for c in columns))
+    for row in results:
+        cells = "".join(f"{row.get(c, ''):>12}" for c in columns)
+        print(f"{row['name']:<{width}}{cells}")
@@ -0,0 +1,97 @@
+"""
+Startup Benchmark
+Cold start of a worker, measured in fresh interpreters: time to import the
+service, to finish application startup, and from process spawn to ready,
+plus a `python -X importtime` breakdown of what the import spends it on
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.load import NO_PERSISTENCE
+from benchmarks.report import summarize
+
+# Spawn-to-ready target for one worker (interpreter start, imports,
+# catalog compile and lifespan startup); `startup` fails above it
+COLD_START_BUDGET_MS = 750.0
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the fresh interpreter; prints one JSON line of timings
+PROBE = """
+import asyncio, json, os, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter(), time.time()
+
+ready, ready_at = asyncio.run(boot())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "ready_ms": (ready - started) * 1000,
+    "process_ms": (ready_at - float(os.environ["STARTUP_SPAWNED_AT"])) * 1000,
+}))
+"""
+
+
+def _probe(env: Dict[str, str], importtime: bool = False) -> Tuple[Dict[str, float], str]:
+    args = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    env = {**env, "STARTUP_SPAWNED_AT": repr(time.time())}
+    done = subprocess.run(args, cwd=SERVICE_DIR, env=env, capture_output=True, text=True, timeout=120)
+    if done.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{done.stderr[-2000:]}")
+    return json.loads(done.stdout.strip().splitlines()[-1]), done.stderr
+
+
+def import_breakdown(importtime_log: str, module: str = "main") -> List[Dict[str, Any]]:
+    """Direct imports of `module` from `-X importtime` output, slowest first.
+
+    Each import is listed after the imports it triggered, indented two
+    spaces per level, so the direct imports are the depth-1 lines between
+    the previous top-level line and `module` itself.
+    """
+    children: List[Dict[str, Any]] = []
+    total: Optional[Dict[str, Any]] = None
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:   <self us> | <cumulative us> | <indent><module>"
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        row = {"module": name.strip(), "self_ms": int(self_us) / 1000, "total_ms": int(cumulative_us) / 1000}
+        if depth == 0:
+            if row["module"] == module:
+                total = row
+                break
+            children = []
+        elif depth == 1:
+            children.append(row)
+    if total is None:
+        return []
+    children.sort(key=lambda r: r["total_ms"], reverse=True)
+    return [total] + children
+
+
+def run_startup(runs: int = 5, env: Optional[Dict[str, str]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Timing summaries over `runs` cold starts, and one import breakdown"""
+    env = {**os.environ, **NO_PERSISTENCE, **(env or {})}
+    # A throwaway start first, so every timed one finds the OS file cache warm
+    _probe(env)
+    samples: Dict[str, List[float]] = {"import_ms": [], "ready_ms": [], "process_ms": []}
+    for _ in range(runs):
+        timings, _ = _probe(env)
+        for key in samples:
+            samples[key].append(timings[key])
+    _, log = _probe(env, importtime=True)
+    results = [
+        {"name": f"startup/{key[:-3]}", **summarize(values)}
+        for key, values in samples.items()
+    ]
+    return results, import_breakdown(log)
@@ -0,0 +1,379 @@
+"""
+Bulk Rule Scorer
+Vectorized NumPy re-scoring of large design collections with the rule engine,
+plus a JSONL command-line entry point for offline re-grading
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+try:
+    # Decoding dominates the CLI run time; orjson is several times faster
+    import orjson
+except ImportError:
+    orjson = None
+
+import columnar
+from graph_analysis import analyze, build_graph, graph_tests
+from rule_engine import (
+    ARCHITECTURE_PATTERNS, BASIC_COMPONENT_POINTS, BEST_PRACTICES, CONNECTED_POINTS,
+    DEFAULT_MIN_SCORE, DIVERSITY_MIN_COMPONENTS, DIVERSITY_POINTS, GROUP_MAX_SCORE,
+    REQUIRED_COMPONENT_POINTS, VALID_CONNECTION_POINTS, DesignProfile, RuleEngine, score_feedback,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_SCORE = 4 * GROUP_MAX_SCORE
+
+
+class EncodedDesigns:
+    """A chunk of designs as arrays.
+
+    `presence` is the designs x component-types count matrix; edges are kept
+    flat (owning design, source type id, target type id, -1 when the endpoint
+    does not resolve) so per-design edge order survives for test output.
+    """
+
+    def __init__(self, presence: np.ndarray, component_counts: np.ndarray, connection_counts: np.ndarray,
+                 problem_index: np.ndarray, edge_design: np.ndarray, edge_from: np.ndarray, edge_to: np.ndarray):
+        self.presence = presence
+        self.component_counts = component_counts
+        self.connection_counts = connection_counts
+        self.problem_index = problem_index
+        self.edge_design = edge_design
+        self.edge_from = edge_from
+        self.edge_to = edge_to
+
+    def __len__(self) -> int:
+        return self.presence.shape[0]
+
+
+class BulkScorer:
+    """Scores many designs at once with array operations over the compiled rules"""
+
+    def __init__(self, engine: RuleEngine, feedback: Callable[[int], str]):
+        self.engine = engine
+        n_types = len(engine.type_ids)
+        self.n_types = n_types
+
+        self.validity = np.zeros((n_types, n_types), dtype=bool)
+        for src, targets in enumerate(engine.valid_targets):
+            for dst in range(n_types):
+                self.validity[src, dst] = bool(targets >> dst & 1)
+
+        self.problem_ids: List[str] = list(engine.problems)
+        self._problem_lookup = {pid: i for i, pid in enumerate(self.problem_ids)}
+        self.required = np.zeros((len(self.problem_ids) + 1, n_types), dtype=bool)
+        # Last row stays empty: it is what index -1 (no problem) selects
+        self.min_scores = np.full(len(self.problem_ids) + 1, DEFAULT_MIN_SCORE, dtype=np.int32)
+        for i, pid in enumerate(self.problem_ids):
+            compiled = engine.problems[pid]
+            self.required[i, list(compiled.required)] = True
+            self.min_scores[i] = compiled.min_score
+
+        self.basic = [engine.type_ids[t] for t in ('web-server', 'database')]
+        self.patterns = self._check_matrix(ARCHITECTURE_PATTERNS)
+        self.practices = self._check_matrix(BEST_PRACTICES)
+        self.bit_values = np.array([1 << t for t in range(n_types)], dtype=object if n_types > 62 else np.int64)
+        self.feedback = np.array([feedback(score) for score in range(MAX_SCORE + 1)], dtype=object)
+
+    def _check_matrix(self, checks):
+        masks = np.zeros((len(checks), self.n_types), dtype=bool)
+        for i, (_, types, _, _) in enumerate(checks):
+            masks[i, [self.engine.type_ids[t] for t in types]] = True
+        points = np.array([check[2] for check in checks], dtype=np.int32)
+        return masks, points
+
+    def encode(self, designs: Iterable[Dict[str, Any]]) -> EncodedDesigns:
+        """Encode raw design dicts (DesignModel or ColumnarDesignModel JSON shape) into arrays"""
+        type_ids = self.engine.type_ids
+        problem_lookup = self._problem_lookup
+        rows: List[int] = []
+        cols: List[int] = []
+        component_counts: List[int] = []
+        connection_counts: List[int] = []
+        problem_index: List[int] = []
+        edge_design: List[int] = []
+        edge_from: List[int] = []
+        edge_to: List[int] = []
+
+        for d, design in enumerate(designs):
+            if 'types' in design:
+                n, m = self._encode_columnar(d, design, rows, cols, edge_design, edge_from, edge_to)
+                component_counts.append(n)
+                connection_counts.append(m)
+                pid = design.get('problem_id')
+                problem_index.append(problem_lookup.get(pid, -1) if pid else -1)
+                continue
+            id_to_type: Dict[str, int] = {}
+            components = design.get('components') or []
+            for comp in components:
+                comp_type = comp.get('type')
+                tid = type_ids.get(comp_type, -1) if comp_type else -1
+                id_to_type[comp.get('id')] = tid
+                if tid >= 0:
+                    rows.append(d)
+                    cols.append(tid)
+            connections = design.get('connections') or []
+            for conn in connections:
+                src = id_to_type.get(conn.get('from_component'), -1)
+                edge_design.append(d)
+                edge_from.append(src)
+                edge_to.append(id_to_type.get(conn.get('to_component'), -1) if src >= 0 else -1)
+            component_counts.append(len(components))
+            connection_counts.append(len(connections))
+            pid = design.get('problem_id')
+            problem_index.append(problem_lookup.get(pid, -1) if pid else -1)
+
+        n = len(component_counts)
+        presence = np.zeros((n, self.n_types), dtype=np.int32)
+        np.add.at(presence, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1)
+        return EncodedDesigns(
+            presence=presence,
+            component_counts=np.array(component_counts, dtype=np.int32),
+            connection_counts=np.array(connection_counts, dtype=np.int32),
+            problem_index=np.array(problem_index, dtype=np.intp),
+            edge_design=np.array(edge_design, dtype=np.intp),
+            edge_from=np.array(edge_from, dtype=np.intp),
+            edge_to=np.array(edge_to, dtype=np.intp),
+        )
+
+    def _encode_columnar(self, d: int, design: Dict[str, Any], rows: List[int], cols: List[int],
+                         edge_design: List[int], edge_from: List[int], edge_to: List[int]) -> Tuple[int, int]:
+        """Append one columnar design's entries; its type codes map to type ids in one lookup"""
+        codes, edges = _columns(design)
+        lookup = np.array([self.engine.type_ids.get(t, -1) for t in design['types']] or [-1], dtype=np.intp)
+        tids = lookup[codes]
+        known = tids[tids >= 0].tolist()
+        rows.extend([d] * len(known))
+        cols.extend(known)
+        src = tids[edges[0::2]]
+        dst = np.where(src >= 0, tids[edges[1::2]], -1)
+        edge_design.extend([d] * len(src))
+        edge_from.extend(src.tolist())
+        edge_to.extend(dst.tolist())
+        return len(codes), len(src)
+
+    def edge_tensor(self, encoded: EncodedDesigns) -> np.ndarray:
+        """designs x types x types counts of resolved edges"""
+        n, t = len(encoded), self.n_types
+        resolved = (encoded.edge_from >= 0) & (encoded.edge_to >= 0)
+        flat = (encoded.edge_design[resolved] * t + encoded.edge_from[resolved]) * t + encoded.edge_to[resolved]
+        return np.bincount(flat, minlength=n * t * t).reshape(n, t, t)
+
+    def score(self, encoded: EncodedDesigns) -> Dict[str, np.ndarray]:
+        """Compute every rule-group score for all designs with array operations"""
+        present = encoded.presence > 0
+        has_problem = encoded.problem_index >= 0
+
+        required_hits = (present & self.required[encoded.problem_index]).sum(axis=1)
+        basic = present[:, self.basic].sum(axis=1) * BASIC_COMPONENT_POINTS
+        basic += (encoded.component_counts >= DIVERSITY_MIN_COMPONENTS) * DIVERSITY_POINTS
+        required_score = np.where(has_problem, required_hits * REQUIRED_COMPONENT_POINTS, basic)
+
+        valid_edges = (self.edge_tensor(encoded) * self.validity).sum(axis=(1, 2))
+        connection_score = (encoded.connection_counts > 0) * CONNECTED_POINTS + valid_edges * VALID_CONNECTION_POINTS
+
+        pattern_score = self._checks_score(present, self.patterns)
+        practices_score = self._checks_score(present, self.practices)
+
+        scores = {
+            'required_components': np.minimum(required_score, GROUP_MAX_SCORE),
+            'connections': np.minimum(connection_score, GROUP_MAX_SCORE),
+            'architecture_patterns': np.minimum(pattern_score, GROUP_MAX_SCORE),
+            'best_practices': np.minimum(practices_score, GROUP_MAX_SCORE),
+        }
+        total = sum(scores.values())
+        scores['score'] = total
+        scores['passed'] = total >= self.min_scores[encoded.problem_index]
+        return scores
+
+    @staticmethod
+    def _checks_score(present: np.ndarray, checks) -> np.ndarray:
+        masks, points = checks
+        # A check hits when no required type is missing
+        hits = ~((~present[:, None, :]) & masks[None, :, :]).any(axis=2)
+        return hits @ points
+
+    def results(self, encoded: EncodedDesigns, with_tests: bool = True,
+                designs: Optional[List[Dict[str, Any]]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield ValidationResult-shaped dicts in input order.
+
+        Passing the raw `designs` the chunk was encoded from adds the graph
+        analysis tests, which need component ids.
+        """
+        scores = self.score(encoded)
+        total = scores['score']
+        feedback = self.feedback[total]
+        groups = ('required_components', 'connections', 'architecture_patterns', 'best_practices')
+        columns = [scores[g].tolist() for g in groups]
+        totals = total.tolist()
+        passed = scores['passed'].tolist()
+
+        profiles = self._profiles(encoded) if with_tests else None
+        for i in range(len(encoded)):
+            result = {
+                'score': totals[i],
+                'passed': passed[i],
+                'feedback': feedback[i],
+                'detailed_results': {g: columns[k][i] for k, g in enumerate(groups)},
+                'test_results': [],
+            }
+            if profiles is not None:
+                result['test_results'] = self._tests(profiles[i], int(encoded.problem_index[i]))
+                if designs is not None:
+                    result['test_results'].extend(self._graph_tests(designs[i]))
+            yield result
+
+    def _profiles(self, encoded: EncodedDesigns) -> List[DesignProfile]:
+        present = encoded.presence > 0
+        type_masks = (present * self.bit_values).sum(axis=1).tolist()
+        resolved = (encoded.edge_from >= 0) & (encoded.edge_to >= 0)
+        valid = np.zeros(len(encoded.edge_from), dtype=bool)
+        valid[resolved] = self.validity[encoded.edge_from[resolved], encoded.edge_to[resolved]]
+        valid_edges: List[List] = [[] for _ in range(len(encoded))]
+        for d, src, dst in zip(encoded.edge_design[valid].tolist(), encoded.edge_from[valid].tolist(),
+                               encoded.edge_to[valid].tolist()):
+            valid_edges[d].append((src, dst))
+        component_counts = encoded.component_counts.tolist()
+        connection_counts = encoded.connection_counts.tolist()
+        return [
+            DesignProfile(type_masks[i], {}, component_counts[i], connection_counts[i], valid_edges[i])
+            for i in range(len(encoded))
+        ]
+
+    def _tests(self, profile: DesignProfile, problem_index: int) -> List[Dict]:
+        engine = self.engine
+        problem = engine.problems[self.problem_ids[problem_index]] if problem_index >= 0 else None
+        tests = engine.required_components(profile, problem)[1]
+        tests.extend(engine.connections(profile)[1])
+        tests.extend(engine.architecture_patterns(profile)[1])
+        tests.extend(engine.best_practices(profile)[1])
+        return tests
+
+    @staticmethod
+    def _graph_tests(design: Dict[str, Any]) -> List[Dict]:
+        if 'types' in design:
+            codes, edges = _columns(design)
+            return graph_tests(analyze(*columnar.graph(design['types'], codes, edges, design.get('ids'))))
+        ids, types, edges = build_graph(
+            ((c.get('id'), c.get('type')) for c in design.get('components') or []),
+            ((c.get('from_component'), c.get('to_component')) for c in design.get('connections') or [])
+        )
+        return graph_tests(analyze(ids, types, edges))
+
+
+def _columns(design: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    codes = columnar.int32_array(design.get('components') or [])
+    edges = columnar.int32_array(design.get('connections') or [])
+    columnar.check(design['types'], codes, edges, design.get('ids'), None)
+    return codes, edges
+
+
+def _reference(engine: RuleEngine, design: Dict[str, Any]) -> Dict[str, Any]:
+    """One design scored on its own, as the service's offloaded rule path scores it"""
+    from offload import score_columns, score_design
+
+    problem_id = design.get('problem_id')
+    if 'types' in design:
+        codes, edges = _columns(design)
+        evaluation, report = score_columns(design['types'], codes, edges, design.get('ids'), problem_id, engine)
+    else:
+        evaluation, report = score_design(
+            [(c.get('id'), c.get('type')) for c in design.get('components') or []],
+            [(c.get('from_component'), c.get('to_component')) for c in design.get('connections') or []],
+            problem_id, engine
+        )
+    return {
+        'score': evaluation.score,
+        'passed': evaluation.passed,
+        'feedback': score_feedback(evaluation.score),
+        'detailed_results': dict(evaluation.detailed_results),
+        'test_results': evaluation.test_results + graph_tests(report),
+    }
+
+
+def _loads(line: str) -> Any:
+    return orjson.loads(line) if orjson else json.loads(line)
+
+
+def _dumps(value: Any) -> str:
+    return orjson.dumps(value).decode("utf-8") if orjson else json.dumps(value, ensure_ascii=False)
+
+
+def _read_chunks(stream, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        chunk.append(_loads(line))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-score a JSONL file of designs with the rule engine")
+    parser.add_argument("input", help="JSONL file of designs ('-' for stdin)")
+    parser.add_argument("output", help="JSONL file for results ('-' for stdout)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Designs encoded per array batch")
+    parser.add_argument("--scores-only", action="store_true", help="Skip building per-test results")
+    parser.add_argument("--verify", type=int, default=0, metavar="N",
+                        help="Check the first N designs against per-design rule scoring")
+    parser.add_argument("--catalog", default=None,
+                        help="Catalog file (default: $VALIDATOR_CATALOG or the service's catalog.json)")
+    args = parser.parse_args(argv)
+
+    # Only the rule tables are needed, not the service and its state files
+    from catalog import DEFAULT_CATALOG_PATH, load_catalog
+    catalog = load_catalog(args.catalog or os.getenv("VALIDATOR_CATALOG") or DEFAULT_CATALOG_PATH)
+    engine = RuleEngine(catalog.component_types, catalog.problems)
+
+    scorer = BulkScorer(engine, score_feedback)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started = time.perf_counter()
+    count = 0
+    mismatches = 0
+    try:
+        for chunk in _read_chunks(source, args.chunk_size):
+            encoded = scorer.encode(chunk)
+            for design, result in zip(chunk, scorer.results(encoded, with_tests=not args.scores_only, designs=chunk)):
+                if count < args.verify:
+                    expected = _reference(engine, design)
+                    if args.scores_only:
+                        expected['test_results'] = []
+                    if expected != result:
+                        mismatches += 1
+                        logger.error(f"Design {count} differs from per-design validation")
+                for key in ('id', 'submission_id'):
+                    if key in design:
+                        result = {key: design[key], **result}
+                sink.write(_dumps(result) + "\n")
+                count += 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed * 60 if elapsed else 0
+    print(f"Scored {count} designs in {elapsed:.2f}s ({rate:,.0f} designs/min)", file=sys.stderr)
+    if args.verify:
+        print(f"Verified {min(count, args.verify)} designs: {mismatches} mismatches", file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Problem and Component Catalog
+Loads the versioned catalog file, validates it, compiles it into the rule
+engine, prompt templates and feature space, and hot-reloads it when the
+file changes
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import time
+
+from precomputed import CatalogResponses
+from prompts import PromptTemplates
+from rule_engine import ARCHITECTURE_PATTERNS, BASIC_COMPONENTS, BEST_PRACTICES, RuleEngine
+from similarity import DesignFeatures
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+
+
+class CatalogError(ValueError):
+    """The catalog file is unreadable or inconsistent; `errors` lists every problem found"""
+
+    def __init__(self, path: str, errors: List[str]):
+        super().__init__(f"Invalid catalog {path}: " + "; ".join(errors))
+        self.path = path
+        self.errors = errors
+
+
+class Catalog(NamedTuple):
+    """Validated catalog contents. `version` is the declared version plus a
+    digest of the file, so an edit without a version bump still changes it"""
+    version: str
+    component_types: Dict[str, Dict[str, Any]]
+    problems: Dict[str, Dict[str, Any]]
+
+
+def _strings(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+def validate(data: Any) -> List[str]:
+    """Every inconsistency in a parsed catalog (empty when it is valid)"""
+    if not isinstance(data, dict):
+        return ["top level must be an object"]
+    errors = []
+    if not isinstance(data.get("version"), (str, int)):
+        errors.append("'version' must be a string or integer")
+    types = data.get("component_types")
+    problems = data.get("problems")
+    if not isinstance(types, dict) or not types:
+        return errors + ["'component_types' must be a non-empty object"]
+    if not isinstance(problems, dict):
+        return errors + ["'problems' must be an object"]
+
+    for type_id, rules in types.items():
+        where = f"component type '{type_id}'"
+        if not isinstance(rules, dict):
+            errors.append(f"{where} must be an object")
+            continue
+        for field in ("name", "category"):
+            if not isinstance(rules.get(field), str):
+                errors.append(f"{where}: '{field}' must be a string")
+        if not isinstance(rules.get("points"), int) or rules["points"] < 0:
+            errors.append(f"{where}: 'points' must be a non-negative integer")
+        for field in ("required_connections", "optional_connections"):
+            targets = rules.get(field, [])
+            if not _strings(targets):
+                errors.append(f"{where}: '{field}' must be a list of type ids")
+                continue
+            errors.extend(f"{where}: {field} references undefined type '{t}'" for t in targets if t not in types)
+
+    # The built-in rule groups score these types, so every catalog must define them
+    builtin = set(BASIC_COMPONENTS)
+    for _, checked_types, _, _ in ARCHITECTURE_PATTERNS + BEST_PRACTICES:
+        builtin.update(checked_types)
+    errors.extend(f"built-in rules need component type '{t}'" for t in sorted(builtin - set(types)))
+
+    for problem_id, problem in problems.items():
+        where = f"problem '{problem_id}'"
+        if not isinstance(problem, dict):
+            errors.append(f"{where} must be an object")
+            continue
+        for field in ("title", "description"):
+            if not isinstance(problem.get(field), str) or not problem[field]:
+                errors.append(f"{where}: '{field}' must be a non-empty string")
+        min_score = problem.get("min_score")
+        if not isinstance(min_score, int) or not 0 <= min_score <= 100:
+            errors.append(f"{where}: 'min_score' must be an integer from 0 to 100")
+        required = problem.get("required_components")
+        optional = problem.get("optional_components", [])
+        if not _strings(required) or not required:
+            errors.append(f"{where}: 'required_components' must be a non-empty list of type ids")
+            required = []
+        if not _strings(optional):
+            errors.append(f"{where}: 'optional_components' must be a list of type ids")
+            optional = []
+        for t in required + optional:
+            if t not in types:
+                errors.append(f"{where}: references undefined component type '{t}'")
+        errors.extend(f"{where}: '{t}' is both required and optional" for t in set(required) & set(optional))
+        test_cases = problem.get("test_cases")
+        if not isinstance(test_cases, list) or not test_cases:
+            errors.append(f"{where}: 'test_cases' must be a non-empty list")
+            continue
+        seen = set()
+        for i, tc in enumerate(test_cases):
+            if not isinstance(tc, dict) or not all(isinstance(tc.get(f), str) for f in ("id", "scenario", "evaluation")):
+                errors.append(f"{where}: test case {i} needs string 'id', 'scenario' and 'evaluation'")
+                continue
+            if tc["id"] in seen:
+                errors.append(f"{where}: duplicate test case id '{tc['id']}'")
+            seen.add(tc["id"])
+            # Optional: the component types the scenario is judged on
+            focus = tc.get("focus")
+            if focus is not None:
+                if not _strings(focus):
+                    errors.append(f"{where}: test case '{tc['id']}' 'focus' must be a list of type ids")
+                    continue
+                errors.extend(f"{where}: test case '{tc['id']}' focuses on undefined component type '{t}'"
+                              for t in focus if t not in types)
+    return errors
+
+
+def load_catalog(path: str = DEFAULT_CATALOG_PATH) -> Catalog:
+    """Read and validate a catalog file; raises CatalogError on any problem"""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw)
+    except (OSError, ValueError) as e:
+        raise CatalogError(path, [str(e)]) from e
+    errors = validate(data)
+    if errors:
+        raise CatalogError(path, errors)
+    digest = hashlib.sha256(raw).hexdigest()[:12]
+    return Catalog(f"{data['version']}-{digest}", data["component_types"], data["problems"])
+
+
+class CompiledCatalog:
+    """A catalog together with everything derived from it.
+
+    Built completely before it is published, so swapping one reference
+    replaces the rule tables, prompt templates, feature space and encoded
+    /problems and /components responses together.
+    """
+
+    def __init__(self, catalog: Catalog, structured_output: bool = False):
+        self.catalog = catalog
+        self.version = catalog.version
+        self.component_types = catalog.component_types
+        self.problems = catalog.problems
+        self.rules = RuleEngine(catalog.component_types, catalog.problems)
+        self.prompts = PromptTemplates(catalog.problems, structured_output=structured_output)
+        self.features = DesignFeatures(catalog.component_types)
+        self.responses = CatalogResponses(catalog.version, catalog.component_types, catalog.problems)
+        self.loaded_at = time.time()
+
+
+class CatalogWatcher:
+    """Reloads the catalog when its file changes.
+
+    `check` compares the file's size and modification time with the last
+    attempt and, on a change, loads, validates and compiles the new file
+    before handing it to `publish`. A file that fails validation is logged
+    and skipped, and the catalog already in use stays in use.
+    """
+
+    def __init__(self, path: str, compile: Callable[[Catalog], CompiledCatalog],
+                 publish: Callable[[CompiledCatalog], None]):
+        self.path = path
+        self.compile = compile
+        self.publish = publish
+        self._signature: Optional[Tuple[int, int]] = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self) -> CompiledCatalog:
+        """Load and compile the current file unconditionally (raises CatalogError)"""
+        signature = self._stat()
+        try:
+            compiled = self.compile(load_catalog(self.path))
+        except CatalogError as e:
+            self._signature = signature
+            self.failures += 1
+            self.last_error = str(e)
+            raise
+        self._signature = signature
+        self.last_error = None
+        return compiled
+
+    def reload(self) -> CompiledCatalog:
+        compiled = self.load()
+        self.publish(compiled)
+        self.reloads += 1
+        logger.info(f"Catalog {compiled.version} loaded from {self.path}")
+        return compiled
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last attempt; True when a new catalog was published"""
+        if self._stat() == self._signature:
+            return False
+        try:
+            self.reload()
+        except CatalogError as e:
+            logger.error(f"Keeping the current catalog: {e}")
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,205 @@
+"""
+Columnar Designs
+Compact wire format for large designs: a type dictionary with one integer
+type code per component and connections as flat index pairs, sent as JSON,
+msgpack or a packed binary buffer that is mapped straight onto NumPy arrays
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import struct
+
+import numpy as np
+import orjson
+
+from rule_engine import DesignProfile, RuleEngine
+
+try:
+    import msgpack
+except ImportError:  # optional: without it msgpack bodies are rejected
+    msgpack = None
+
+# Packed buffer layout (little-endian):
+#   fixed header  magic "DSGN", format version, flags, reserved u16,
+#                 header length, component count, connection count (u32)
+#   JSON header   {"types": [...], "ids": [...]?, "problem_id": ...},
+#                 zero-padded to a multiple of 4 bytes
+#   int32[n]      type code of each component (index into "types")
+#   int32[2m]     connections as (source, target) component indexes
+#   float32[2n]   x, y of each component (only with FLAG_POSITIONS)
+COLUMNAR_MEDIA_TYPE = "application/vnd.design.columnar"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MAGIC = b"DSGN"
+FORMAT_VERSION = 1
+FLAG_POSITIONS = 1
+_FIXED = struct.Struct("<4sBBHIII")
+
+
+def _array(value: Any, dtype: str, kinds: str) -> np.ndarray:
+    if isinstance(value, np.ndarray):
+        array = value
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        # Raw little-endian column, e.g. a msgpack bin field
+        if len(value) % 4:
+            raise ValueError("binary column length must be a multiple of 4")
+        return np.frombuffer(value, dtype=dtype)
+    elif isinstance(value, (list, tuple)):
+        array = np.asarray(value) if value else np.empty(0, dtype=dtype)
+    else:
+        raise ValueError("expected an array")
+    if array.ndim != 1 or (array.size and array.dtype.kind not in kinds):
+        raise ValueError(f"expected a flat array of {'integers' if kinds == 'iu' else 'numbers'}")
+    target = np.dtype(dtype)
+    # A narrowing cast wraps silently, so out-of-range indexes would alias valid ones
+    if target.kind == "i" and array.size and not np.can_cast(array.dtype, target):
+        limits = np.iinfo(target)
+        if array.min() < limits.min or array.max() > limits.max:
+            raise ValueError(f"integers must lie within {limits.min} to {limits.max}")
+    return array.astype(dtype, copy=False)
+
+
+def int32_array(value: Any) -> np.ndarray:
+    """A list, NumPy array or raw buffer as a flat int32 array"""
+    return _array(value, "<i4", "iu")
+
+
+def float32_array(value: Any) -> np.ndarray:
+    """A list, NumPy array or raw buffer as a flat float32 array"""
+    return _array(value, "<f4", "iuf")
+
+
+def check(types: Sequence[str], codes: np.ndarray, edges: np.ndarray,
+          ids: Optional[Sequence[str]], positions: Optional[np.ndarray]):
+    """Raise ValueError unless every index in the columns is in range"""
+    n = len(codes)
+    if n and (codes.min() < 0 or codes.max() >= len(types)):
+        raise ValueError(f"component type codes must index 'types' (0-{len(types) - 1})")
+    if len(edges) % 2:
+        raise ValueError("'connections' must hold (source, target) index pairs")
+    if len(edges) and (edges.min() < 0 or edges.max() >= n):
+        raise ValueError(f"connection endpoints must index 'components' (0-{n - 1})")
+    if ids is not None:
+        if len(ids) != n:
+            raise ValueError(f"'ids' has {len(ids)} entries for {n} components")
+        # Connections refer to indexes, so an id must name exactly one component
+        if len(set(ids)) != n:
+            raise ValueError("'ids' must be unique")
+    if positions is not None and len(positions) != 2 * n:
+        raise ValueError(f"'positions' must hold an x, y pair for each of the {n} components")
+
+
+def default_ids(n: int) -> List[str]:
+    """Ids of components sent without them: their indexes"""
+    return [str(i) for i in range(n)]
+
+
+def profile(engine: RuleEngine, types: Sequence[str], codes: np.ndarray, edges: np.ndarray) -> DesignProfile:
+    """RuleEngine.profile over the columns, with array operations instead of a pass per component"""
+    type_ids = engine.type_ids
+    lookup = np.array([type_ids.get(t, -1) for t in types] or [-1], dtype=np.intp)
+    tids = lookup[codes]
+    counts = np.bincount(tids[tids >= 0], minlength=len(type_ids)).tolist()
+    type_counts = {tid: count for tid, count in enumerate(counts) if count}
+    type_mask = 0
+    for tid in type_counts:
+        type_mask |= 1 << tid
+
+    src = tids[edges[0::2]]
+    dst = tids[edges[1::2]]
+    valid_targets = np.array(engine.valid_targets, dtype=object if len(type_ids) > 62 else np.int64)
+    resolved = (src >= 0) & (dst >= 0)
+    valid = np.zeros(len(src), dtype=bool)
+    valid[resolved] = (valid_targets[src[resolved]] >> dst[resolved]) & 1 == 1
+    valid_edges = list(zip(src[valid].tolist(), dst[valid].tolist()))
+    return DesignProfile(type_mask, type_counts, len(codes), len(src), valid_edges)
+
+
+def graph(types: Sequence[str], codes: np.ndarray, edges: np.ndarray,
+          ids: Optional[Sequence[str]]) -> Tuple[List[str], List[str], List[Tuple[int, int]]]:
+    """build_graph's (ids, types, index edges) read off the columns; nothing needs resolving"""
+    pairs = edges.tolist()
+    return (
+        list(ids) if ids is not None else default_ids(len(codes)),
+        [types[c] for c in codes.tolist()],
+        list(zip(pairs[0::2], pairs[1::2])),
+    )
+
+
+def pack(types: Sequence[str], components: Sequence[int], connections: Sequence[int] = (),
+         ids: Optional[Sequence[str]] = None, positions: Optional[Sequence[float]] = None,
+         problem_id: Optional[str] = None) -> bytes:
+    """Encode columnar design fields as a packed buffer (the client side of `unpack`)"""
+    codes = np.ascontiguousarray(components, dtype="<i4")
+    edges = np.ascontiguousarray(connections, dtype="<i4")
+    header: Dict[str, Any] = {"types": list(types)}
+    if ids is not None:
+        header["ids"] = list(ids)
+    if problem_id is not None:
+        header["problem_id"] = problem_id
+    encoded = orjson.dumps(header)
+    encoded += b"\0" * (-len(encoded) % 4)
+    flags = FLAG_POSITIONS if positions is not None else 0
+    parts = [
+        _FIXED.pack(MAGIC, FORMAT_VERSION, flags, 0, len(encoded), len(codes), len(edges) // 2),
+        encoded, codes.tobytes(), edges.tobytes(),
+    ]
+    if positions is not None:
+        parts.append(np.ascontiguousarray(positions, dtype="<f4").tobytes())
+    return b"".join(parts)
+
+
+def unpack(buffer: bytes) -> Dict[str, Any]:
+    """Decode a packed buffer into columnar design fields.
+
+    The arrays are read-only views into `buffer`, not copies.
+    """
+    if len(buffer) < _FIXED.size:
+        raise ValueError("packed design is truncated")
+    magic, version, flags, _, header_len, n, m = _FIXED.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("not a packed design")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported packed design version {version}")
+    offset = _FIXED.size + header_len
+    size = offset + 4 * (n + 2 * m + (2 * n if flags & FLAG_POSITIONS else 0))
+    if header_len % 4 or len(buffer) != size:
+        raise ValueError(f"packed design should be {size} bytes, got {len(buffer)}")
+    try:
+        header = orjson.loads(bytes(buffer[_FIXED.size:offset]).rstrip(b"\0"))
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"invalid packed design header: {e}") from e
+    if not isinstance(header, dict):
+        raise ValueError("packed design header must be an object")
+
+    fields = dict(header)
+    fields["components"] = np.frombuffer(buffer, dtype="<i4", count=n, offset=offset)
+    offset += 4 * n
+    fields["connections"] = np.frombuffer(buffer, dtype="<i4", count=2 * m, offset=offset)
+    offset += 8 * m
+    if flags & FLAG_POSITIONS:
+        fields["positions"] = np.frombuffer(buffer, dtype="<f4", count=2 * n, offset=offset)
+    return fields
+
+
+def decode_body(value: Any) -> Any:
+    """Decode a request body that arrived as raw bytes.
+
+    FastAPI hands non-JSON bodies to validation undecoded: a packed buffer
+    is recognised by its magic, anything else must be msgpack. Already
+    decoded values pass through unchanged.
+    """
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        return value
+    if bytes(value[:4]) == MAGIC:
+        return unpack(value)
+    if msgpack is None:
+        raise ValueError(f"body is neither JSON nor a packed design ({MSGPACK_MEDIA_TYPE} needs the msgpack package)")
+    try:
+        return msgpack.unpackb(value, raw=False)
+    except Exception as e:
+        raise ValueError(f"invalid msgpack body: {e}") from e
+
+
+def iter_pairs(ids: Sequence[str], edges: np.ndarray) -> Iterator[Tuple[str, str]]:
+    """(from id, to id) of each connection"""
+    pairs = edges.tolist()
+    return zip([ids[u] for u in pairs[0::2]], [ids[v] for v in pairs[1::2]])
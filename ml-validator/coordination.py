@@ -0,0 +1,113 @@
+"""
+Worker Coordination
+Cross-process state for multi-worker deployments: a token bucket kept in a
+local SQLite file so every worker draws from one global LLM rate limit
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SharedTokenBucket:
+    """Token bucket refilled at `rate` tokens per second, shared through SQLite.
+
+    Each take is one short `BEGIN IMMEDIATE` transaction, which SQLite
+    serializes across processes, so concurrent workers never overdraw the
+    bucket. Drop-in for scheduler.TokenBucket.
+    """
+
+    def __init__(self, db_path: str, rate: float, capacity: float, name: str = "llm"):
+        self.db_path = db_path
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        db = self._connection()
+        with db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            # The first worker to start fills the bucket; later ones join it
+            db.execute(
+                "INSERT OR IGNORE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (name, capacity, time.time()),
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread: takes run in the default executor
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def _take(self) -> float:
+        """Take one token if available; otherwise the seconds until one will be"""
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated = db.execute(
+                "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            db.execute("UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?", (tokens, now, self.name))
+            db.execute("COMMIT")
+            return wait
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                wait = await loop.run_in_executor(None, self._take)
+            except sqlite3.Error as e:
+                # Never stall LLM traffic on a coordination failure
+                logger.warning(f"Shared rate limiter unavailable, not limiting this call: {e}")
+                return
+            if wait == 0.0:
+                return
+            await asyncio.sleep(wait)
+
+    async def try_acquire(self) -> bool:
+        """Take a token only if one is available right now"""
+        if self.rate <= 0:
+            return True
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, self._take) == 0.0
+        except sqlite3.Error:
+            return False
+
+    def available(self) -> float:
+        try:
+            row = self._connection().execute(
+                "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+        except sqlite3.Error:
+            return 0.0
+        return min(self.capacity, row[0] + max(0.0, time.time() - row[1]) * self.rate)
+
+
+def worker_share(total: int, workers: int) -> int:
+    """Per-worker slice of a limit that applies to the deployment as a whole"""
+    return max(1, -(-total // max(1, workers)))
+
@@ -0,0 +1,37 @@
+"""
+Request Deadlines
+Absolute per-request deadlines carried in a context variable, so every
+stage below the handler can see how much time the request has left
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+import time
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Run the body with a deadline `seconds` from now.
+
+    Nested scopes can only shorten the enclosing deadline. None or a
+    non-positive value leaves it unchanged.
+    """
+    current = _deadline.get()
+    if seconds is not None and seconds > 0:
+        candidate = time.monotonic() + seconds
+        if current is None or candidate < current:
+            current = candidate
+    token = _deadline.set(current)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (may be negative), or None"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
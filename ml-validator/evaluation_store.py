@@ -0,0 +1,225 @@
+"""
+Evaluation Store
+Every validation result persisted to a local SQLite database through an
+async write-behind queue, with indexed aggregate queries for analytics
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS evaluations ("
+    " id INTEGER PRIMARY KEY,"
+    " design_key TEXT NOT NULL,"
+    " problem_id TEXT NOT NULL,"
+    " score INTEGER NOT NULL,"
+    " passed INTEGER NOT NULL,"
+    " tier TEXT NOT NULL,"
+    " backend TEXT NOT NULL,"
+    " latency_ms REAL NOT NULL,"
+    " detailed_results TEXT NOT NULL,"
+    " created_at REAL NOT NULL)",
+    # One row per failed test, so failure counts never touch the JSON
+    "CREATE TABLE IF NOT EXISTS test_failures ("
+    " evaluation_id INTEGER NOT NULL,"
+    " problem_id TEXT NOT NULL,"
+    " test_name TEXT NOT NULL)",
+    # Both aggregates are answered from these indexes alone (covering)
+    "CREATE INDEX IF NOT EXISTS evaluations_problem_score ON evaluations (problem_id, score, passed, latency_ms)",
+    "CREATE INDEX IF NOT EXISTS test_failures_problem_test ON test_failures (problem_id, test_name)",
+)
+
+
+class EvaluationRecord(NamedTuple):
+    # A callable is resolved by the writer thread, off the event loop
+    design_key: Union[str, Callable[[], str]]
+    problem_id: str
+    score: int
+    passed: bool
+    tier: str
+    backend: str
+    latency_ms: float
+    detailed_results: Dict[str, Any]
+    failed_tests: List[str]
+    created_at: float
+
+
+class EvaluationStore:
+    """Write-behind SQLite store of evaluations.
+
+    `record` only enqueues, so persisting never adds latency to a response.
+    A background task drains the queue in batches of up to `batch_size`,
+    each inserted in one transaction off the event loop. When the queue
+    holds `max_queue` records, new ones are dropped and counted rather than
+    applying backpressure to requests.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 256, flush_interval: float = 1.0,
+                 max_queue: int = 10000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._db_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        # Shared with the default executor's threads; _db_lock serializes use
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    def record(self, record: EvaluationRecord):
+        if self._queue is None:
+            # Created on first use so both bind to the serving event loop
+            self._queue = asyncio.Queue(self.max_queue)
+            self._writer = asyncio.ensure_future(self._drain())
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Let a burst accumulate into one transaction, up to flush_interval
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            try:
+                await loop.run_in_executor(None, self._insert, batch)
+            except Exception as e:
+                # A failed batch must not stop the writer
+                self.failed += len(batch)
+                logger.warning(f"Evaluation store dropped a batch of {len(batch)}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _insert(self, batch: List[EvaluationRecord]):
+        # Hashed before taking the lock, so readers are not held up by it
+        keys = [r.design_key() if callable(r.design_key) else r.design_key for r in batch]
+        with self._db_lock:
+            try:
+                for r, key in zip(batch, keys):
+                    cursor = self._db.execute(
+                        "INSERT INTO evaluations (design_key, problem_id, score, passed, tier, backend,"
+                        " latency_ms, detailed_results, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, r.problem_id, r.score, int(r.passed), r.tier, r.backend,
+                         r.latency_ms, json.dumps(r.detailed_results), r.created_at)
+                    )
+                    if r.failed_tests:
+                        self._db.executemany(
+                            "INSERT INTO test_failures (evaluation_id, problem_id, test_name) VALUES (?, ?, ?)",
+                            [(cursor.lastrowid, r.problem_id, name) for name in r.failed_tests]
+                        )
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                raise
+        self.written += len(batch)
+        self.batches += 1
+
+    async def flush(self):
+        """Wait until every queued record has been written"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        with self._db_lock:
+            self._db.close()
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def score_distribution(self, problem_id: str, bucket_width: int = 10) -> Dict[str, Any]:
+        """Score histogram, pass rate and latency for one problem"""
+        totals = self._query(
+            "SELECT COUNT(*), AVG(score), SUM(passed), AVG(latency_ms) FROM evaluations WHERE problem_id = ?",
+            (problem_id,)
+        )[0]
+        buckets = self._query(
+            "SELECT (score / ?) * ? AS bucket, COUNT(*) FROM evaluations"
+            " WHERE problem_id = ? GROUP BY bucket ORDER BY bucket",
+            (bucket_width, bucket_width, problem_id)
+        )
+        count = totals[0]
+        return {
+            "count": count,
+            "mean_score": round(totals[1], 2) if count else None,
+            "pass_rate": round(totals[2] / count, 4) if count else None,
+            "mean_latency_ms": round(totals[3], 2) if count else None,
+            "buckets": [{"from": b, "to": min(100, b + bucket_width - 1), "count": n} for b, n in buckets],
+        }
+
+    def failing_tests(self, problem_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most frequently failed tests for one problem"""
+        total = self._query("SELECT COUNT(*) FROM evaluations WHERE problem_id = ?", (problem_id,))[0][0]
+        rows = self._query(
+            "SELECT test_name, COUNT(*) AS failures FROM test_failures WHERE problem_id = ?"
+            " GROUP BY test_name ORDER BY failures DESC, test_name LIMIT ?",
+            (problem_id, limit)
+        )
+        return [
+            {"test": name, "failures": n, "failure_rate": round(n / total, 4) if total else None}
+            for name, n in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.db_path,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+def evaluation_record(design_key: Union[str, Callable[[], str]], problem_id: Optional[str], result: Any,
+                      tier: str, backend: str, seconds: float) -> EvaluationRecord:
+    """Build a record from a ValidationResult"""
+    return EvaluationRecord(
+        design_key=design_key,
+        problem_id=problem_id or "",
+        score=int(result.score),
+        passed=bool(result.passed),
+        tier=tier,
+        backend=backend,
+        latency_ms=round(seconds * 1000, 3),
+        detailed_results=result.model_dump(include={"detailed_results"}, exclude_none=True)["detailed_results"],
+        failed_tests=[t.name for t in result.test_results if not t.passed and t.name],
+        created_at=time.time()
+    )
@@ -0,0 +1,49 @@
+"""
+Fast JSON Paths
+orjson request parsing for every route, and a response class that renders
+pydantic models with pydantic-core and everything else with orjson
+"""
+
+from typing import Any, Callable, Coroutine
+
+import orjson
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for validation results.
+
+    Models are serialized straight to bytes by pydantic-core, skipping the
+    intermediate dict that FastAPI's response_model path builds, with None
+    fields left out so optional scores only appear when they were set.
+    Other content goes through orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, exclude_none=True)
+        return orjson.dumps(content)
+
+
+class FastJSONRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError, so
+            # FastAPI still answers malformed bodies with its usual 422
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class FastJSONRoute(APIRoute):
+    """Route whose request bodies are decoded by orjson before validation"""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            return await handler(FastJSONRequest(request.scope, request.receive))
+
+        return route_handler
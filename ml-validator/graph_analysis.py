@@ -0,0 +1,324 @@
+"""
+Design Graph Analysis
+Linear-time structural checks on a design graph: single points of failure
+(articulation points and bridges), entry-to-storage reachability, orphan and
+unreachable components, and the longest request path
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Where requests enter the system and where they end up
+ENTRY_TYPES = frozenset({'api-gateway', 'cdn'})
+STORAGE_TYPES = frozenset({'database', 'storage'})
+
+# Cap on ids listed in test descriptions
+MAX_LISTED = 5
+
+
+class GraphReport:
+    """Result of analyzing one design graph (node indices refer to `ids`)"""
+
+    def __init__(self, ids: List[str], types: List[str], edge_count: int):
+        self.ids = ids
+        self.types = types
+        self.edge_count = edge_count
+        self.articulation_points: List[int] = []
+        self.bridges: List[Tuple[int, int]] = []
+        self.entry_nodes: List[int] = []
+        self.storage_nodes: List[int] = []
+        self.unreachable: List[int] = []
+        self.orphans: List[int] = []
+        self.storage_reachable = False
+        self.longest_path: List[int] = []
+
+    def summary(self) -> Dict[str, Any]:
+        ids = self.ids
+        return {
+            'nodes': len(ids),
+            'edges': self.edge_count,
+            'articulation_points': [ids[v] for v in self.articulation_points],
+            'bridges': [(ids[u], ids[v]) for u, v in self.bridges],
+            'entry_nodes': [ids[v] for v in self.entry_nodes],
+            'storage_reachable': self.storage_reachable,
+            'unreachable': [ids[v] for v in self.unreachable],
+            'orphans': [ids[v] for v in self.orphans],
+            'longest_path': [ids[v] for v in self.longest_path],
+        }
+
+
+def build_graph(components: Iterable[Tuple[str, str]],
+                connections: Iterable[Tuple[Optional[str], Optional[str]]]) -> Tuple[List[str], List[str], List[Tuple[int, int]]]:
+    """Index (id, type) components and resolve (from, to) connections to index pairs.
+
+    Duplicate ids resolve to the last component carrying them; connections
+    with an unknown endpoint are dropped, matching the rule engine.
+    """
+    ids: List[str] = []
+    types: List[str] = []
+    index: Dict[str, int] = {}
+    for comp_id, comp_type in components:
+        index[comp_id] = len(ids)
+        ids.append(comp_id)
+        types.append(comp_type)
+    edges: List[Tuple[int, int]] = []
+    for src, dst in connections:
+        u = index.get(src)
+        v = index.get(dst)
+        if u is not None and v is not None:
+            edges.append((u, v))
+    return ids, types, edges
+
+
+def analyze(ids: List[str], types: Sequence[str], edges: Sequence[Tuple[int, int]],
+            entry_types: Set[str] = ENTRY_TYPES, storage_types: Set[str] = STORAGE_TYPES) -> GraphReport:
+    """Run every structural check in O(V+E)"""
+    n = len(ids)
+    report = GraphReport(ids, list(types), len(edges))
+
+    out_adj: List[List[int]] = [[] for _ in range(n)]
+    undirected: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+    degree = [0] * n
+    for eid, (u, v) in enumerate(edges):
+        out_adj[u].append(v)
+        degree[u] += 1
+        degree[v] += 1
+        if u != v:
+            undirected[u].append((v, eid))
+            undirected[v].append((u, eid))
+
+    report.orphans = [v for v in range(n) if degree[v] == 0]
+    report.entry_nodes = [v for v in range(n) if types[v] in entry_types]
+    report.storage_nodes = [v for v in range(n) if types[v] in storage_types]
+    report.articulation_points, report.bridges = _articulation_points_and_bridges(n, undirected, edges)
+
+    if report.entry_nodes:
+        reached = _reachable(n, out_adj, report.entry_nodes)
+        report.unreachable = [v for v in range(n) if not reached[v]]
+        report.storage_reachable = any(reached[v] for v in report.storage_nodes)
+    report.longest_path = _longest_path(n, out_adj, report.entry_nodes)
+    return report
+
+
+def _articulation_points_and_bridges(n: int, adj: List[List[Tuple[int, int]]],
+                                     edges: Sequence[Tuple[int, int]]) -> Tuple[List[int], List[Tuple[int, int]]]:
+    """Iterative Tarjan lowpoint search on the undirected multigraph"""
+    disc = [-1] * n
+    low = [0] * n
+    parent = [-1] * n
+    parent_edge = [-1] * n
+    cursor = [0] * n
+    is_cut = [False] * n
+    bridges: List[Tuple[int, int]] = []
+    clock = 0
+
+    for root in range(n):
+        if disc[root] != -1:
+            continue
+        disc[root] = low[root] = clock
+        clock += 1
+        root_children = 0
+        stack = [root]
+        while stack:
+            v = stack[-1]
+            neighbors = adj[v]
+            if cursor[v] < len(neighbors):
+                w, eid = neighbors[cursor[v]]
+                cursor[v] += 1
+                if eid == parent_edge[v]:
+                    continue
+                if disc[w] == -1:
+                    parent[w] = v
+                    parent_edge[w] = eid
+                    disc[w] = low[w] = clock
+                    clock += 1
+                    stack.append(w)
+                elif disc[w] < low[v]:
+                    low[v] = disc[w]
+                continue
+
+            stack.pop()
+            u = parent[v]
+            if u == -1:
+                continue
+            if low[v] < low[u]:
+                low[u] = low[v]
+            if low[v] > disc[u]:
+                bridges.append(edges[parent_edge[v]])
+            if u == root:
+                root_children += 1
+            elif low[v] >= disc[u]:
+                is_cut[u] = True
+        if root_children > 1:
+            is_cut[root] = True
+
+    return [v for v in range(n) if is_cut[v]], bridges
+
+
+def _reachable(n: int, adj: List[List[int]], sources: List[int]) -> List[bool]:
+    seen = [False] * n
+    stack = list(sources)
+    for s in sources:
+        seen[s] = True
+    while stack:
+        v = stack.pop()
+        for w in adj[v]:
+            if not seen[w]:
+                seen[w] = True
+                stack.append(w)
+    return seen
+
+
+def _strongly_connected(n: int, adj: List[List[int]]) -> Tuple[List[int], int]:
+    """Iterative Tarjan SCC; components are numbered in reverse topological order"""
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    component = [-1] * n
+    cursor = [0] * n
+    scc_stack: List[int] = []
+    clock = 0
+    count = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = clock
+        clock += 1
+        scc_stack.append(root)
+        on_stack[root] = True
+        call = [root]
+        while call:
+            v = call[-1]
+            if cursor[v] < len(adj[v]):
+                w = adj[v][cursor[v]]
+                cursor[v] += 1
+                if index[w] == -1:
+                    index[w] = low[w] = clock
+                    clock += 1
+                    scc_stack.append(w)
+                    on_stack[w] = True
+                    call.append(w)
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+
+            call.pop()
+            if call and low[v] < low[call[-1]]:
+                low[call[-1]] = low[v]
+            if low[v] == index[v]:
+                while True:
+                    w = scc_stack.pop()
+                    on_stack[w] = False
+                    component[w] = count
+                    if w == v:
+                        break
+                count += 1
+    return component, count
+
+
+def _longest_path(n: int, adj: List[List[int]], entries: List[int]) -> List[int]:
+    """Longest request path (in components) over the SCC condensation.
+
+    Cycles are collapsed, so each strongly connected group counts once. Paths
+    start at entry components, or at any source when there are none.
+    """
+    if n == 0:
+        return []
+    component, count = _strongly_connected(n, adj)
+    representative = [-1] * count
+    for v in range(n):
+        if representative[component[v]] == -1:
+            representative[component[v]] = v
+    successors: List[List[int]] = [[] for _ in range(count)]
+    has_incoming = [False] * count
+    for v in range(n):
+        cv = component[v]
+        for w in adj[v]:
+            cw = component[w]
+            if cv != cw:
+                successors[cv].append(cw)
+                has_incoming[cw] = True
+
+    dist = [0] * count
+    pred = [-1] * count
+    if entries:
+        for v in entries:
+            dist[component[v]] = 1
+            representative[component[v]] = v
+    else:
+        for c in range(count):
+            if not has_incoming[c]:
+                dist[c] = 1
+
+    # Tarjan numbers sinks first, so walking ids downwards is topological order
+    for c in range(count - 1, -1, -1):
+        if dist[c] == 0:
+            continue
+        for s in successors[c]:
+            if dist[c] + 1 > dist[s]:
+                dist[s] = dist[c] + 1
+                pred[s] = c
+
+    end = max(range(count), key=dist.__getitem__)
+    if dist[end] == 0:
+        return []
+    path = []
+    while end != -1:
+        path.append(representative[end])
+        end = pred[end]
+    path.reverse()
+    return path
+
+
+def _listed(report: GraphReport, nodes: List[int]) -> str:
+    shown = ", ".join(f"{report.ids[v]} ({report.types[v]})" for v in nodes[:MAX_LISTED])
+    if len(nodes) > MAX_LISTED:
+        shown += f" and {len(nodes) - MAX_LISTED} more"
+    return shown
+
+
+def graph_tests(report: GraphReport) -> List[Dict[str, Any]]:
+    """Deterministic structural test results (informational, worth 0 points)"""
+    tests = []
+
+    if report.articulation_points:
+        tests.append({
+            'name': 'Single point of failure',
+            'passed': False,
+            'points': 0,
+            'description': f'Removing any of these disconnects the design: {_listed(report, report.articulation_points)}'
+        })
+    else:
+        tests.append({
+            'name': 'Single point of failure',
+            'passed': True,
+            'points': 0,
+            'description': 'No single component disconnects the design'
+        })
+
+    if not report.entry_nodes:
+        description = 'No entry component (API Gateway or CDN) to route requests from'
+    elif not report.storage_nodes:
+        description = 'No storage component for requests to reach'
+    elif report.storage_reachable:
+        description = f'Requests can flow from an entry point to storage (longest path: {len(report.longest_path)} components)'
+    else:
+        description = 'No path from any entry component to storage'
+    tests.append({
+        'name': 'Entry to storage reachability',
+        'passed': report.storage_reachable,
+        'points': 0,
+        'description': description
+    })
+
+    disconnected = sorted(set(report.orphans) | set(report.unreachable))
+    tests.append({
+        'name': 'Orphan components',
+        'passed': not disconnected,
+        'points': 0,
+        'description': (
+            f'Disconnected from the request flow: {_listed(report, disconnected)}'
+            if disconnected else 'Every component is connected to the request flow'
+        )
+    })
+    return tests
@@ -0,0 +1,199 @@
+"""
+Incremental Design Sessions
+Server-side design state that is updated by add/remove deltas and
+re-scored in time proportional to the size of each edit
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import logging
+import threading
+import time
+import uuid
+
+from rule_engine import RuleEngine, RuleEvaluation
+
+logger = logging.getLogger(__name__)
+
+
+class DeltaError(ValueError):
+    """A delta that cannot be applied to the session's current design"""
+
+
+class DesignSession:
+    """One canvas being edited.
+
+    Keeps type counts, the type presence mask, and the number of connections
+    whose endpoints currently resolve to a valid rule pair. Every edge is
+    indexed by both endpoint ids so adding or removing a component only
+    revisits its own edges. Semantics match full validation: connections
+    to missing components are kept but score nothing.
+    """
+
+    def __init__(self, engine: RuleEngine, problem_id: Optional[str] = None):
+        self.session_id = uuid.uuid4().hex
+        self.engine = engine
+        self.problem_id = problem_id
+        self.version = 0
+        self.touched = time.monotonic()
+
+        self._components: Dict[str, Tuple[str, int, Dict[str, float]]] = {}
+        self._type_counts: Dict[int, int] = {}
+        self._type_mask = 0
+        # Insertion-ordered edges keyed by sequence number
+        self._edges: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+        self._edge_valid: Dict[int, bool] = {}
+        self._edges_by_pair: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+        self._edges_by_component: Dict[Optional[str], Set[int]] = {}
+        self._next_edge = 0
+        self._valid_edges = 0
+
+    def check_delta(self, remove_components: List[str], add_components: List[str],
+                    remove_connections: List[Tuple[Optional[str], Optional[str]]]):
+        """Raise DeltaError unless the whole delta applies, so edits are all-or-nothing"""
+        removed = set()
+        for comp_id in remove_components:
+            if comp_id not in self._components or comp_id in removed:
+                raise DeltaError(f"Component '{comp_id}' does not exist")
+            removed.add(comp_id)
+        added = set()
+        for comp_id in add_components:
+            if (comp_id in self._components and comp_id not in removed) or comp_id in added:
+                raise DeltaError(f"Component '{comp_id}' already exists")
+            added.add(comp_id)
+        wanted: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+        for pair in remove_connections:
+            wanted[pair] = wanted.get(pair, 0) + 1
+            if wanted[pair] > len(self._edges_by_pair.get(pair, ())):
+                raise DeltaError(f"Connection '{pair[0]}' -> '{pair[1]}' does not exist")
+
+    # Component edits
+
+    def add_component(self, comp_id: str, comp_type: str, position: Optional[Dict[str, float]] = None):
+        if comp_id in self._components:
+            raise DeltaError(f"Component '{comp_id}' already exists")
+        tid = self.engine.type_ids.get(comp_type, -1) if comp_type else -1
+        self._components[comp_id] = (comp_type, tid, position or {})
+        if tid >= 0:
+            count = self._type_counts.get(tid, 0)
+            self._type_counts[tid] = count + 1
+            if count == 0:
+                self._type_mask |= 1 << tid
+        self._revalidate_edges_of(comp_id)
+
+    def remove_component(self, comp_id: str):
+        entry = self._components.pop(comp_id, None)
+        if entry is None:
+            raise DeltaError(f"Component '{comp_id}' does not exist")
+        tid = entry[1]
+        if tid >= 0:
+            count = self._type_counts[tid] - 1
+            self._type_counts[tid] = count
+            if count == 0:
+                self._type_mask &= ~(1 << tid)
+        self._revalidate_edges_of(comp_id)
+
+    # Connection edits
+
+    def add_connection(self, src: Optional[str], dst: Optional[str]):
+        seq = self._next_edge
+        self._next_edge += 1
+        self._edges[seq] = (src, dst)
+        self._edges_by_pair.setdefault((src, dst), []).append(seq)
+        self._edges_by_component.setdefault(src, set()).add(seq)
+        self._edges_by_component.setdefault(dst, set()).add(seq)
+        valid = self._is_valid(src, dst)
+        self._edge_valid[seq] = valid
+        self._valid_edges += valid
+
+    def remove_connection(self, src: Optional[str], dst: Optional[str]):
+        seqs = self._edges_by_pair.get((src, dst))
+        if not seqs:
+            raise DeltaError(f"Connection '{src}' -> '{dst}' does not exist")
+        seq = seqs.pop()
+        if not seqs:
+            del self._edges_by_pair[(src, dst)]
+        del self._edges[seq]
+        self._valid_edges -= self._edge_valid.pop(seq)
+        for endpoint in (src, dst):
+            incident = self._edges_by_component.get(endpoint)
+            if incident is not None:
+                incident.discard(seq)
+                if not incident:
+                    del self._edges_by_component[endpoint]
+
+    def _is_valid(self, src: Optional[str], dst: Optional[str]) -> bool:
+        source = self._components.get(src)
+        target = self._components.get(dst)
+        if source is None or target is None or source[1] < 0 or target[1] < 0:
+            return False
+        return bool(self.engine.valid_targets[source[1]] >> target[1] & 1)
+
+    def _revalidate_edges_of(self, comp_id: str):
+        for seq in self._edges_by_component.get(comp_id, ()):
+            valid = self._is_valid(*self._edges[seq])
+            self._valid_edges += valid - self._edge_valid[seq]
+            self._edge_valid[seq] = valid
+
+    # Scoring and export
+
+    def score(self) -> RuleEvaluation:
+        """Current rule scores in O(number of rules)"""
+        return self.engine.score_counts(
+            self._type_mask, len(self._components), len(self._edges), self._valid_edges, self.problem_id
+        )
+
+    def components(self) -> Iterator[Tuple[str, str, Dict[str, float]]]:
+        for comp_id, (comp_type, _, position) in self._components.items():
+            yield comp_id, comp_type, position
+
+    def connections(self) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+        return iter(self._edges.values())
+
+
+class SessionStore:
+    """Bounded LRU of live sessions with idle expiry"""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800.0):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, DesignSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.deltas = 0
+
+    def add(self, session: DesignSession):
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self.created += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.expired += 1
+
+    def get(self, session_id: str) -> Optional[DesignSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            now = time.monotonic()
+            if self.ttl_seconds > 0 and now - session.touched > self.ttl_seconds:
+                del self._sessions[session_id]
+                self.expired += 1
+                return None
+            session.touched = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def remove(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "expired": self.expired,
+            "deltas": self.deltas,
+        }
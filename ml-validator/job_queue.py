@@ -0,0 +1,555 @@
+"""
+Job Queue
+Durable asynchronous validation jobs: designs are enqueued in a local
+SQLite file, claimed by asyncio workers in priority lanes, and their
+results kept for polling or posted to a callback URL
+"""
+
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional, Sequence
+from urllib.parse import urlsplit
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import orjson
+
+from metrics import Counter, LabeledHistograms
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Interactive jobs are always claimed first; bulk grading only runs on the
+# workers it is allowed, so a grading run never delays a student's result
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# Seconds after which queue-wait histograms stop resolving (a bulk job can
+# sit behind a whole grading run)
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS jobs ("
+    " seq INTEGER PRIMARY KEY,"
+    " id TEXT NOT NULL UNIQUE,"
+    " lane TEXT NOT NULL,"
+    # queued, running, done, failed or cancelled
+    " status TEXT NOT NULL,"
+    " payload BLOB NOT NULL,"
+    " callback_url TEXT,"
+    # NULL until delivery ends: "delivered" or "failed"
+    " callback TEXT,"
+    " result BLOB,"
+    " error TEXT,"
+    " attempts INTEGER NOT NULL DEFAULT 0,"
+    # A running job whose lease lapsed lost its worker and is claimed again
+    " lease_until REAL,"
+    " created_at REAL NOT NULL,"
+    " started_at REAL,"
+    " finished_at REAL)",
+    "CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, lane, seq)",
+    "CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at)",
+)
+
+
+class QueueFull(Exception):
+    """The queue already holds its maximum of waiting jobs"""
+
+
+class Job(NamedTuple):
+    id: str
+    lane: str
+    payload: bytes
+    attempts: int
+    created_at: float
+
+
+def check_callback_url(url: str, allowed_hosts: Sequence[str] = ()) -> str:
+    """Raise ValueError unless `url` is an http(s) URL on one of `allowed_hosts`.
+
+    Callbacks are refused when no hosts are allowed: the service would
+    otherwise POST results to any address a client names, internal ones
+    included.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an absolute http or https URL")
+    if not allowed_hosts:
+        raise ValueError("callbacks are disabled: no callback hosts are allowed")
+    if parts.hostname.lower() not in allowed_hosts:
+        raise ValueError(f"callback host {parts.hostname!r} is not allowed")
+    return url
+
+
+class JobQueue:
+    """SQLite-backed job queue worked by asyncio tasks.
+
+    The database is the queue: `enqueue` commits the job before returning,
+    and workers claim the oldest job of a lane with a lease they renew
+    while it runs. Jobs left running by a worker that died (or a restart)
+    are claimed again once their lease lapses, up to `max_attempts` times,
+    so several processes can share one file. `handler` turns a payload
+    into the result stored with the job, as JSON bytes; an exception fails
+    the job with its message.
+
+    Of `workers` tasks, at most `bulk_workers` run bulk jobs at once, the
+    rest only take interactive ones. Callbacks are delivered at least once:
+    a job's callback is retried with backoff and, if the process stops
+    before it succeeds, again after the next start.
+    """
+
+    def __init__(self, db_path: str, handler: Callable[[bytes, str], Awaitable[bytes]],
+                 workers: int = 4, bulk_workers: Optional[int] = None, max_queued: int = 10000,
+                 lease_seconds: float = 60.0, max_attempts: int = 3, retention_seconds: float = 86400.0,
+                 poll_interval: float = 1.0, callback_timeout: float = 10.0, callback_retries: int = 5,
+                 callback_hosts: Sequence[str] = (), callback_secret: Optional[str] = None):
+        self.db_path = db_path
+        self.handler = handler
+        self.workers = max(1, workers)
+        # One worker is kept for interactive jobs unless there is only one
+        self.bulk_workers = max(1, self.workers - 1 if bulk_workers is None else min(bulk_workers, self.workers))
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+        self.callback_timeout = callback_timeout
+        self.callback_retries = callback_retries
+        self.callback_hosts = tuple(h.lower() for h in callback_hosts)
+        self.callback_secret = callback_secret.encode() if callback_secret else None
+        self._tasks: List[asyncio.Task] = []
+        self._deliveries: set = set()
+        self._wakeup: Optional[asyncio.Semaphore] = None
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._db_lock = threading.Lock()
+        self.running = {lane: 0 for lane in LANES}
+        # Bulk slots taken by workers claiming or running a bulk job
+        self._bulk_slots = 0
+        self.completed = {lane: Counter() for lane in LANES}
+        self.failed = {lane: Counter() for lane in LANES}
+        self.requeued = Counter()
+        self.callbacks_delivered = Counter()
+        self.callbacks_failed = Counter()
+        self.queue_wait = LabeledHistograms(WAIT_BUCKETS)
+        self.run_time = LabeledHistograms()
+        # Finish times over the last minute, for the throughput gauge
+        self._finished: Deque[float] = deque()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        # Shared with the default executor's threads; _db_lock serializes use
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    async def _db_call(self, fn: Callable[..., Any], *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    # -- producer side --------------------------------------------------
+
+    def _insert(self, job_id: str, lane: str, payload: bytes, callback_url: Optional[str], now: float) -> int:
+        with self._db_lock:
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                counts = dict(self._db.execute(
+                    "SELECT lane, COUNT(*) FROM jobs WHERE status = 'queued' GROUP BY lane"
+                ).fetchall())
+                queued = sum(counts.values())
+                if queued >= self.max_queued:
+                    raise QueueFull(f"{queued} jobs already queued")
+                self._db.execute(
+                    "INSERT INTO jobs (id, lane, status, payload, callback_url, created_at)"
+                    " VALUES (?, ?, 'queued', ?, ?, ?)",
+                    (job_id, lane, payload, callback_url, now)
+                )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return counts.get(lane, 0)
+
+    async def enqueue(self, payload: bytes, lane: str = INTERACTIVE, callback_url: Optional[str] = None) -> Dict[str, Any]:
+        """Persist a job and wake a worker; raises QueueFull at `max_queued` and
+        ValueError for an unknown lane or a callback to a host not allowed"""
+        if lane not in LANES:
+            raise ValueError(f"unknown lane {lane!r} (expected one of {', '.join(LANES)})")
+        if callback_url is not None:
+            check_callback_url(callback_url, self.callback_hosts)
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        ahead = await self._db_call(self._insert, job_id, lane, payload, callback_url, now)
+        if self._wakeup is not None:
+            self._wakeup.release()
+        return {"job_id": job_id, "status": "queued", "lane": lane, "queued_ahead": ahead, "created_at": now}
+
+    def _get(self, job_id: str) -> Optional[tuple]:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT id, lane, status, result, error, attempts, callback_url, callback,"
+                " created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's status, timings and, once done, its result"""
+        row = await self._db_call(self._get, job_id)
+        return self._view(row) if row else None
+
+    @staticmethod
+    def _view(row: tuple) -> Dict[str, Any]:
+        job_id, lane, status, result, error, attempts, callback_url, callback, created, started, finished = row
+        view: Dict[str, Any] = {
+            "job_id": job_id,
+            "status": status,
+            "lane": lane,
+            "attempts": attempts,
+            "created_at": created,
+            "started_at": started,
+            "finished_at": finished,
+        }
+        if started is not None:
+            view["queue_wait_ms"] = round((started - created) * 1000, 3)
+        if result is not None:
+            view["result"] = orjson.loads(result)
+        if error is not None:
+            view["error"] = error
+        if callback_url is not None:
+            view["callback"] = callback or "pending"
+        return view
+
+    def _cancel(self, job_id: str) -> Optional[str]:
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+            self._db.commit()
+            row = self._db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    async def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job; returns the job's status afterwards (None if unknown)"""
+        return await self._db_call(self._cancel, job_id)
+
+    # -- workers --------------------------------------------------------
+
+    def start(self):
+        """Start the workers on the running event loop"""
+        self._wakeup = asyncio.Semaphore(0)
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._maintain()))
+
+    async def close(self):
+        for task in self._tasks + list(self._deliveries):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._deliveries, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        with self._db_lock:
+            self._db.close()
+
+    def _claim(self, lanes: Sequence[str], now: float) -> Optional[Job]:
+        with self._db_lock:
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                # Jobs that keep losing their worker are not retried forever
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, lease_until = NULL,"
+                    " error = 'Worker stopped while running the job' "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                )
+                row = None
+                for lane in lanes:
+                    row = self._db.execute(
+                        "SELECT id, status FROM jobs WHERE lane = ? AND (status = 'queued'"
+                        " OR (status = 'running' AND lease_until < ?)) ORDER BY seq LIMIT 1",
+                        (lane, now)
+                    ).fetchone()
+                    if row:
+                        break
+                if row is None:
+                    self._db.commit()
+                    return None
+                job_id, status = row
+                claimed = self._db.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?,"
+                    " started_at = COALESCE(started_at, ?) WHERE id = ?"
+                    " RETURNING id, lane, payload, attempts, created_at",
+                    (now + self.lease_seconds, now, job_id)
+                ).fetchone()
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        if status == "running":
+            self.requeued.inc()
+            logger.warning(f"Job {job_id} lost its worker, running it again")
+        return Job(*claimed)
+
+    # A worker only writes to a job while it still holds the claim: once its
+    # lease lapses another worker may have claimed the job again, which bumps
+    # `attempts`, and the job then belongs to that worker
+
+    def _extend(self, job: Job, lease_until: float):
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'running' AND attempts = ?",
+                    (lease_until, job.id, job.attempts)
+                )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+
+    def _release(self, job: Job):
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "UPDATE jobs SET status = 'queued', attempts = attempts - 1, lease_until = NULL"
+                    " WHERE id = ? AND status = 'running' AND attempts = ?",
+                    (job.id, job.attempts)
+                )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+
+    def _finish(self, job: Job, status: str, result: Optional[bytes], error: Optional[str],
+                now: float) -> Optional[tuple]:
+        """Record the outcome; returns (callback_url,), or None if the claim was lost"""
+        with self._db_lock:
+            try:
+                row = self._db.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL"
+                    " WHERE id = ? AND status = 'running' AND attempts = ? RETURNING callback_url",
+                    (status, result, error, now, job.id, job.attempts)
+                ).fetchone()
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return row
+
+    async def _work(self):
+        while True:
+            # Bulk jobs only when a bulk slot is free, interactive ones always
+            # first. The slot is taken before the claim is awaited, so idle
+            # workers cannot all pass the check and claim bulk jobs together
+            bulk = self._bulk_slots < self.bulk_workers
+            if bulk:
+                self._bulk_slots += 1
+            try:
+                job = await self._db_call(self._claim, LANES if bulk else (INTERACTIVE,), time.time())
+            except sqlite3.Error as e:
+                logger.warning(f"Job queue claim failed: {e}")
+                job = None
+            except BaseException:
+                if bulk:
+                    self._bulk_slots -= 1
+                raise
+            if bulk and (job is None or job.lane != BULK):
+                self._bulk_slots -= 1
+                bulk = False
+            if job is None:
+                # Woken by an enqueue in this process, or polling for jobs
+                # enqueued by other workers and leases that lapsed
+                try:
+                    await asyncio.wait_for(self._wakeup.acquire(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            finally:
+                if bulk:
+                    self._bulk_slots -= 1
+
+    async def _run(self, job: Job):
+        started = time.time()
+        self.queue_wait.observe(job.lane, max(0.0, started - job.created_at))
+        self.running[job.lane] += 1
+        heartbeat = asyncio.ensure_future(self._heartbeat(job))
+        result = error = None
+        try:
+            result = await self.handler(job.payload, job.lane)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so the next start runs it at once
+            try:
+                self._release(job)
+            except sqlite3.Error as e:
+                logger.warning(f"Job {job.id} could not be handed back: {e}")
+            raise
+        except Exception as e:
+            logger.warning(f"Job {job.id} failed: {e}")
+            error = str(e) or type(e).__name__
+        finally:
+            heartbeat.cancel()
+            self.running[job.lane] -= 1
+        finished = time.time()
+        self.run_time.observe(job.lane, finished - started)
+        try:
+            row = await self._db_call(self._finish, job, "failed" if error is not None else "done",
+                                      result, error, finished)
+        except sqlite3.Error as e:
+            # The job stays running until its lease lapses, then runs again
+            logger.warning(f"Job {job.id} finished but its result could not be saved: {e}")
+            return
+        if row is None:
+            logger.warning(f"Job {job.id} was claimed again after its lease lapsed; dropping this run's result")
+            return
+        (self.failed if error is not None else self.completed)[job.lane].inc()
+        self._finished.append(finished)
+        if row[0]:
+            self._deliver_later(job.id)
+
+    async def _heartbeat(self, job: Job):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self._db_call(self._extend, job, time.time() + self.lease_seconds)
+            except sqlite3.Error as e:
+                # Retried on the next beat; the lease outlasts two missed beats
+                logger.warning(f"Job {job.id} lease could not be extended: {e}")
+
+    def _prune(self, now: float) -> List[str]:
+        with self._db_lock:
+            self._db.execute(
+                "DELETE FROM jobs WHERE finished_at < ? AND (callback_url IS NULL OR callback IS NOT NULL)",
+                (now - self.retention_seconds,)
+            )
+            self._db.commit()
+            return [row[0] for row in self._db.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND callback_url IS NOT NULL"
+                " AND callback IS NULL"
+            ).fetchall()]
+
+    async def _maintain(self):
+        # The first pass re-sends callbacks a previous run left undelivered
+        first = True
+        while True:
+            try:
+                undelivered = await self._db_call(self._prune, time.time())
+            except sqlite3.Error as e:
+                logger.warning(f"Job queue maintenance failed: {e}")
+                undelivered = []
+            if first:
+                for job_id in undelivered:
+                    self._deliver_later(job_id)
+                first = False
+            await asyncio.sleep(60)
+
+    # -- callbacks ------------------------------------------------------
+
+    def _deliver_later(self, job_id: str):
+        task = asyncio.ensure_future(self._deliver(job_id))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(timeout=self.callback_timeout)
+        return self._client
+
+    def _mark_callback(self, job_id: str, outcome: str):
+        with self._db_lock:
+            self._db.execute("UPDATE jobs SET callback = ? WHERE id = ?", (outcome, job_id))
+            self._db.commit()
+
+    async def _deliver(self, job_id: str):
+        row = await self._db_call(self._get, job_id)
+        if row is None:
+            return
+        url = row[6]
+        try:
+            # Checked again: the allowed hosts may have changed since it was queued
+            check_callback_url(url, self.callback_hosts)
+        except ValueError as e:
+            logger.warning(f"Callback for job {job_id} not sent: {e}")
+            self.callbacks_failed.inc()
+            await self._db_call(self._mark_callback, job_id, "failed")
+            return
+        view = self._view(row)
+        view.pop("callback", None)
+        body = orjson.dumps(view)
+        headers = {"Content-Type": "application/json", "X-Job-Id": job_id}
+        if self.callback_secret:
+            digest = hmac.new(self.callback_secret, body, hashlib.sha256).hexdigest()
+            headers["X-Signature-256"] = f"sha256={digest}"
+        for attempt in range(self.callback_retries + 1):
+            if attempt:
+                await asyncio.sleep(min(60.0, 2.0 ** (attempt - 1)))
+            try:
+                response = await self.client.post(url, content=body, headers=headers)
+                if response.status_code < 300:
+                    self.callbacks_delivered.inc()
+                    await self._db_call(self._mark_callback, job_id, "delivered")
+                    return
+                logger.warning(f"Callback for job {job_id} answered {response.status_code}")
+            except Exception as e:
+                logger.warning(f"Callback for job {job_id} failed: {e}")
+        self.callbacks_failed.inc()
+        await self._db_call(self._mark_callback, job_id, "failed")
+
+    # -- metrics --------------------------------------------------------
+
+    def throughput(self, window: float = 60.0) -> float:
+        """Jobs finished per minute over the last `window` seconds"""
+        cutoff = time.time() - window
+        while self._finished and self._finished[0] < cutoff:
+            self._finished.popleft()
+        return len(self._finished) * 60.0 / window
+
+    def _depths(self) -> Dict[str, Dict[str, int]]:
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT lane, status, COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+                " GROUP BY lane, status"
+            ).fetchall()
+        depths = {lane: {"queued": 0, "running": 0} for lane in LANES}
+        for lane, status, count in rows:
+            depths.setdefault(lane, {"queued": 0, "running": 0})[status] = count
+        return depths
+
+    async def depths(self) -> Dict[str, Dict[str, int]]:
+        """Queued and running jobs per lane, across every process sharing the file"""
+        return await self._db_call(self._depths)
+
+    async def stats(self) -> Dict[str, Any]:
+        depths = await self.depths()
+        return {
+            "path": self.db_path,
+            "workers": self.workers,
+            "bulk_workers": self.bulk_workers,
+            "throughput_per_minute": round(self.throughput(), 2),
+            "requeued": self.requeued.value,
+            "callbacks": {"delivered": self.callbacks_delivered.value, "failed": self.callbacks_failed.value},
+            "lanes": {
+                lane: {
+                    **depths[lane],
+                    "running_here": self.running[lane],
+                    "completed": self.completed[lane].value,
+                    "failed": self.failed[lane].value,
+                    "queue_wait": self.queue_wait.get(lane).snapshot(),
+                    "run_time": self.run_time.get(lane).snapshot(),
+                }
+                for lane in LANES
+            },
+        }
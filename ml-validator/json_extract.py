@@ -0,0 +1,125 @@
+"""
+LLM JSON Extraction
+Tolerant parsing of JSON objects out of model output, including an
+incremental parser that yields test case verdicts from a partial stream
+"""
+
+from typing import Any, Dict, List, Optional
+import json
+import re
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def _balanced_end(text: str, start: int) -> int:
+    """Index just past the JSON value opened at `start`, or -1 if unterminated"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+
+def extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """Return the first JSON object in `text`, or None.
+
+    Handles markdown fences, prose around the object and trailing commas.
+    """
+    start = text.find('{')
+    while start != -1:
+        end = _balanced_end(text, start)
+        if end == -1:
+            return None
+        candidate = text[start:end]
+        for attempt in (candidate, _TRAILING_COMMA.sub(r"\1", candidate)):
+            try:
+                value = json.loads(attempt)
+            except ValueError:
+                continue
+            if isinstance(value, dict):
+                return value
+        start = text.find('{', start + 1)
+    return None
+
+
+class IncrementalArrayParser:
+    """Yields the objects of one named JSON array as soon as each one closes.
+
+    Feed chunks of a streamed response; scanning state is kept between calls
+    so every character is examined once.
+    """
+
+    def __init__(self, key: str):
+        self._key = f'"{key}"'
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start = -1
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._buffer += chunk
+        items: List[Dict[str, Any]] = []
+        if self._done:
+            return items
+        if not self._in_array:
+            key_at = self._buffer.find(self._key)
+            if key_at == -1:
+                return items
+            bracket = self._buffer.find('[', key_at + len(self._key))
+            if bracket == -1:
+                return items
+            self._in_array = True
+            self._pos = bracket + 1
+
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                if self._depth == 0 and ch == '{':
+                    self._item_start = i
+                self._depth += 1
+            elif ch in '}]':
+                if self._depth == 0:
+                    # End of the array itself
+                    self._done = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start != -1:
+                    item = extract_json(buffer[self._item_start:i + 1])
+                    if item is not None:
+                        items.append(item)
+                    self._item_start = -1
+            i += 1
+        self._pos = i
+        return items
@@ -3,33 +3,235 @@ AI System Design Validation Service
 FastAPI service for validating system design architectures
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-import json
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import (BaseModel, BeforeValidator, Discriminator, Field, PlainValidator, Tag, TypeAdapter,
+                      WithJsonSchema, model_validator)
+from typing import (Annotated, List, Dict, Any, Awaitable, Callable, Iterable, Literal, Optional, AsyncIterator, Tuple,
+                    Union)
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+import asyncio
+import hmac
 import logging
-import google.generativeai as genai
+import time
 import os
+import sqlite3
+import numpy as np
+import orjson
 from dotenv import load_dotenv
+from result_cache import ResultCache, canonical_design_key
+from singleflight import SingleFlight
+from scheduler import AdmissionRejected, LLMScheduler, hedged
+from rule_engine import DesignProfile, RuleEngine, RuleEvaluation, score_feedback
+from graph_analysis import GraphReport, analyze, build_graph, graph_tests
+from metrics import LLMCallMetrics, PrometheusWriter, TierMetrics
+from prompts import (RESPONSE_SCHEMA, RETRY_SUFFIX, TEST_CASE_SCHEMA, PromptTemplates, TestCasePrompt,
+                     encode_design, estimate_tokens, focused_design)
+from json_extract import IncrementalArrayParser, extract_json
+from incremental import DeltaError, DesignSession, SessionStore
+from llm_backend import GeminiBackend, LLMBackend, MockBackend, load_canned_responses
+from coordination import SharedTokenBucket, worker_share
+from offload import CPUPool, PoolSaturated, score_columns, score_design
+from deadline import deadline_scope, remaining as deadline_remaining
+from similarity import DesignFeatures, SimilarityIndex
+from evaluation_store import EvaluationStore, evaluation_record
+from job_queue import INTERACTIVE, JobQueue, QueueFull
+from catalog import DEFAULT_CATALOG_PATH, CatalogError, CatalogWatcher, CompiledCatalog
+from precomputed import parse_fields
+from fast_json import FastJSONResponse, FastJSONRoute
+import columnar
+from timing import RequestMetrics, TimingMiddleware, record_stage, request_parsed, stage, stage_latency
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env.local'))
 
 # Configure Gemini
 GOOGLE_API_KEY = os.getenv("GOOGLE_GENERATIVE_AI_API_KEY") or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
+
+# LLM backend: "gemini" (REST over pooled keep-alive connections), "mock"
+# (local stand-in for load tests) or "none" (rule-based validation only)
+LLM_BACKEND = os.getenv("VALIDATOR_LLM_BACKEND") or ("gemini" if GOOGLE_API_KEY else "none")
+LLM_MAX_CONNECTIONS = int(os.getenv("VALIDATOR_LLM_MAX_CONNECTIONS", "32"))
+LLM_HTTP_TIMEOUT = float(os.getenv("VALIDATOR_LLM_HTTP_TIMEOUT", "60"))
+MOCK_LATENCY_MS = float(os.getenv("VALIDATOR_MOCK_LATENCY_MS", "800"))
+MOCK_JITTER_MS = float(os.getenv("VALIDATOR_MOCK_JITTER_MS", "200"))
+MOCK_LATENCY_DIST = os.getenv("VALIDATOR_MOCK_LATENCY_DIST", "lognormal")
+MOCK_ERROR_RATE = float(os.getenv("VALIDATOR_MOCK_ERROR_RATE", "0"))
+MOCK_MALFORMED_RATE = float(os.getenv("VALIDATOR_MOCK_MALFORMED_RATE", "0"))
+MOCK_SEED = int(os.getenv("VALIDATOR_MOCK_SEED")) if os.getenv("VALIDATOR_MOCK_SEED") else None
+MOCK_RESPONSES = os.getenv("VALIDATOR_MOCK_RESPONSES") or None
+
+# Model selection; JSON-schema structured output needs Gemini 1.5 or newer
+GEMINI_MODEL = os.getenv("VALIDATOR_GEMINI_MODEL", "gemini-pro")
+STRUCTURED_OUTPUT = os.getenv("VALIDATOR_STRUCTURED_OUTPUT", "auto")
+if STRUCTURED_OUTPUT == "auto":
+    STRUCTURED_OUTPUT = not GEMINI_MODEL.startswith(("gemini-pro", "gemini-1.0"))
+else:
+    STRUCTURED_OUTPUT = STRUCTURED_OUTPUT.lower() in ("1", "true", "yes")
+
+# Multi-worker deployments (serve.py): worker processes share the result
+# cache and the LLM rate limit through SQLite files in the state directory
+WORKERS = int(os.getenv("VALIDATOR_WORKERS", "1"))
+STATE_DIR = os.getenv("VALIDATOR_STATE_DIR") or None
+
+# CPU offload: designs with at least OFFLOAD_MIN_COMPONENTS components are
+# rule-scored in a "process" or "thread" pool ("none" scores inline). Once
+# CPU_POOL_MAX_PENDING designs are queued, requests get 503 with Retry-After
+CPU_POOL_MODE = os.getenv("VALIDATOR_CPU_POOL", "process")
+CPU_POOL_WORKERS = int(os.getenv("VALIDATOR_CPU_POOL_WORKERS") or max(1, (os.cpu_count() or 1) // WORKERS))
+CPU_POOL_MAX_PENDING = int(os.getenv("VALIDATOR_CPU_POOL_MAX_PENDING") or 4 * CPU_POOL_WORKERS)
+OFFLOAD_MIN_COMPONENTS = int(os.getenv("VALIDATOR_OFFLOAD_MIN_COMPONENTS", "500"))
+
+# Result cache configuration
+CACHE_MAX_ENTRIES = int(os.getenv("VALIDATOR_CACHE_SIZE", "4096"))
+CACHE_TTL_SECONDS = float(os.getenv("VALIDATOR_CACHE_TTL", "3600"))
+CACHE_DB_PATH = os.getenv("VALIDATOR_CACHE_DB") or (os.path.join(STATE_DIR, "results.db") if STATE_DIR else None)
+
+# Near-duplicate reuse: a design at least SIMILAR_THRESHOLD cosine-similar to
+# one the LLM already evaluated (same problem, component count within one)
+# reuses that evaluation, its score shifted by the difference in rule
+# scores. Only designs up to SIMILAR_MAX_COMPONENTS components take part;
+# a threshold of 0 disables reuse
+SIMILAR_THRESHOLD = float(os.getenv("VALIDATOR_SIMILAR_THRESHOLD", "0.9"))
+SIMILAR_MAX_ENTRIES = int(os.getenv("VALIDATOR_SIMILAR_MAX_ENTRIES", "200000"))
+SIMILAR_MAX_COMPONENTS = int(os.getenv("VALIDATOR_SIMILAR_MAX_COMPONENTS", "200"))
+
+# Evaluation history for analytics: every result is queued and written in
+# batches to this SQLite file, shared by all workers. Kept in the state
+# directory by default, and off without one ("" disables)
+EVAL_DB_PATH = os.getenv(
+    "VALIDATOR_EVAL_DB", os.path.join(STATE_DIR, "evaluations.db") if STATE_DIR else ""
+) or None
+
+# Asynchronous jobs (POST /jobs): queued designs are kept in this SQLite
+# file, shared by all workers (in the state directory by default; without
+# one, or with "", jobs are disabled), and run by JOB_WORKERS
+# tasks per worker, at most JOB_BULK_WORKERS of them on the bulk lane. A
+# job's LLM call waits for a scheduler slot instead of being shed and may
+# take up to JOB_DEADLINE seconds. Finished jobs are kept JOB_RETENTION
+# seconds. Callbacks only go to the comma-separated JOB_CALLBACK_HOSTS
+# (none when unset, so callback_url is refused) and carry an HMAC-SHA256
+# X-Signature-256 when JOB_CALLBACK_SECRET is set
+JOB_DB_PATH = os.getenv("VALIDATOR_JOB_DB", os.path.join(STATE_DIR, "jobs.db") if STATE_DIR else "") or None
+JOB_WORKERS = int(os.getenv("VALIDATOR_JOB_WORKERS", "4"))
+JOB_BULK_WORKERS = int(os.getenv("VALIDATOR_JOB_BULK_WORKERS") or max(1, JOB_WORKERS - 1))
+JOB_MAX_QUEUED = int(os.getenv("VALIDATOR_JOB_MAX_QUEUED", "10000"))
+JOB_DEADLINE = float(os.getenv("VALIDATOR_JOB_DEADLINE", "120"))
+JOB_RETENTION = float(os.getenv("VALIDATOR_JOB_RETENTION", "86400"))
+JOB_CALLBACK_HOSTS = [h.strip().lower() for h in os.getenv("VALIDATOR_JOB_CALLBACK_HOSTS", "").split(",") if h.strip()]
+JOB_CALLBACK_SECRET = os.getenv("VALIDATOR_JOB_CALLBACK_SECRET") or None
+
+# LLM scheduling configuration (shared by single and batch validation).
+# Both limits apply to the whole deployment: with several workers the
+# concurrency cap is split between them and the rate limit is shared
+LLM_MAX_CONCURRENCY = int(os.getenv("VALIDATOR_LLM_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("VALIDATOR_LLM_RPM", "60"))
+BATCH_MAX_DESIGNS = int(os.getenv("VALIDATOR_BATCH_MAX", "1000"))
+BATCH_ITEM_TIMEOUT = float(os.getenv("VALIDATOR_BATCH_ITEM_TIMEOUT", "30"))
+
+# Tail latency. A request must answer within REQUEST_DEADLINE seconds
+# (clients may ask for less with X-Request-Timeout); the LLM gets what is
+# left minus DEADLINE_MARGIN, which is kept for the rule-based fallback.
+# Interactive LLM calls that would wait behind LLM_MAX_QUEUE others (per
+# worker; 0 for no limit) fall back to rules at once. A call still running
+# after the p95 call latency is hedged with a second copy, for at most
+# HEDGE_MAX_RATIO of calls (0 disables hedging)
+REQUEST_DEADLINE = float(os.getenv("VALIDATOR_REQUEST_DEADLINE", "30"))
+DEADLINE_MARGIN = float(os.getenv("VALIDATOR_DEADLINE_MARGIN", "0.25"))
+LLM_MAX_QUEUE = int(os.getenv("VALIDATOR_LLM_MAX_QUEUE", "64"))
+HEDGE_MAX_RATIO = float(os.getenv("VALIDATOR_HEDGE_MAX_RATIO", "0.1"))
+HEDGE_MIN_SAMPLES = int(os.getenv("VALIDATOR_HEDGE_MIN_SAMPLES", "20"))
+
+# Incremental editing sessions
+SESSION_MAX = int(os.getenv("VALIDATOR_SESSION_MAX", "1000"))
+SESSION_TTL_SECONDS = float(os.getenv("VALIDATOR_SESSION_TTL", "1800"))
+
+# Evaluation mode: "llm-first" asks Gemini first and falls back to rules;
+# "rules-first" runs the rule/graph engine first and only calls the LLM when
+# the deterministic verdict is not conclusive
+EVAL_MODE = os.getenv("VALIDATOR_EVAL_MODE", "llm-first")
+RULES_REJECT_BELOW = int(os.getenv("VALIDATOR_RULES_REJECT_BELOW", "30"))
+RULES_ACCEPT_ABOVE = int(os.getenv("VALIDATOR_RULES_ACCEPT_ABOVE", "95"))
+REDUCED_PROMPT_ABOVE = int(os.getenv("VALIDATOR_REDUCED_PROMPT_ABOVE", "80"))
+
+# LLM prompt shape: "combined" judges every stress scenario in one prompt;
+# "per-test" sends one small prompt per scenario concurrently, showing only
+# the components the scenario's catalog "focus" names (and their
+# neighbours), caches each verdict under that part of the design and
+# averages the scenario scores. A resubmission only re-asks the scenarios
+# whose part changed. Per-test results carry no LLM ratings, and streaming
+# validation always uses the combined prompt
+LLM_PROMPT_MODE = os.getenv("VALIDATOR_LLM_PROMPT_MODE", "combined")
+
+# Observability: Server-Timing header "request" (when the client sends
+# X-Server-Timing: 1), "always" or "off"; /health re-probes the LLM backend
+# at most once per HEALTH_PROBE_TTL seconds
+SERVER_TIMING = os.getenv("VALIDATOR_SERVER_TIMING", "request")
+HEALTH_PROBE_TTL = float(os.getenv("VALIDATOR_HEALTH_PROBE_TTL", "30"))
+
+# Cold start. Workers serve rule-based validation as soon as they start;
+# the LLM client is connected by a background warm-up, retried every
+# LLM_WARMUP_RETRY seconds until the backend answers (0 skips warm-up and
+# connects on the first call). /ready and /ready/llm report the two stages
+LLM_WARMUP_RETRY = float(os.getenv("VALIDATOR_LLM_WARMUP_RETRY", "10"))
+
+# Problem and component catalog. Each worker checks the file every
+# CATALOG_POLL_INTERVAL seconds (0 disables) and swaps in a changed catalog
+# once it validates; replace the file atomically (write, then rename)
+CATALOG_PATH = os.getenv("VALIDATOR_CATALOG") or DEFAULT_CATALOG_PATH
+CATALOG_POLL_INTERVAL = float(os.getenv("VALIDATOR_CATALOG_POLL_INTERVAL", "5"))
+# POST /catalog/reload needs "Authorization: Bearer <ADMIN_TOKEN>"; without
+# a token the endpoint is disabled and only the file watcher reloads
+ADMIN_TOKEN = os.getenv("VALIDATOR_ADMIN_TOKEN") or None
+# /problems and /components are revalidated with If-None-Match after this
+# many seconds; a reload changes their ETags
+CATALOG_MAX_AGE = int(os.getenv("VALIDATOR_CATALOG_MAX_AGE", "300"))
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE}"
+
+# Bump whenever the LLM prompt changes so cached evaluations are invalidated
+PROMPT_VERSION = "2"
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    watcher = asyncio.ensure_future(validator.watch_catalog(CATALOG_POLL_INTERVAL)) if CATALOG_POLL_INTERVAL > 0 else None
+    # Not awaited: rule-only traffic is accepted while the LLM warms up
+    warmup = asyncio.ensure_future(validator.warm_llm(LLM_WARMUP_RETRY)) if LLM_WARMUP_RETRY > 0 else None
+    # Jobs a previous run left queued or running are picked up again here
+    if validator.jobs:
+        validator.jobs.start()
+    yield
+    # Running jobs go back to the queue for the next start
+    if validator.jobs:
+        await validator.jobs.close()
+    for task in (watcher, warmup):
+        if task:
+            task.cancel()
+    # Release pooled LLM connections on shutdown
+    if validator.llm:
+        await validator.llm.close()
+    validator.cpu_pool.close()
+    await validator.cache.close()
+    # Write out queued evaluations before exiting
+    if validator.store:
+        await validator.store.close()
+
 app = FastAPI(
     title="AI System Design Validator",
     description="ML-powered validation service for system design architectures",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+# Request bodies are decoded by orjson on every route declared below
+app.router.route_class = FastJSONRoute
 
 # CORS middleware
 app.add_middleware(
@@ -38,15 +240,50 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag"],
 )
 
-# Data models
-class ComponentModel(BaseModel):
+# Per-route request metrics, recorded by the outermost middleware
+request_metrics = RequestMetrics()
+app.add_middleware(TimingMiddleware, metrics=request_metrics, mode=SERVER_TIMING)
+
+@app.exception_handler(PoolSaturated)
+async def cpu_pool_saturated(request: Request, exc: PoolSaturated):
+    """Shed load instead of queuing without bound behind large designs"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(QueueFull)
+async def job_queue_full(request: Request, exc: QueueFull):
+    """Refuse new jobs while the queue is at JOB_MAX_QUEUED"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Job queue full: {exc}"},
+        headers={"Retry-After": "30"}
+    )
+
+@app.exception_handler(RequestValidationError)
+async def request_validation_failed(request: Request, exc: RequestValidationError):
+    """FastAPI's 422, without echoing inputs back when the body was binary"""
+    if isinstance(exc.body, (bytes, bytearray)):
+        # Packed and msgpack designs (or their arrays) are not JSON-encodable
+        exc = RequestValidationError([{k: v for k, v in e.items() if k != "input"} for e in exc.errors()])
+    return await request_validation_exception_handler(request, exc)
+
+# Data models. Parts of designs and results are slotted dataclasses: cheaper
+# to validate in bulk than nested models, and constructed directly (without
+# validation) wherever the service produces them itself
+@dataclass(slots=True)
+class ComponentModel:
     id: str
     type: str
     position: Dict[str, float]
 
-class ConnectionModel(BaseModel):
+@dataclass(slots=True)
+class ConnectionModel:
     from_component: str = None
     to_component: str = None
 
@@ -55,577 +292,1047 @@ class DesignModel(BaseModel):
     connections: List[ConnectionModel] = []
     problem_id: Optional[str] = None
 
+    # The validator reads designs only through these methods, which
+    # ColumnarDesignModel implements over its arrays
+
+    @property
+    def component_count(self) -> int:
+        return len(self.components)
+
+    def component_pairs(self) -> Iterable[Tuple[str, str]]:
+        return ((c.id, c.type) for c in self.components)
+
+    def connection_pairs(self) -> Iterable[Tuple[Optional[str], Optional[str]]]:
+        return ((c.from_component, c.to_component) for c in self.connections)
+
+    def placed_components(self) -> Iterable[Tuple[str, str, Dict[str, float]]]:
+        return ((c.id, c.type, c.position) for c in self.components)
+
+    def profile(self, engine: RuleEngine) -> DesignProfile:
+        return engine.profile_design(self)
+
+    def graph(self) -> Tuple[List[str], List[str], List[Tuple[int, int]]]:
+        return build_graph(self.component_pairs(), self.connection_pairs())
+
+# Columns of ColumnarDesignModel: lists, NumPy arrays and raw buffers all
+# validate into arrays, so no per-element Python objects outlive validation
+Int32Array = Annotated[np.ndarray, PlainValidator(columnar.int32_array),
+                       WithJsonSchema({"type": "array", "items": {"type": "integer"}})]
+Float32Array = Annotated[np.ndarray, PlainValidator(columnar.float32_array),
+                         WithJsonSchema({"type": "array", "items": {"type": "number"}})]
+
+class ColumnarDesignModel(BaseModel):
+    """Compact form of a large design: `types` is a dictionary of component
+    types, `components` the type code (index into `types`) of each component
+    and `connections` flat (source, target) component index pairs.
+
+    Components are identified by `ids` when given, otherwise by their index.
+    Validation only checks the arrays' ranges; no per-component objects are
+    built, and a design scores exactly like its object-form equivalent.
+    """
+    types: List[str]
+    components: Int32Array
+    connections: Int32Array = Field(default_factory=lambda: columnar.int32_array([]))
+    ids: Optional[List[str]] = None
+    # x, y of each component, flattened; only sessions use them
+    positions: Optional[Float32Array] = None
+    problem_id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _check_indexes(self) -> "ColumnarDesignModel":
+        columnar.check(self.types, self.components, self.connections, self.ids, self.positions)
+        return self
+
+    @property
+    def component_count(self) -> int:
+        return len(self.components)
+
+    def component_ids(self) -> List[str]:
+        return self.ids if self.ids is not None else columnar.default_ids(len(self.components))
+
+    def component_pairs(self) -> Iterable[Tuple[str, str]]:
+        types = self.types
+        return zip(self.component_ids(), [types[c] for c in self.components.tolist()])
+
+    def connection_pairs(self) -> Iterable[Tuple[str, str]]:
+        return columnar.iter_pairs(self.component_ids(), self.connections)
+
+    def placed_components(self) -> Iterable[Tuple[str, str, Dict[str, float]]]:
+        if self.positions is None:
+            return ((i, t, {}) for i, t in self.component_pairs())
+        xy = self.positions.tolist()
+        return ((i, t, {'x': xy[2 * k], 'y': xy[2 * k + 1]}) for k, (i, t) in enumerate(self.component_pairs()))
+
+    def profile(self, engine: RuleEngine) -> DesignProfile:
+        return columnar.profile(engine, self.types, self.components, self.connections)
+
+    def graph(self) -> Tuple[List[str], List[str], List[Tuple[int, int]]]:
+        return columnar.graph(self.types, self.components, self.connections, self.ids)
+
+def _design_form(value: Any) -> str:
+    if isinstance(value, dict):
+        return "columnar" if "types" in value else "object"
+    return "columnar" if isinstance(value, ColumnarDesignModel) else "object"
+
+# Request body accepted wherever a design is: JSON in either form, msgpack
+# (application/msgpack) in either form, or a packed columnar buffer
+# (application/vnd.design.columnar)
+AnyDesign = Union[DesignModel, ColumnarDesignModel]
+DesignBody = Annotated[
+    Union[Annotated[DesignModel, Tag("object")], Annotated[ColumnarDesignModel, Tag("columnar")]],
+    Discriminator(_design_form),
+    BeforeValidator(columnar.decode_body),
+]
+DESIGN_BODY = TypeAdapter(DesignBody)
+
+def _job_design(payload: bytes) -> AnyDesign:
+    """A queued job's design, from its request body as sent (JSON, msgpack or packed)"""
+    try:
+        value = orjson.loads(payload)
+    except orjson.JSONDecodeError:
+        value = payload
+    return DESIGN_BODY.validate_python(value)
+
+@dataclass(slots=True)
+class TestResult:
+    name: str
+    passed: bool
+    # Set by rule-based tests only
+    points: Optional[int] = None
+    description: str = ""
+
+@dataclass(slots=True)
+class SimilarDesign:
+    similarity: float
+    score_adjustment: int
+
+@dataclass(slots=True)
+class DetailedScores:
+    """Rule group scores (rule-based results) or 0-100 ratings (LLM results)"""
+    required_components: Optional[int] = None
+    connections: Optional[int] = None
+    architecture_patterns: Optional[int] = None
+    best_practices: Optional[int] = None
+    scalability: Optional[int] = None
+    reliability: Optional[int] = None
+    completeness: Optional[int] = None
+    correctness: Optional[int] = None
+    similar_design: Optional[SimilarDesign] = None
+
 class ValidationResult(BaseModel):
     score: int
     passed: bool
     feedback: str
-    detailed_results: Dict[str, Any]
-    test_results: List[Dict[str, Any]]
-
-# Component definitions and rules
-COMPONENT_TYPES = {
-    'api-gateway': {
-        'name': 'API Gateway',
-        'category': 'entry',
-        'required_connections': ['web-server', 'load-balancer'],
-        'optional_connections': ['security', 'cache'],
-        'points': 10
-    },
-    'load-balancer': {
-        'name': 'Load Balancer',
-        'category': 'distribution',
-        'required_connections': ['web-server'],
-        'optional_connections': ['api-gateway'],
-        'points': 15
-    },
-    'web-server': {
-        'name': 'Web Server',
-        'category': 'compute',
-        'required_connections': ['database'],
-        'optional_connections': ['cache', 'message-queue', 'load-balancer'],
-        'points': 20
-    },
-    'database': {
-        'name': 'Database',
-        'category': 'storage',
-        'required_connections': [],
-        'optional_connections': ['web-server', 'cache'],
-        'points': 25
-    },
-    'cache': {
-        'name': 'Cache',
-        'category': 'performance',
-        'required_connections': [],
-        'optional_connections': ['web-server', 'database', 'api-gateway'],
-        'points': 15
-    },
-    'message-queue': {
-        'name': 'Message Queue',
-        'category': 'async',
-        'required_connections': [],
-        'optional_connections': ['web-server'],
-        'points': 20
-    },
-    'cdn': {
-        'name': 'CDN',
-        'category': 'performance',
-        'required_connections': [],
-        'optional_connections': ['api-gateway'],
-        'points': 10
-    },
-    'security': {
-        'name': 'Security Layer',
-        'category': 'security',
-        'required_connections': [],
-        'optional_connections': ['api-gateway', 'web-server'],
-        'points': 15
-    }
-}
-
-# Problem definitions
-PROBLEMS = {
-    'url-shortener': {
-        'title': 'Design a URL Shortener (TinyURL)',
-        'description': 'Design a URL shortening service like bit.ly. Functional: Generate short aliases, redirect. Non-Functional: High availability, low latency, 10k writes/sec.',
-        'min_score': 70,
-        'required_components': ['api-gateway', 'web-server', 'database', 'cache'],
-        'optional_components': ['load-balancer', 'cdn', 'security'],
-        'test_cases': [
-            {
-                'id': 'TC-01',
-                'scenario': 'The "Celebrity Tweet": A single URL gets 1 million hits in 1 minute.',
-                'evaluation': 'Does the user include a Cache (Redis/Memcached)?'
-            },
-            {
-                'id': 'TC-02',
-                'scenario': 'Database Exhaustion: 500 million URLs are stored.',
-                'evaluation': 'Does the user mention Database Sharding or NoSQL?'
-            },
-            {
-                'id': 'TC-03',
-                'scenario': 'Collision Test: Two users generate a short link at the exact same millisecond.',
-                'evaluation': 'How is the unique ID generated? (Snowflake ID, Base62, etc.)'
-            }
-        ]
-    },
-    'chat-system': {
-        'title': 'Design a Chat System (WhatsApp/Slack)',
-        'description': 'Design a real-time messaging system. Functional: 1v1 chat, Group chat. Non-Functional: Low latency, Persistent storage.',
-        'min_score': 75,
-        'required_components': ['api-gateway', 'web-server', 'database', 'message-queue'],
-        'optional_components': ['load-balancer', 'cache', 'security'],
-        'test_cases': [
-            {
-                'id': 'TC-01',
-                'scenario': 'Real-time User Experience.',
-                'evaluation': 'Does the system use WebSockets or Long Polling for immediate message delivery?'
-            },
-            {
-                'id': 'TC-02',
-                'scenario': 'User goes offline and comes back.',
-                'evaluation': 'Are messages queued/stored reliably to be delivered when user is back online?'
-            },
-            {
-                'id': 'TC-03',
-                'scenario': 'Group Chat with 1000 users.',
-                'evaluation': 'Does the system handle fan-out messages efficiently?'
-            }
-        ]
-    },
-    'social-media-feed': {
-        'title': 'Design a Social Media Feed (Twitter/Instagram)',
-        'description': 'Design a scalable social media platform. Functional: Post tweet, View feed. Non-Functional: Eventual consistency allowed, fast read, heavy read ratio.',
-        'min_score': 80,
-        'required_components': ['api-gateway', 'load-balancer', 'web-server', 'database', 'cache'],
-        'optional_components': ['cdn', 'message-queue', 'security'],
-        'test_cases': [
-            {
-                'id': 'TC-01',
-                'scenario': 'Justin Bieber posts a photo (Viral Content).',
-                'evaluation': 'Is a CDN used for media? Is the post metadata cached?'
-            },
-            {
-                'id': 'TC-02',
-                'scenario': 'Feed Generation Latency.',
-                'evaluation': 'Does the system pre-generate feeds (Fan-out on write) or generate on read?'
-            },
-            {
-                'id': 'TC-03',
-                'scenario': 'Heavy Read Traffic.',
-                'evaluation': 'Are Read Replicas used for the database?'
-            }
-        ]
-    },
-    'video-streaming': {
-        'title': 'Design YouTube/Netflix',
-        'description': 'Design a video streaming platform. Functional: Upload, Transcode, Stream. Non-Functional: High throughput, low latency streaming.',
-        'min_score': 80,
-        'required_components': ['api-gateway', 'load-balancer', 'web-server', 'database', 'cdn', 'storage'],
-        'optional_components': ['message-queue', 'cache', 'security'],
-        'test_cases': [
-            {
-                'id': 'TC-01',
-                'scenario': 'Global Buffet: Users in Australia watching video hosted in US.',
-                'evaluation': 'Is a CDN used to serve video chunks from the edge?'
-            },
-            {
-                'id': 'TC-02',
-                'scenario': 'Processing 4K Uploads.',
-                'evaluation': 'Is there a queue + transcoding workers pipeline (Async processing)?'
-            },
-            {
-                'id': 'TC-03',
-                'scenario': 'Metadata Bottleneck.',
-                'evaluation': 'Is video metadata separated from the large video blobs? (Blob store vs SQL/NoSQL)'
-            }
-        ]
-    },
-    'ride-sharing': {
-        'title': 'Design Uber/Lyft',
-        'description': 'Design a ride-sharing service. Functional: Match driver/rider, location tracking. Non-Functional: High consistency for matching, real-time updates.',
-        'min_score': 85,
-        'required_components': ['api-gateway', 'load-balancer', 'web-server', 'database', 'cache', 'message-queue'],
-        'optional_components': ['security', 'geo-service'],
-        'test_cases': [
-            {
-                'id': 'TC-01',
-                'scenario': 'Geospatial Search: Find nearest 10 drivers.',
-                'evaluation': 'Does the design imply a QuadTree/Geohash index (usually via specialized DB or Service)?'
-            },
-            {
-                'id': 'TC-02',
-                'scenario': 'Race Condition: Two riders book the same driver.',
-                'evaluation': 'Is there a locking mechanism or transactional consistency for bookings?'
-            },
-            {
-                'id': 'TC-03',
-                'scenario': 'Real-time Location Updates.',
-                'evaluation': 'Does it use WebSockets/MQTT for driver location streams?'
-            }
-        ]
-    },
-    'search-engine': {
-        'title': 'Design Google Search',
-        'description': 'Design a web search engine. Functional: Crawl, Index, Search. Non-Functional: Huge scale, low latency search.',
-        'min_score': 85,
-        'required_components': ['api-gateway', 'web-server', 'database', 'cache', 'load-balancer'],
-        'optional_components': ['message-queue', 'worker'],
-        'test_cases': [
-            {
-                'id': 'TC-01',
-                'scenario': 'The Internet is Big: 50 Billion pages.',
-                'evaluation': 'Is the index sharded? (Document vs Term partitioning mentioned?)'
-            },
-            {
-                'id': 'TC-02',
-                'scenario': 'Freshness: News site changes content.',
-                'evaluation': 'Is there a crawler/updater pipeline distinct from the serving layer?'
-            },
-            {
-                'id': 'TC-03',
-                'scenario': 'Typeahead/Autocomplete latency.',
-                'evaluation': 'Is there a Trie or specialized prefix cache structure?'
-            }
-        ]
+    detailed_results: DetailedScores
+    test_results: List[TestResult]
+
+class DesignDelta(BaseModel):
+    add_components: List[ComponentModel] = []
+    remove_components: List[str] = []
+    add_connections: List[ConnectionModel] = []
+    remove_connections: List[ConnectionModel] = []
+
+class SessionScore(BaseModel):
+    session_id: str
+    version: int
+    score: int
+    passed: bool
+    feedback: str
+    detailed_results: DetailedScores
+
+class BatchValidationRequest(BaseModel):
+    designs: List[DesignBody]
+
+    @model_validator(mode="before")
+    @classmethod
+    def _decode(cls, value: Any) -> Any:
+        # msgpack bodies; their items may themselves be packed buffers
+        return columnar.decode_body(value)
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: Optional[ValidationResult] = None
+    error: Optional[str] = None
+
+class BatchValidationResponse(BaseModel):
+    results: List[BatchItemResult]
+    count: int
+
+def create_llm_backend() -> Optional[LLMBackend]:
+    """Build the configured LLM backend, or None for rule-based validation only"""
+    if LLM_BACKEND == "gemini":
+        if not GOOGLE_API_KEY:
+            logger.warning("Gemini backend selected but no API key is set; using rule-based validation")
+            return None
+        return GeminiBackend(
+            api_key=GOOGLE_API_KEY,
+            model=GEMINI_MODEL,
+            max_connections=LLM_MAX_CONNECTIONS,
+            timeout=LLM_HTTP_TIMEOUT
+        )
+    if LLM_BACKEND == "mock":
+        return MockBackend(
+            latency_ms=MOCK_LATENCY_MS,
+            jitter_ms=MOCK_JITTER_MS,
+            distribution=MOCK_LATENCY_DIST,
+            error_rate=MOCK_ERROR_RATE,
+            malformed_rate=MOCK_MALFORMED_RATE,
+            responses=load_canned_responses(MOCK_RESPONSES) if MOCK_RESPONSES else None,
+            seed=MOCK_SEED
+        )
+    if LLM_BACKEND != "none":
+        raise ValueError(f"Unknown VALIDATOR_LLM_BACKEND '{LLM_BACKEND}'")
+    return None
+
+def create_scheduler() -> LLMScheduler:
+    """LLM scheduler whose limits are this worker's share of the deployment's"""
+    burst = max(1.0, float(LLM_MAX_CONCURRENCY))
+    bucket = None
+    if STATE_DIR:
+        bucket = SharedTokenBucket(
+            os.path.join(STATE_DIR, "coordination.db"),
+            rate=LLM_REQUESTS_PER_MINUTE / 60.0,
+            capacity=burst
+        )
+    return LLMScheduler(
+        max_concurrency=worker_share(LLM_MAX_CONCURRENCY, WORKERS),
+        requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+        burst=burst,
+        bucket=bucket,
+        max_queue=LLM_MAX_QUEUE if LLM_MAX_QUEUE > 0 else None
+    )
+
+def create_evaluation_store() -> Optional[EvaluationStore]:
+    """Evaluation history, or None when it is disabled or its file cannot be opened"""
+    if not EVAL_DB_PATH:
+        return None
+    try:
+        return EvaluationStore(EVAL_DB_PATH)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Evaluation store disabled: cannot open {EVAL_DB_PATH}: {e}")
+        return None
+
+def create_job_queue(handler: Callable[[bytes, str], Awaitable[bytes]]) -> Optional[JobQueue]:
+    """Job queue running jobs with `handler`, or None when jobs are disabled or the file cannot be opened"""
+    if not JOB_DB_PATH:
+        return None
+    try:
+        return JobQueue(
+            JOB_DB_PATH, handler,
+            workers=JOB_WORKERS,
+            bulk_workers=JOB_BULK_WORKERS,
+            max_queued=JOB_MAX_QUEUED,
+            retention_seconds=JOB_RETENTION,
+            callback_hosts=JOB_CALLBACK_HOSTS,
+            callback_secret=JOB_CALLBACK_SECRET
+        )
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Jobs disabled: cannot open {JOB_DB_PATH}: {e}")
+        return None
+
+# Ratings the model is asked for in detailed_results
+LLM_RATINGS = ("scalability", "reliability", "completeness", "correctness")
+
+def _rating(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return round(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+def _passed(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "pass", "passed", "yes")
+    return value is True
+
+def _verdict(reply: Dict) -> Dict[str, Any]:
+    """A single-scenario reply as {passed, description, score}; a missing score follows the verdict"""
+    passed = _passed(reply.get('passed'))
+    score = _rating(reply.get('score'))
+    return {
+        "passed": passed,
+        "description": str(reply.get('description', '')),
+        "score": min(100, max(0, score)) if score is not None else (100 if passed else 0),
     }
-}
+
+
+def _flight_key(key: str, timeout: Optional[float], bounded: bool) -> str:
+    """Single-flight key of an LLM call: only callers admitted on the same terms share one"""
+    return f"{key}:{'bounded' if bounded else 'unbounded'}:{timeout}"
 
 class DesignValidator:
     """Main validation engine for system designs"""
     
     def __init__(self):
         self.max_score = 100
-        self.model = genai.GenerativeModel('gemini-pro') if GOOGLE_API_KEY else None
+        # Rule tables, prompt templates and the feature space are compiled
+        # from the catalog, and recompiled together when it is reloaded
+        self.catalog_watcher = CatalogWatcher(CATALOG_PATH, self._compile_catalog, self._publish_catalog)
+        self.catalog = self.catalog_watcher.load()
+        self.llm = create_llm_backend()
+        self.response_schema = RESPONSE_SCHEMA if STRUCTURED_OUTPUT else None
+        self.test_case_schema = TEST_CASE_SCHEMA if STRUCTURED_OUTPUT else None
+        self.test_case_hits = 0
+        self.test_case_misses = 0
+        self.llm_metrics = LLMCallMetrics()
+        self.cache = ResultCache(
+            max_entries=CACHE_MAX_ENTRIES,
+            ttl_seconds=CACHE_TTL_SECONDS,
+            db_path=CACHE_DB_PATH
+        )
+        self.inflight = SingleFlight()
+        self.similar = SimilarityIndex(self.features.dims, max_entries=SIMILAR_MAX_ENTRIES)
+        self.similar_hits = 0
+        self.similar_misses = 0
+        self.store = create_evaluation_store()
+        self.jobs = create_job_queue(self.run_job)
+        self.tiers = TierMetrics()
+        self.sessions = SessionStore(max_sessions=SESSION_MAX, ttl_seconds=SESSION_TTL_SECONDS)
+        self.scheduler = create_scheduler()
+        self.cpu_pool = CPUPool(
+            CPU_POOL_MODE,
+            max_workers=CPU_POOL_WORKERS,
+            max_pending=CPU_POOL_MAX_PENDING,
+            initargs=(self.catalog.component_types, self.catalog.problems)
+        )
+        # (checked_at, reachable) from the last backend probe
+        self._probe: Optional[Tuple[float, bool]] = None
+        # "disabled", "cold" (not probed yet), "warming", "warm" or "unreachable"
+        self.llm_state = "cold" if self.llm else "disabled"
+
+    @property
+    def rules(self) -> RuleEngine:
+        return self.catalog.rules
+
+    @property
+    def prompts(self) -> PromptTemplates:
+        return self.catalog.prompts
+
+    @property
+    def features(self) -> DesignFeatures:
+        return self.catalog.features
+
+    def _compile_catalog(self, catalog) -> CompiledCatalog:
+        return CompiledCatalog(catalog, structured_output=STRUCTURED_OUTPUT)
+
+    def _publish_catalog(self, compiled: CompiledCatalog):
+        """Swap in a reloaded catalog.
+
+        Cache keys carry the catalog version, so results cached under the
+        old catalog are no longer found. The similarity index refers to
+        those results and may use another feature space, so it starts over;
+        open sessions keep scoring against the rules they were opened with.
+        """
+        self.catalog = compiled
+        self.similar = SimilarityIndex(compiled.features.dims, max_entries=SIMILAR_MAX_ENTRIES)
+        self.cpu_pool.reinitialize((compiled.component_types, compiled.problems))
+
+    async def watch_catalog(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.catalog_watcher.check()
+            except Exception as e:
+                logger.error(f"Catalog check failed: {e}")
+
+    async def _probe_llm(self) -> bool:
+        reachable = await self.llm.ping()
+        self._probe = (time.monotonic(), reachable)
+        self.llm_state = "warm" if reachable else "unreachable"
+        return reachable
+
+    async def llm_reachable(self) -> Optional[bool]:
+        """Probe the LLM backend at most once per HEALTH_PROBE_TTL; None when disabled"""
+        if not self.llm:
+            return None
+        if self._probe is None or time.monotonic() - self._probe[0] >= HEALTH_PROBE_TTL:
+            await self._probe_llm()
+        return self._probe[1]
+
+    async def warm_llm(self, retry_interval: float):
+        """Connect to the LLM backend ahead of traffic, until it answers.
+
+        The probe builds the HTTP client and leaves a keep-alive connection
+        in its pool, so the first evaluation does not pay for the client
+        setup or the TLS handshake.
+        """
+        if not self.llm:
+            return
+        started = time.perf_counter()
+        while True:
+            if self.llm_state != "unreachable":
+                self.llm_state = "warming"
+            try:
+                if await self._probe_llm():
+                    logger.info(f"LLM backend warm after {time.perf_counter() - started:.2f}s")
+                    return
+            except Exception as e:
+                self.llm_state = "unreachable"
+                logger.warning(f"LLM warm-up failed: {e}")
+            await asyncio.sleep(retry_interval)
+
+    def _key_version(self, reduced: bool = False) -> str:
+        return f"{PROMPT_VERSION}-{self.catalog.version}" + ("-reduced" if reduced else "")
 
-    async def _validate_with_llm(self, design: DesignModel, problem: Dict = None) -> Optional[ValidationResult]:
+    def _cache_key(self, design: AnyDesign, problem_id: str = None, reduced: bool = False) -> str:
+        """Canonical content hash of a design for result caching"""
+        return canonical_design_key(
+            design.component_pairs(),
+            design.connection_pairs(),
+            problem_id,
+            self._key_version(reduced)
+        )
+
+    def _build_prompt(self, design: AnyDesign, problem: Dict = None,
+                      rule_result: Optional[ValidationResult] = None) -> str:
+        """Render the evaluation prompt from the precompiled template.
+
+        Passing the rule-based result builds a reduced prompt: the generic
+        evaluation framework is replaced by the deterministic findings so the
+        model only has to judge the stress scenarios.
+        """
+        with stage("prompt_build"):
+            design_text = encode_design(design.component_pairs(), design.connection_pairs())
+            precheck = None
+            if rule_result is not None:
+                failed_checks = "; ".join(t.name for t in rule_result.test_results if not t.passed) or "none"
+                precheck = f"Automated pre-check: rule score {rule_result.score}/100. Failed checks: {failed_checks}."
+            return self.prompts.render(design.problem_id, design_text, precheck)
+
+    def _result_from_json(self, result_json: Dict, problem: Dict = None) -> ValidationResult:
+        """Map the model's JSON reply onto a ValidationResult.
+
+        The reply is untrusted: the score is coerced to an integer in 0-100
+        (0 when it is not a number), ratings that are not numbers are dropped
+        and test entries that are not objects are skipped, rather than
+        failing the whole evaluation.
+        """
+        score = _rating(result_json.get('score'))
+        score = min(100, max(0, score)) if score is not None else 0
+        ratings = result_json.get('detailed_results')
+        ratings = ratings if isinstance(ratings, dict) else {}
+        tests = result_json.get('test_case_results')
+        return ValidationResult(
+            score=score,
+            passed=score >= (problem.get('min_score', 70) if problem else 70),
+            feedback=result_json.get('analysis', "Evaluation complete."),
+            detailed_results=DetailedScores(**{name: _rating(ratings.get(name)) for name in LLM_RATINGS}),
+            test_results=[
+                TestResult(name=str(t.get('name', '')), passed=_passed(t.get('passed')),
+                           description=str(t.get('description', '')))
+                for t in (tests if isinstance(tests, list) else []) if isinstance(t, dict)
+            ]
+        )
+
+    async def _generate(self, prompt: str, schema: Optional[Dict] = None) -> str:
+        """Send one prompt to the model, hedging it once it runs past the p95"""
+        self.llm_metrics.record_call(estimate_tokens(prompt))
+        with stage("llm_wait"):
+            reply, _, hedge_won = await hedged(
+                lambda: self._timed_generate(prompt, schema), self._hedge_delay(), self._may_hedge
+            )
+        if hedge_won:
+            self.llm_metrics.hedge_wins.inc()
+        return reply
+
+    async def _timed_generate(self, prompt: str, schema: Optional[Dict] = None) -> str:
+        started = time.perf_counter()
+        reply = await self.llm.generate(prompt, schema or self.response_schema)
+        self.llm_metrics.call_latency.observe(time.perf_counter() - started)
+        # A completed call warms the client as well as a probe does
+        self.llm_state = "warm"
+        return reply
+
+    def _hedge_delay(self) -> Optional[float]:
+        """p95 of recent successful calls, once there are enough of them"""
+        if HEDGE_MAX_RATIO <= 0 or self.llm_metrics.call_latency.count < HEDGE_MIN_SAMPLES:
+            return None
+        return self.llm_metrics.call_latency.quantile(0.95)
+
+    async def _may_hedge(self) -> bool:
+        # Hedges stay within their share of calls and draw from the same rate limit
+        if self.llm_metrics.hedges.value >= HEDGE_MAX_RATIO * self.llm_metrics.calls.value:
+            return False
+        if not await self.scheduler.bucket.try_acquire():
+            return False
+        self.llm_metrics.hedges.inc()
+        return True
+
+    def _parse_reply(self, reply: str) -> Optional[Dict]:
+        with stage("response_parse"):
+            return extract_json(reply)
+
+    def _stream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream one prompt's reply from the model, recording its size"""
+        self.llm_metrics.record_call(estimate_tokens(prompt))
+        return self.llm.stream(prompt, self.response_schema)
+
+    async def _validate_with_llm(self, design: AnyDesign, problem: Dict = None,
+                                 rule_result: Optional[ValidationResult] = None) -> Optional[ValidationResult]:
         """Validate design using Gemini LLM with Senior Staff Persona"""
-        if not self.model:
+        if not self.llm:
             return None
             
         try:
-            # 1. Context Assembly
-            problem_title = problem['title'] if problem else f"System Design Problem ({design.problem_id})"
-            problem_desc = problem['description'] if problem else "Design a scalable system for this use case."
-            
-            # Format Test Cases
-            test_cases_text = ""
-            if problem and 'test_cases' in problem:
-                for tc in problem['test_cases']:
-                    test_cases_text += f"- **{tc['id']}**: {tc['scenario']} (Check: {tc['evaluation']})\n"
-            else:
-                # Fallback Generic Test Cases if problem ID not found in backend
-                test_cases_text = """
-                - **TC-01**: High Scalability. (Check: Is there a load balancer and caching?)
-                - **TC-02**: Single Point of Failure. (Check: Are critical components redundant?)
-                - **TC-03**: Data Consistency vs Availability. (Check: Did they choose the right DB strategy?)
-                """
-
-            # Format Design
-            components_list = ", ".join([f"{c.type}" for c in design.components])
-            component_properties = json.dumps([{"type": c.type, "id": c.id} for c in design.components])
-            connections_list = ", ".join([f"{c.from_component}->{c.to_component}" for c in design.connections])
-            
-            # 2. Construct Prompt
-            prompt = f"""
-            Role: You are a Senior Staff System Design Interviewer. Your task is to evaluate a user's proposed architecture for a specific system design problem.
-
-            Problem: {problem_title}
-            Description: {problem_desc}
-
-            User's Design:
-            - Components Used: {components_list}
-            - Full Component List: {component_properties}
-            - Connections: {connections_list}
-
-            Evaluation Framework:
-            1. Requirement Coverage: Did the user address the core functional requirements?
-            2. Component Appropriateness: Are the chosen technologies (Databases, Load Balancers, Caching) correct for the scale?
-            3. Scalability & Bottlenecks: Can the system handle high traffic? Where will it fail first?
-            4. Reliability: Is there a single point of failure?
-
-            The "Stress Scenarios" (Test Cases):
-            Please run the design through the following scenarios. For each, state PASS/FAIL and why.
-            {test_cases_text}
-
-            Output Format (Strict JSON):
-            {{
-                "analysis": "Brief breakdown of strengths and weaknesses (max 2-3 sentences).",
-                "test_case_results": [
-                    {{
-                        "name": "TC-01: [Scenario Name]",
-                        "passed": true/false,
-                        "description": "Explanation of why it passed or failed."
-                    }}
-                ],
-                "detailed_results": {{
-                    "scalability": <score 0-100>,
-                    "reliability": <score 0-100>,
-                    "completeness": <score 0-100>,
-                    "correctness": <score 0-100>
-                }},
-                "score": <overall_percentage 0-100>
-            }}
-            """
+            prompt = self._build_prompt(design, problem, rule_result)
             
-            # 3. Inference
-            response = await self.model.generate_content_async(prompt)
-            clean_text = response.text.replace('```json', '').replace('```', '').strip()
-            result_json = json.loads(clean_text)
+            # Inference, with one retry if the reply holds no parseable JSON
+            result_json = self._parse_reply(await self._generate(prompt))
+            if result_json is None:
+                self.llm_metrics.retries.inc()
+                result_json = self._parse_reply(await self._generate(prompt + RETRY_SUFFIX))
+            if result_json is None:
+                self.llm_metrics.parse_failures.inc()
+                logger.error("LLM reply was not valid JSON after retry")
+                return None
             
-            # 4. Parsing
-            return ValidationResult(
-                score=result_json.get('score', 0),
-                passed=result_json.get('score', 0) >= (problem.get('min_score', 70) if problem else 70),
-                feedback=result_json.get('analysis', "Evaluation complete."),
-                detailed_results=result_json.get('detailed_results', {}),
-                test_results=result_json.get('test_case_results', [])
-            )
+            return self._result_from_json(result_json, problem)
             
         except Exception as e:
             logger.error(f"LLM validation failed: {str(e)}")
             return None
+
+    async def _validate_per_test(self, design: AnyDesign, problem: Dict = None, timeout: Optional[float] = None,
+                                 bounded: bool = True) -> ValidationResult:
+        """Judge each stress scenario with its own prompt, all at once, and aggregate locally.
+
+        Verdicts that came back are cached even when another scenario
+        fails; the first failure is then raised so rules answer this time.
+        """
+        cases = self.prompts.test_cases(design.problem_id)
+        components = list(design.component_pairs())
+        connections = list(design.connection_pairs())
+        verdicts = await asyncio.gather(
+            *(self._judge_test_case(case, components, connections, design.problem_id, timeout, bounded)
+              for case in cases),
+            return_exceptions=True
+        )
+        for verdict in verdicts:
+            if isinstance(verdict, BaseException):
+                raise verdict
+
+        score = round(sum(v["score"] for v in verdicts) / len(verdicts))
+        min_score = problem.get('min_score', 70) if problem else 70
+        failed = [case.id for case, v in zip(cases, verdicts) if not v["passed"]]
+        # A design passes only when every scenario does and the mean clears
+        # the bar, and the feedback says which of the two held it back
+        passed = not failed and score >= min_score
+        if failed:
+            feedback = f"{len(cases) - len(failed)}/{len(cases)} stress scenarios passed. Review {', '.join(failed)}."
+        elif not passed:
+            feedback = f"All {len(cases)} stress scenarios passed, but the score {score} is below the {min_score} needed."
+        else:
+            feedback = f"All {len(cases)} stress scenarios passed. " + self._generate_feedback(max(score, 70), True, {})
+        return ValidationResult(
+            score=score,
+            passed=passed,
+            feedback=feedback,
+            detailed_results=DetailedScores(),
+            test_results=[
+                TestResult(name=case.name, passed=v["passed"], description=v["description"])
+                for case, v in zip(cases, verdicts)
+            ]
+        )
+
+    async def _judge_test_case(self, case: TestCasePrompt, components: List[Tuple[str, str]],
+                               connections: List[Tuple[Optional[str], Optional[str]]], problem_id: Optional[str],
+                               timeout: Optional[float], bounded: bool) -> Dict[str, Any]:
+        """One scenario's verdict, cached under the part of the design it is judged on"""
+        with stage("cache_lookup"):
+            sub_components, sub_connections = focused_design(components, connections, case.focus)
+            key = canonical_design_key(
+                sub_components, sub_connections, problem_id,
+                f"{PROMPT_VERSION}-{self.catalog.version}-{case.id}"
+            )
+            cached = await self.cache.aget(key)
+        if cached is not None:
+            self.test_case_hits += 1
+            return cached
+        self.test_case_misses += 1
+        prompt = case.render(encode_design(sub_components, sub_connections))
+
+        async def call():
+            reply = self._parse_reply(await self._generate(prompt, self.test_case_schema))
+            if reply is None:
+                self.llm_metrics.retries.inc()
+                reply = self._parse_reply(await self._generate(prompt + RETRY_SUFFIX, self.test_case_schema))
+            if reply is None:
+                self.llm_metrics.parse_failures.inc()
+                raise ValueError(f"LLM reply for {case.id} was not valid JSON after retry")
+            return _verdict(reply)
+
+        # Each scenario takes its own scheduler slot and rate-limit token
+        verdict = await self.inflight.do(
+            _flight_key(key, timeout, bounded), lambda: self.scheduler.run(call, timeout, bounded)
+        )
+        self.cache.set(key, verdict)
+        return verdict
         
-    async def validate_design(self, design: DesignModel, problem_id: str = None) -> ValidationResult:
-        """Main validation method"""
+    async def validate_design(self, design: AnyDesign, problem_id: str = None,
+                              bounded: bool = True) -> ValidationResult:
+        """Main validation method; unbounded LLM calls wait for a slot instead of being shed"""
         try:
-            logger.info(f"Validating design with {len(design.components)} components")
+            logger.info(f"Validating design with {design.component_count} components")
+            started = time.perf_counter()
             
             # Get problem requirements
-            problem = PROBLEMS.get(problem_id) if problem_id else None
-
-            # Try AI Validation first
-            if self.model:
-                try:
-                    ai_result = await self._validate_with_llm(design, problem)
-                    if ai_result:
-                        logger.info("AI Validation successful")
-                        return ai_result
-                except Exception as e:
-                    logger.warning(f"AI Validation failed, falling back to rules: {e}")
-            
-            # Initialize results for rule-based fallback
-            total_score = 0
-            test_results = []
-            detailed_results = {}
-
-            # Test 1: Required Components (25 points)
-            component_score, component_tests = self._validate_required_components(
-                design, problem
-            )
-            total_score += component_score
-            test_results.extend(component_tests)
-            detailed_results['required_components'] = component_score
-            
-            # Test 2: Component Connections (25 points)
-            connection_score, connection_tests = self._validate_connections(design)
-            total_score += connection_score
-            test_results.extend(connection_tests)
-            detailed_results['connections'] = connection_score
-            
-            # Test 3: Architecture Patterns (25 points)
-            pattern_score, pattern_tests = self._validate_architecture_patterns(design)
-            total_score += pattern_score
-            test_results.extend(pattern_tests)
-            detailed_results['architecture_patterns'] = pattern_score
-            
-            # Test 4: Best Practices (25 points)
-            practices_score, practices_tests = self._validate_best_practices(design)
-            total_score += practices_score
-            test_results.extend(practices_tests)
-            detailed_results['best_practices'] = practices_score
-            
-            # Determine if passed
-            min_score = problem.get('min_score', 70) if problem else 70
-            passed = total_score >= min_score
-            
-            # Generate feedback
-            feedback = self._generate_feedback(total_score, passed, detailed_results)
-            
-            return ValidationResult(
-                score=total_score,
-                passed=passed,
-                feedback=feedback,
-                detailed_results=detailed_results,
-                test_results=test_results
-            )
+            problem = self.catalog.problems.get(problem_id) if problem_id else None
+
+            if EVAL_MODE == "rules-first":
+                result, tier = await self._validate_rules_first(design, problem, problem_id, bounded)
+            else:
+                # Try AI Validation first
+                result, tier = None, "rules"
+                if self.llm:
+                    result, tier = await self._try_llm(design, problem, problem_id, bounded=bounded)
+                if result is None:
+                    result, _ = await self._score_rules(design, problem_id)
+
+            self._record(design, problem_id, result, tier, time.perf_counter() - started)
+            return result
             
+        except PoolSaturated:
+            raise
         except Exception as e:
             logger.error(f"Validation error: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
     
-    def _validate_required_components(self, design: DesignModel, problem: Dict = None) -> tuple:
-        """Validate required components are present"""
-        score = 0
-        tests = []
-        
-        component_types = [comp.type for comp in design.components]
-        
-        if problem:
-            required = problem['required_components']
-            for req_comp in required:
-                if req_comp in component_types:
-                    score += 5
-                    tests.append({
-                        'name': f'Required component: {COMPONENT_TYPES[req_comp]["name"]}',
-                        'passed': True,
-                        'points': 5,
-                        'description': f'{COMPONENT_TYPES[req_comp]["name"]} is present'
-                    })
-                else:
-                    tests.append({
-                        'name': f'Required component: {COMPONENT_TYPES[req_comp]["name"]}',
-                        'passed': False,
-                        'points': 0,
-                        'description': f'Missing required {COMPONENT_TYPES[req_comp]["name"]}'
-                    })
-        else:
-            # General validation - basic components
-            basic_components = ['web-server', 'database']
-            for comp in basic_components:
-                if comp in component_types:
-                    score += 10
-                    tests.append({
-                        'name': f'Basic component: {COMPONENT_TYPES[comp]["name"]}',
-                        'passed': True,
-                        'points': 10,
-                        'description': f'{COMPONENT_TYPES[comp]["name"]} is present'
-                    })
-            
-            # Bonus for additional components
-            if len(component_types) >= 4:
-                score += 5
-                tests.append({
-                    'name': 'Component diversity',
-                    'passed': True,
-                    'points': 5,
-                    'description': f'Good component diversity ({len(component_types)} components)'
-                })
-        
-        return min(score, 25), tests
+    async def run_job(self, payload: bytes, lane: str) -> bytes:
+        """Validate a queued design; returns the result as JSON bytes.
+
+        Jobs have no client waiting on a connection, so the LLM call queues
+        for its slot rather than falling back to rules under load, and a
+        full CPU pool is waited out instead of failing the job.
+        """
+        design = _job_design(payload)
+        logger.info(f"Running {lane} job for design with {design.component_count} components")
+        while True:
+            try:
+                with deadline_scope(JOB_DEADLINE):
+                    result = await self.validate_design(design, design.problem_id, bounded=False)
+                break
+            except PoolSaturated as e:
+                await asyncio.sleep(e.retry_after)
+        return result.__pydantic_serializer__.to_json(result, exclude_none=True)
+
+    def _record(self, design: AnyDesign, problem_id: Optional[str], result: ValidationResult,
+                tier: str, seconds: float):
+        """Count a finished evaluation in the tier metrics and queue it for the store"""
+        self.tiers.record(tier, seconds)
+        self._persist(design, problem_id, result, tier, seconds)
+
+    def _persist(self, design: AnyDesign, problem_id: Optional[str], result: ValidationResult,
+                 tier: str, seconds: float):
+        """Queue the evaluation for the write-behind store"""
+        if self.store is None:
+            return
+        backend = self.llm.name if self.llm and tier.startswith("llm") else "rules"
+        # Sorting and hashing a large design is left to the store's writer
+        # thread; the version is fixed now in case the catalog reloads first
+        version = self._key_version()
+        self.store.record(evaluation_record(
+            lambda: canonical_design_key(design.component_pairs(), design.connection_pairs(), problem_id, version),
+            problem_id, result, tier, backend, seconds
+        ))
+
+    def _select_tier(self, rule_result: ValidationResult, graph: GraphReport) -> str:
+        """Decide from the deterministic verdict whether the LLM is needed"""
+        if rule_result.score < RULES_REJECT_BELOW:
+            return "rules"
+        well_formed = graph.storage_reachable and not graph.orphans and not graph.unreachable
+        if rule_result.score >= RULES_ACCEPT_ABOVE and well_formed:
+            return "rules"
+        # Per-test prompts have no reduced form: the scenario prompts are
+        # already narrowed to the components each scenario involves
+        if rule_result.score >= REDUCED_PROMPT_ABOVE and LLM_PROMPT_MODE != "per-test":
+            return "llm-reduced"
+        return "llm-full"
     
-    def _validate_connections(self, design: DesignModel) -> tuple:
-        """Validate component connections"""
-        score = 0
-        tests = []
+    async def _validate_rules_first(self, design: AnyDesign, problem: Dict = None, problem_id: str = None,
+                                    bounded: bool = True) -> Tuple[ValidationResult, str]:
+        """Tiered evaluation: rules and graph analysis first, LLM only when inconclusive"""
+        rule_result, graph = await self._score_rules(design, problem_id)
+        tier = self._select_tier(rule_result, graph)
+        if tier == "rules" or not self.llm:
+            return rule_result, "rules"
         
-        # Check if components are connected
-        if len(design.connections) > 0:
-            score += 10
-            tests.append({
-                'name': 'Component connections',
-                'passed': True,
-                'points': 10,
-                'description': f'{len(design.connections)} connections found'
-            })
+        ai_result, tier = await self._try_llm(
+            design, problem, problem_id,
+            rule_result=rule_result if tier == "llm-reduced" else None,
+            bounded=bounded
+        )
+        return ai_result or rule_result, tier
+
+    async def _try_llm(self, design: AnyDesign, problem: Dict = None, problem_id: str = None,
+                       rule_result: Optional[ValidationResult] = None,
+                       bounded: bool = True) -> Tuple[Optional[ValidationResult], str]:
+        """LLM evaluation and its tier, or (None, fallback tier) when rules must answer"""
+        try:
+            ai_result = await self._evaluate_with_llm(design, problem, problem_id, rule_result=rule_result,
+                                                      bounded=bounded)
+        except asyncio.TimeoutError:
+            logger.warning("AI Validation ran out of request deadline, falling back to rules")
+            return None, "deadline"
+        except AdmissionRejected as e:
+            logger.warning(f"AI Validation not admitted, falling back to rules: {e}")
+            return None, "overload"
+        except Exception as e:
+            logger.warning(f"AI Validation failed, falling back to rules: {e}")
+            return None, "fallback"
+        if ai_result is None:
+            return None, "fallback"
+        return ai_result, "llm-reduced" if rule_result is not None else "llm-full"
+    
+    def open_session(self, design: AnyDesign) -> DesignSession:
+        """Register a design for incremental re-scoring"""
+        session = DesignSession(self.rules, design.problem_id)
+        placed = list(design.placed_components())
+        session.check_delta([], [comp_id for comp_id, _, _ in placed], [])
+        for comp_id, comp_type, position in placed:
+            session.add_component(comp_id, comp_type, position)
+        for src, dst in design.connection_pairs():
+            session.add_connection(src, dst)
+        self.sessions.add(session)
+        return session
+
+    def apply_delta(self, session: DesignSession, delta: DesignDelta):
+        """Apply removals then additions; cost is proportional to the edit"""
+        session.check_delta(
+            delta.remove_components,
+            [c.id for c in delta.add_components],
+            [(c.from_component, c.to_component) for c in delta.remove_connections]
+        )
+        for c in delta.remove_connections:
+            session.remove_connection(c.from_component, c.to_component)
+        for comp_id in delta.remove_components:
+            session.remove_component(comp_id)
+        for c in delta.add_components:
+            session.add_component(c.id, c.type, c.position)
+        for c in delta.add_connections:
+            session.add_connection(c.from_component, c.to_component)
+        session.version += 1
+        self.sessions.deltas += 1
+
+    def session_score(self, session: DesignSession) -> SessionScore:
+        evaluation = session.score()
+        return SessionScore(
+            session_id=session.session_id,
+            version=session.version,
+            score=evaluation.score,
+            passed=evaluation.passed,
+            feedback=self._generate_feedback(evaluation.score, evaluation.passed, evaluation.detailed_results),
+            detailed_results=DetailedScores(**evaluation.detailed_results)
+        )
+
+    def session_design(self, session: DesignSession) -> DesignModel:
+        """Materialize the session's current design"""
+        return DesignModel(
+            components=[ComponentModel(id=i, type=t, position=p) for i, t, p in session.components()],
+            connections=[ConnectionModel(from_component=a, to_component=b) for a, b in session.connections()],
+            problem_id=session.problem_id
+        )
+
+    async def stream_design(self, design: AnyDesign, problem_id: str = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Validate a design as a stream of (event, data) pairs.
+
+        Emits the rule-based result first, then the LLM reply as text chunks
+        plus each test case verdict as soon as it parses, and finally the
+        complete ValidationResult.
+        """
+        started = time.perf_counter()
+        problem = self.catalog.problems.get(problem_id) if problem_id else None
+        try:
+            rule_result, _ = await self._score_rules(design, problem_id)
+        except PoolSaturated as e:
+            yield "error", {"detail": str(e), "retry_after": e.retry_after}
+            return
+        yield "rules", rule_result.model_dump(exclude_none=True)
+
+        if not self.llm:
+            self._record(design, problem_id, rule_result, "rules", time.perf_counter() - started)
+            yield "result", rule_result.model_dump(exclude_none=True)
+            return
+
+        with stage("cache_lookup"):
+            cache_key = self._cache_key(design, problem_id)
+            cached = await self.cache.aget(cache_key)
+        if cached is not None:
+            # Counted as validate_design counts a cache hit
+            self._record(design, problem_id, ValidationResult(**cached), "llm-full", time.perf_counter() - started)
+            for test_case in cached.get('test_results', []):
+                yield "test_case", test_case
+            yield "result", cached
+            return
+
+        prompt = self._build_prompt(design, problem)
+        parser = IncrementalArrayParser("test_case_results")
+        chunks: List[str] = []
+        try:
+            async with self.scheduler.slot():
+                async for text in self._stream(prompt):
+                    chunks.append(text)
+                    yield "token", {"text": text}
+                    for test_case in parser.feed(text):
+                        yield "test_case", test_case
+            result_json = self._parse_reply("".join(chunks))
+            if result_json is None:
+                self.llm_metrics.parse_failures.inc()
+                raise ValueError("LLM reply contained no JSON object")
+            ai_result = self._result_from_json(result_json, problem)
+        except Exception as e:
+            logger.warning(f"Streaming AI validation failed, using rule-based result: {e}")
+            self._record(design, problem_id, rule_result, "fallback", time.perf_counter() - started)
+            yield "error", {"detail": str(e)}
+            yield "result", rule_result.model_dump(exclude_none=True)
+            return
+
+        self.cache.set(cache_key, ai_result.model_dump(exclude_none=True))
+        self._record(design, problem_id, ai_result, "llm-full", time.perf_counter() - started)
+        yield "result", ai_result.model_dump(exclude_none=True)
+
+    async def validate_batch(self, designs: List[AnyDesign],
+                             item_timeout: Optional[float] = None) -> AsyncIterator[Tuple[int, Optional[ValidationResult], Optional[str]]]:
+        """Validate many designs, yielding (index, result, error) as each completes.
+
+        Rule-based scores are computed for every design up front (large ones
+        in the CPU pool, one at a time); LLM evaluations then run through the
+        scheduler, and any item whose LLM call fails or times out is answered
+        with its rule-based result.
+        """
+        started = time.perf_counter()
+        rule_results: List[Optional[ValidationResult]] = []
+        rule_errors: List[Optional[str]] = []
+        tiers: List[str] = []
+        for design in designs:
+            try:
+                rule_result, graph = await self._score_rules(design, design.problem_id)
+                rule_results.append(rule_result)
+                rule_errors.append(None)
+                tiers.append(self._select_tier(rule_result, graph) if EVAL_MODE == "rules-first" else "llm-full")
+            except Exception as e:
+                logger.error(f"Rule validation failed for batch item: {e}")
+                rule_results.append(None)
+                rule_errors.append(f"Validation failed: {str(e)}")
+                tiers.append("llm-full")
+
+        def finish(index: int, result: Optional[ValidationResult], tier: str):
+            if result is not None:
+                self._persist(designs[index], designs[index].problem_id, result, tier,
+                              time.perf_counter() - started)
+
+        if not self.llm:
+            for index, result in enumerate(rule_results):
+                finish(index, result, "rules")
+                yield index, result, rule_errors[index]
+            return
+
+        async def evaluate(index: int):
+            design = designs[index]
+            if tiers[index] == "rules":
+                finish(index, rule_results[index], "rules")
+                return index, rule_results[index], None
+            problem = self.catalog.problems.get(design.problem_id) if design.problem_id else None
+            reduced = rule_results[index] if tiers[index] == "llm-reduced" else None
+            try:
+                ai_result = await self._evaluate_with_llm(
+                    design, problem, design.problem_id, timeout=item_timeout, rule_result=reduced, bounded=False
+                )
+                if ai_result:
+                    finish(index, ai_result, tiers[index])
+                    return index, ai_result, None
+            except asyncio.TimeoutError:
+                logger.warning(f"Batch item {index} timed out, using rule-based result")
+            except Exception as e:
+                logger.warning(f"Batch item {index} AI validation failed, using rule-based result: {e}")
+            finish(index, rule_results[index], "fallback")
+            return index, rule_results[index], rule_errors[index]
+
+        tasks = [asyncio.ensure_future(evaluate(i)) for i in range(len(designs))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away or the consumer stopped early
+            for task in tasks:
+                task.cancel()
+
+    async def _evaluate_with_llm(self, design: AnyDesign, problem: Dict = None, problem_id: str = None,
+                                 timeout: Optional[float] = None,
+                                 rule_result: Optional[ValidationResult] = None,
+                                 bounded: bool = True) -> Optional[ValidationResult]:
+        """Cached, coalesced and scheduled LLM evaluation.
+
+        Raises asyncio.TimeoutError when the request deadline leaves no time
+        for the call, and AdmissionRejected when a bounded call finds the
+        scheduler's wait queue full.
+        """
+        with stage("cache_lookup"):
+            cache_key = self._cache_key(design, problem_id, reduced=rule_result is not None)
+            cached = await self.cache.aget(cache_key)
+        if cached is not None:
+            logger.info("Serving cached AI validation")
+            return ValidationResult(**cached)
+
+        probe = self._similarity_probe(design, problem_id, rule_result is not None)
+        if probe is not None:
+            with stage("similar_lookup"):
+                reused = await self._reuse_similar(probe, problem)
+            if reused is not None:
+                self.cache.set(cache_key, reused.model_dump(exclude_none=True))
+                return reused
+
+        queued = time.perf_counter()
+
+        async def call():
+            if LLM_PROMPT_MODE == "per-test":
+                result = await self._validate_per_test(design, problem, timeout, bounded)
+            else:
+                record_stage("llm_queue", time.perf_counter() - queued)
+                result = await self._validate_with_llm(design, problem, rule_result)
+            # Indexed once per model call, not once per coalesced waiter
+            if result and probe is not None:
+                scope, size, vector, rule_score = probe
+                self.similar.add(scope, size, vector, cache_key, rule_score)
+            return result
+
+        # Queueing and the call must finish in time for the rule fallback
+        budget = deadline_remaining()
+        if budget is not None:
+            budget -= DEADLINE_MARGIN
+            if budget <= 0:
+                raise asyncio.TimeoutError("Request deadline reached before the LLM call")
+
+        # Concurrent identical submissions share a single LLM call, and every
+        # call goes through the scheduler so all traffic shares one quota
+        # (per-test evaluations schedule each scenario's call themselves).
+        # The shared call runs with its first caller's timeout and admission,
+        # so only callers with the same ones may join it
+        scheduled = call if LLM_PROMPT_MODE == "per-test" else (lambda: self.scheduler.run(call, timeout, bounded))
+        ai_result = await asyncio.wait_for(
+            self.inflight.do(_flight_key(cache_key, timeout, bounded), scheduled), budget
+        )
+        if ai_result:
+            logger.info("AI Validation successful")
+            self.cache.set(cache_key, ai_result.model_dump(exclude_none=True))
+        return ai_result
+
+    def _similarity_probe(self, design: AnyDesign, problem_id: Optional[str],
+                          reduced: bool) -> Optional[Tuple[Tuple[str, bool], int, Any, int]]:
+        """(scope, size, feature vector, rule score) of a design eligible for reuse"""
+        size = design.component_count
+        if SIMILAR_THRESHOLD <= 0 or size > SIMILAR_MAX_COMPONENTS:
+            return None
+        # Unknown problem ids fall back to generic rules; they must not mint index scopes
+        if problem_id not in self.catalog.problems:
+            problem_id = None
+        vector = self.features.vector(design.component_pairs(), design.connection_pairs())
+        rule_score = self.rules.evaluate(design.profile(self.rules), problem_id).score
+        return (problem_id or "", reduced), size, vector, rule_score
+
+    async def _reuse_similar(self, probe: Tuple[Tuple[str, bool], int, Any, int],
+                       problem: Dict = None) -> Optional[ValidationResult]:
+        """A near-duplicate's evaluation adapted to this design, or None"""
+        scope, size, vector, rule_score = probe
+        neighbour = self.similar.nearest(scope, size, vector)
+        cached = await self.cache.aget(neighbour.key) if neighbour and neighbour.similarity >= SIMILAR_THRESHOLD else None
+        if cached is None:
+            self.similar_misses += 1
+            return None
+        self.similar_hits += 1
+        # The model's judgement carries over; what the designs differ in is
+        # priced by the deterministic rules
+        adjustment = rule_score - neighbour.rule_score
+        score = max(0, min(100, cached['score'] + adjustment))
+        logger.info(f"Reusing evaluation of a similar design (similarity {neighbour.similarity:.3f})")
+        return ValidationResult(
+            score=score,
+            passed=score >= (problem.get('min_score', 70) if problem else 70),
+            feedback=cached['feedback'],
+            detailed_results={
+                **cached['detailed_results'],
+                'similar_design': {'similarity': round(neighbour.similarity, 4), 'score_adjustment': adjustment}
+            },
+            test_results=cached['test_results']
+        )
+
+    async def _score_rules(self, design: AnyDesign, problem_id: str = None,
+                           rules: Optional[RuleEngine] = None) -> Tuple[ValidationResult, GraphReport]:
+        """Rule result and graph report, computed in the CPU pool for large designs.
+
+        `rules` defaults to the current catalog's; sessions pass the rules
+        they were opened with.
+        """
+        rules = rules or self.rules
+        if not self.cpu_pool.enabled or design.component_count < OFFLOAD_MIN_COMPONENTS:
+            graph = self._analyze_graph(design)
+            return self._validate_with_rules(design, problem_id, graph, rules), graph
+        # Thread workers share this process's compiled rules; process workers
+        # compile the current catalog's, so older rules are sent along
+        engine = rules if self.cpu_pool.mode == "thread" or rules is not self.rules else None
+        if isinstance(design, ColumnarDesignModel):
+            # The arrays cross the process boundary as a few buffers
+            job = (score_columns, design.types, design.components, design.connections, design.ids)
         else:
-            tests.append({
-                'name': 'Component connections',
-                'passed': False,
-                'points': 0,
-                'description': 'No connections between components'
-            })
-        
-        # Validate connection logic
-        component_types = {comp.id: comp.type for comp in design.components}
+            job = (score_design, list(design.component_pairs()), list(design.connection_pairs()))
+        with stage("rule_engine"):
+            evaluation, graph = await self.cpu_pool.run(*job, problem_id, engine)
+        return self._rule_result(evaluation, graph), graph
+
+    def _validate_with_rules(self, design: AnyDesign, problem_id: str = None,
+                             graph: Optional[GraphReport] = None,
+                             rules: Optional[RuleEngine] = None) -> ValidationResult:
+        """Rule-based validation used as fallback and for batch pre-scoring"""
+        rules = rules or self.rules
+        # One pass over the design, then all four rule groups (25 points each)
+        # are evaluated against the compiled profile
+        with stage("rule_engine"):
+            profile = design.profile(rules)
+            evaluation = rules.evaluate(profile, problem_id)
+        return self._rule_result(evaluation, graph or self._analyze_graph(design))
+
+    def _rule_result(self, evaluation: RuleEvaluation, graph: GraphReport) -> ValidationResult:
+        # Structural checks (SPOF, reachability, orphans) are informational
+        # and do not change the score
+        test_results = evaluation.test_results + graph_tests(graph)
         
-        for connection in design.connections:
-            from_type = component_types.get(connection.from_component)
-            to_type = component_types.get(connection.to_component)
-            
-            if from_type and to_type:
-                # Check if connection makes sense
-                from_rules = COMPONENT_TYPES.get(from_type, {})
-                valid_connections = from_rules.get('required_connections', []) + from_rules.get('optional_connections', [])
-                
-                if to_type in valid_connections:
-                    score += 3
-                    tests.append({
-                        'name': f'Valid connection: {from_rules.get("name", from_type)} → {COMPONENT_TYPES.get(to_type, {}).get("name", to_type)}',
-                        'passed': True,
-                        'points': 3,
-                        'description': 'Connection follows best practices'
-                    })
+        # Generate feedback
+        feedback = self._generate_feedback(evaluation.score, evaluation.passed, evaluation.detailed_results)
         
-        return min(score, 25), tests
+        # Built from the engine's own output, so validation is skipped; a
+        # large design yields thousands of connection tests
+        return ValidationResult.model_construct(
+            score=evaluation.score,
+            passed=evaluation.passed,
+            feedback=feedback,
+            detailed_results=DetailedScores(**evaluation.detailed_results),
+            test_results=[TestResult(**t) for t in test_results]
+        )
     
-    def _validate_architecture_patterns(self, design: DesignModel) -> tuple:
+    def _analyze_graph(self, design: AnyDesign) -> GraphReport:
+        """Linear-time graph analysis of the design"""
+        with stage("graph_analysis"):
+            return analyze(*design.graph())
+    
+    def _validate_required_components(self, design: AnyDesign, problem_id: str = None) -> tuple:
+        """Validate required components are present"""
+        return self.rules.required_components(design.profile(self.rules), self.rules.problem(problem_id))
+    
+    def _validate_connections(self, design: AnyDesign) -> tuple:
+        """Validate component connections"""
+        return self.rules.connections(design.profile(self.rules))
+    
+    def _validate_architecture_patterns(self, design: AnyDesign) -> tuple:
         """Validate architecture patterns"""
-        score = 0
-        tests = []
-        
-        component_types = [comp.type for comp in design.components]
-        
-        # Layered architecture pattern
-        has_presentation = 'api-gateway' in component_types
-        has_application = 'web-server' in component_types
-        has_data = 'database' in component_types
-        
-        if has_presentation and has_application and has_data:
-            score += 15
-            tests.append({
-                'name': 'Layered architecture',
-                'passed': True,
-                'points': 15,
-                'description': 'Proper separation of presentation, application, and data layers'
-            })
-        
-        # Scalability pattern
-        if 'load-balancer' in component_types:
-            score += 5
-            tests.append({
-                'name': 'Scalability pattern',
-                'passed': True,
-                'points': 5,
-                'description': 'Load balancer present for horizontal scaling'
-            })
-        
-        # Performance pattern
-        if 'cache' in component_types:
-            score += 5
-            tests.append({
-                'name': 'Performance pattern',
-                'passed': True,
-                'points': 5,
-                'description': 'Caching layer present for performance optimization'
-            })
-        
-        return min(score, 25), tests
+        return self.rules.architecture_patterns(design.profile(self.rules))
     
-    def _validate_best_practices(self, design: DesignModel) -> tuple:
+    def _validate_best_practices(self, design: AnyDesign) -> tuple:
         """Validate best practices"""
-        score = 0
-        tests = []
-        
-        component_types = [comp.type for comp in design.components]
-        
-        # Security best practice
-        if 'security' in component_types:
-            score += 8
-            tests.append({
-                'name': 'Security layer',
-                'passed': True,
-                'points': 8,
-                'description': 'Security layer present'
-            })
-        
-        # CDN for static content
-        if 'cdn' in component_types:
-            score += 7
-            tests.append({
-                'name': 'Content delivery',
-                'passed': True,
-                'points': 7,
-                'description': 'CDN present for content delivery'
-            })
-        
-        # Async processing
-        if 'message-queue' in component_types:
-            score += 10
-            tests.append({
-                'name': 'Asynchronous processing',
-                'passed': True,
-                'points': 10,
-                'description': 'Message queue present for async processing'
-            })
-        
-        return min(score, 25), tests
+        return self.rules.best_practices(design.profile(self.rules))
     
     def _generate_feedback(self, score: int, passed: bool, detailed_results: Dict) -> str:
         """Generate motivational feedback based on score"""
-        if score >= 95:
-            return "🎉 PERFECT! You absolute legend! This is a masterpiece of system design!"
-        elif score >= 90:
-            return "🌟 Excellent work! Your architecture is solid and well-thought-out!"
-        elif score >= 80:
-            return "👏 Great job! You've got a strong design with good practices!"
-        elif score >= 70:
-            return "✅ You passed! Your design works, but there's room for improvement!"
-        elif score >= 60:
-            return "🤔 So close! Review the failed tests and try again!"
-        elif score >= 40:
-            return "😬 Not quite there yet! Focus on the basic components first!"
-        else:
-            return "🤦‍♂️ Ouch! Let's start with the fundamentals - every system needs a web server and database!"
+        return score_feedback(score)
 
 # Initialize validator
 validator = DesignValidator()
@@ -642,45 +1349,417 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Detailed health check"""
+    """Detailed health check: backend reachability, load and cache effectiveness.
+
+    Rule-based validation keeps working without the LLM, so an unreachable
+    backend reports "degraded" rather than failing the check.
+    """
+    llm_reachable = await validator.llm_reachable()
+    cache = validator.cache.stats()
     return {
-        "status": "healthy",
+        "status": "degraded" if llm_reachable is False else "healthy",
         "components": {
             "validator": "operational",
             "rules_engine": "operational",
-            "pattern_matcher": "operational"
+            "llm_backend": {None: "disabled", True: "reachable", False: "unreachable"}[llm_reachable]
+        },
+        "load": {
+            "in_flight_requests": request_metrics.in_flight,
+            "llm_queue_depth": validator.scheduler.waiting,
+            "cpu_pool_pending": validator.cpu_pool.pending,
+            "llm_running": validator.scheduler.running
+        },
+        "cache_hit_ratio": cache["hit_ratio"],
+        "worker": {
+            "pid": os.getpid(),
+            "workers": WORKERS,
+            "shared_state": STATE_DIR
         },
-        "problems_available": len(PROBLEMS),
-        "component_types": len(COMPONENT_TYPES)
+        "problems_available": len(validator.catalog.problems),
+        "component_types": len(validator.catalog.component_types),
+        "catalog": {
+            "version": validator.catalog.version,
+            "loaded_at": datetime.fromtimestamp(validator.catalog.loaded_at).isoformat(),
+            **validator.catalog_watcher.stats()
+        },
+        "cache": cache,
+        "inflight": validator.inflight.stats(),
+        "similar_cache": {
+            **validator.similar.stats(),
+            "threshold": SIMILAR_THRESHOLD,
+            "hits": validator.similar_hits,
+            "misses": validator.similar_misses
+        },
+        "llm_scheduler": validator.scheduler.stats(),
+        "cpu_pool": validator.cpu_pool.stats(),
+        "evaluation": {"mode": EVAL_MODE, "prompt_mode": LLM_PROMPT_MODE, **validator.tiers.snapshot()},
+        "test_case_cache": {"hits": validator.test_case_hits, "misses": validator.test_case_misses},
+        "sessions": validator.sessions.stats(),
+        "evaluation_store": validator.store.stats() if validator.store else None,
+        "jobs": await validator.jobs.stats() if validator.jobs else None,
+        "llm": {
+            "state": validator.llm_state,
+            "model": GEMINI_MODEL,
+            "structured_output": STRUCTURED_OUTPUT,
+            **validator.llm_metrics.snapshot(),
+            "backend": validator.llm.stats() if validator.llm else {"backend": "none"}
+        }
     }
 
+@app.get("/ready")
+async def ready():
+    """Readiness for rule-based traffic: the catalog is compiled and the
+    worker answers. The LLM may still be warming up (see /ready/llm)."""
+    return {
+        "status": "ready",
+        "rules": "ready",
+        "llm": validator.llm_state,
+        "catalog_version": validator.catalog.version
+    }
+
+@app.get("/ready/llm")
+async def ready_llm():
+    """Readiness for LLM evaluations: 503 until the backend has answered a
+    probe or a call with the client connected"""
+    warm = validator.llm_state == "warm"
+    return JSONResponse(
+        status_code=200 if warm else 503,
+        content={"status": "ready" if warm else "not ready", "llm": validator.llm_state}
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format exposition of service metrics"""
+    out = PrometheusWriter(prefix="validator_")
+    out.gauge("in_flight_requests", "HTTP requests currently being served", request_metrics.in_flight)
+    out.labeled_histograms("request_duration_seconds", "HTTP request latency by route",
+                           "route", request_metrics.latency)
+    for (route, status), counter in list(request_metrics.responses.items()):
+        out.counter("responses", "HTTP responses by route and status", counter.value,
+                    {"route": route, "status": status})
+    out.labeled_histograms("stage_duration_seconds", "Latency of each validation pipeline stage",
+                           "stage", stage_latency)
+    out.labeled_histograms("evaluation_duration_seconds", "Validation latency by evaluation tier",
+                           "tier", validator.tiers.latency)
+
+    cache = validator.cache.stats()
+    out.counter("cache_hits", "Result cache hits (memory and disk)", cache["hits"])
+    out.counter("cache_disk_hits", "Result cache hits served from the disk store", cache["disk_hits"])
+    out.counter("cache_misses", "Result cache misses", cache["misses"])
+    out.counter("cache_evictions", "Result cache LRU evictions", cache["evictions"])
+    out.gauge("cache_entries", "Entries held in the in-memory result cache", cache["entries"])
+
+    out.counter("similar_hits", "LLM evaluations reused from a near-duplicate design", validator.similar_hits)
+    out.counter("similar_misses", "Similarity lookups with no reusable neighbour", validator.similar_misses)
+    out.gauge("similar_entries", "Design vectors held in the similarity index", validator.similar.entries)
+    out.counter("test_case_cache_hits", "Per-test scenario verdicts served from the cache", validator.test_case_hits)
+    out.counter("test_case_cache_misses", "Per-test scenarios sent to the model", validator.test_case_misses)
+
+    inflight = validator.inflight.stats()
+    out.gauge("llm_calls_in_flight", "Distinct LLM evaluations in flight", inflight["in_flight"])
+    out.counter("llm_coalesced", "Requests that joined an identical in-flight evaluation", inflight["coalesced"])
+
+    scheduler = validator.scheduler.stats()
+    out.gauge("llm_queue_depth", "LLM calls waiting for a scheduler slot", scheduler["waiting"])
+    out.gauge("llm_running", "LLM calls holding a scheduler slot", scheduler["running"])
+    out.counter("llm_scheduler_completed", "LLM calls completed by the scheduler", scheduler["completed"])
+    out.counter("llm_scheduler_timeouts", "LLM calls that exceeded their timeout", scheduler["timeouts"])
+    out.counter("llm_scheduler_failures", "LLM calls that raised an error", scheduler["failures"])
+
+    llm = validator.llm_metrics
+    out.counter("llm_calls", "Prompts sent to the model", llm.calls.value)
+    out.counter("llm_prompt_tokens", "Estimated prompt tokens sent to the model", llm.prompt_tokens.value)
+    out.counter("llm_retries", "LLM calls retried after an unparseable reply", llm.retries.value)
+    out.counter("llm_parse_failures", "LLM replies with no parseable JSON after retry", llm.parse_failures.value)
+    out.counter("llm_hedges", "Second copies started for slow or failed LLM calls", llm.hedges.value)
+    out.counter("llm_hedge_wins", "Hedged LLM calls answered by the second copy", llm.hedge_wins.value)
+    out.histogram("llm_call_duration_seconds", "Duration of successful LLM calls", llm.call_latency)
+    out.counter("llm_admission_rejected", "LLM calls refused because the wait queue was full",
+                scheduler["rejected"])
+    if validator.llm:
+        backend = validator.llm.stats()
+        out.counter("llm_backend_requests", "Requests sent to the LLM backend", backend["requests"],
+                    {"backend": backend["backend"]})
+        out.counter("llm_backend_errors", "LLM backend errors", backend["errors"],
+                    {"backend": backend["backend"]})
+
+    pool = validator.cpu_pool.stats()
+    out.gauge("cpu_pool_pending", "Designs running or queued in the CPU offload pool", pool["pending"])
+    out.counter("cpu_pool_completed", "Designs scored in the CPU offload pool", pool["completed"])
+    out.counter("cpu_pool_rejected", "Requests shed with 503 because the CPU pool was full", pool["rejected"])
+
+    sessions = validator.sessions.stats()
+    out.gauge("sessions_active", "Open incremental validation sessions", sessions["active"])
+    out.counter("session_deltas", "Deltas applied to incremental sessions", sessions["deltas"])
+
+    jobs = validator.jobs
+    if jobs:
+        depths = await jobs.depths()
+        # Each metric's samples must stay together in the exposition
+        for lane, depth in depths.items():
+            out.gauge("jobs_queued", "Jobs waiting in the queue (all workers)", depth["queued"], {"lane": lane})
+        for lane, depth in depths.items():
+            out.gauge("jobs_running", "Jobs being run (all workers)", depth["running"], {"lane": lane})
+        for lane, counter in jobs.completed.items():
+            out.counter("jobs_completed", "Jobs finished with a result", counter.value, {"lane": lane})
+        for lane, counter in jobs.failed.items():
+            out.counter("jobs_failed", "Jobs that failed", counter.value, {"lane": lane})
+        out.gauge("jobs_throughput_per_minute", "Jobs finished over the last minute", jobs.throughput())
+        out.counter("jobs_requeued", "Jobs run again after their worker stopped", jobs.requeued.value)
+        out.labeled_histograms("job_queue_wait_seconds", "Time from enqueue to a worker starting the job",
+                               "lane", jobs.queue_wait)
+        out.labeled_histograms("job_run_duration_seconds", "Time spent running each job", "lane", jobs.run_time)
+        out.counter("job_callbacks_delivered", "Job callbacks accepted by the receiver", jobs.callbacks_delivered.value)
+        out.counter("job_callbacks_failed", "Job callbacks abandoned after retries", jobs.callbacks_failed.value)
+    return Response(content=out.render(), media_type=PrometheusWriter.CONTENT_TYPE)
+
+def _request_budget(requested: Optional[float]) -> float:
+    """The service deadline, shortened to the client's X-Request-Timeout"""
+    if requested is not None and 0 < requested < REQUEST_DEADLINE:
+        return requested
+    return REQUEST_DEADLINE
+
 @app.post("/validate", response_model=ValidationResult)
-async def validate_design(design: DesignModel):
-    """Validate a system design"""
+async def validate_design(design: DesignBody, x_request_timeout: Optional[float] = Header(None)):
+    """Validate a system design within the request deadline"""
+    request_parsed()
     try:
-        logger.info(f"Received validation request for design with {len(design.components)} components")
-        result = await validator.validate_design(design, design.problem_id)
+        logger.info(f"Received validation request for design with {design.component_count} components")
+        with deadline_scope(_request_budget(x_request_timeout)):
+            result = await validator.validate_design(design, design.problem_id)
         logger.info(f"Validation completed with score: {result.score}")
-        return result
+        with stage("serialization"):
+            return FastJSONResponse(result)
+    except PoolSaturated:
+        raise
     except Exception as e:
         logger.error(f"Validation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/problems")
-async def get_problems():
-    """Get available problems"""
+@app.post("/validate/stream")
+async def validate_design_stream(design: DesignBody):
+    """Validate a system design, streaming progress as Server-Sent Events"""
+    request_parsed()
+    logger.info(f"Received streaming validation request for design with {design.component_count} components")
+
+    async def events():
+        async for event, data in validator.stream_design(design, design.problem_id):
+            yield f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/validate/ws")
+async def validate_design_ws(websocket: WebSocket):
+    """Validate designs over a WebSocket: send a design, receive the same events as /validate/stream.
+
+    Text frames carry JSON designs; binary frames packed columnar buffers or msgpack.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            try:
+                payload = message.get("bytes")
+                if payload is None:
+                    payload = orjson.loads(message["text"])
+                design = DESIGN_BODY.validate_python(payload)
+            except Exception as e:
+                await websocket.send_json({"event": "error", "data": {"detail": str(e)}})
+                continue
+            async for event, data in validator.stream_design(design, design.problem_id):
+                await websocket.send_json({"event": event, "data": data})
+    except WebSocketDisconnect:
+        logger.info("Validation WebSocket closed by client")
+
+def _get_session(session_id: str) -> DesignSession:
+    session = validator.sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session: {session_id}")
+    return session
+
+@app.post("/sessions", response_model=SessionScore)
+async def create_session(design: DesignBody):
+    """Register a design for incremental re-validation"""
+    request_parsed()
+    try:
+        session = validator.open_session(design)
+    except DeltaError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Opened session {session.session_id} with {design.component_count} components")
+    return FastJSONResponse(validator.session_score(session))
+
+@app.post("/sessions/{session_id}/deltas", response_model=SessionScore)
+async def apply_session_delta(session_id: str, delta: DesignDelta):
+    """Apply component/connection edits and return the updated rule scores"""
+    request_parsed()
+    session = _get_session(session_id)
+    try:
+        validator.apply_delta(session, delta)
+    except DeltaError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(validator.session_score(session))
+
+@app.get("/sessions/{session_id}", response_model=ValidationResult)
+async def get_session_result(session_id: str):
+    """Full rule-based result (with test details) for the session's current design"""
+    session = _get_session(session_id)
+    # Scored with the session's own rules, as its incremental scores are
+    result, _ = await validator._score_rules(validator.session_design(session), session.problem_id, session.engine)
+    return FastJSONResponse(result)
+
+@app.delete("/sessions/{session_id}")
+async def close_session(session_id: str):
+    """Discard a session"""
+    if not validator.sessions.remove(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session: {session_id}")
+    return {"deleted": session_id}
+
+def _get_jobs() -> JobQueue:
+    if validator.jobs is None:
+        raise HTTPException(status_code=404, detail="Jobs are disabled (VALIDATOR_JOB_DB)")
+    return validator.jobs
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: Request, design: DesignBody,
+                     lane: Literal["interactive", "bulk"] = Query(INTERACTIVE),
+                     callback_url: Optional[str] = Query(None)):
+    """Queue a design for validation and return its job id at once.
+
+    Poll GET /jobs/{job_id} for the result, or pass `callback_url` (on a
+    host in VALIDATOR_JOB_CALLBACK_HOSTS) to have the finished job POSTed
+    there. "bulk" jobs (grading runs) yield to
+    "interactive" ones.
+    """
+    request_parsed()
+    jobs = _get_jobs()
+    try:
+        # The body is stored as sent, so a restart re-reads it like a request
+        job = await jobs.enqueue(await request.body(), lane, callback_url)
+    except ValueError as e:
+        # A callback to a host outside VALIDATOR_JOB_CALLBACK_HOSTS
+        raise HTTPException(status_code=422, detail=str(e))
+    logger.info(f"Queued {lane} job {job['job_id']} for design with {design.component_count} components")
+    location = f"/jobs/{job['job_id']}"
+    return FastJSONResponse({**job, "poll": location}, status_code=202, headers={"Location": location})
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """A job's status and queue timings, with its result once done"""
+    job = await _get_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return FastJSONResponse(job)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a job that has not started"""
+    status = await _get_jobs().cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    if status != "cancelled":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is already {status}")
+    return {"cancelled": job_id}
+
+def _check_batch_size(batch: BatchValidationRequest):
+    if len(batch.designs) > BATCH_MAX_DESIGNS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(batch.designs)} designs (max {BATCH_MAX_DESIGNS})"
+        )
+
+@app.post("/validate/batch", response_model=BatchValidationResponse)
+async def validate_batch(batch: BatchValidationRequest):
+    """Validate a list of designs, returning results in input order"""
+    request_parsed()
+    _check_batch_size(batch)
+    logger.info(f"Received batch validation request for {len(batch.designs)} designs")
+    results = [None] * len(batch.designs)
+    async for index, result, error in validator.validate_batch(batch.designs, BATCH_ITEM_TIMEOUT):
+        results[index] = BatchItemResult(index=index, result=result, error=error)
+    return FastJSONResponse(BatchValidationResponse.model_construct(results=results, count=len(results)))
+
+@app.post("/validate/batch/stream")
+async def validate_batch_stream(batch: BatchValidationRequest):
+    """Validate a list of designs, streaming NDJSON lines as each completes"""
+    request_parsed()
+    _check_batch_size(batch)
+    logger.info(f"Received streaming batch validation request for {len(batch.designs)} designs")
+
+    async def lines():
+        async for index, result, error in validator.validate_batch(batch.designs, BATCH_ITEM_TIMEOUT):
+            item = BatchItemResult(index=index, result=result, error=error)
+            yield item.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def _get_store() -> EvaluationStore:
+    if validator.store is None:
+        raise HTTPException(status_code=404, detail="Evaluation store is disabled (VALIDATOR_EVAL_DB)")
+    return validator.store
+
+def _stored_problem_id(problem_id: str) -> str:
+    # Designs validated without a problem are stored under ""
+    return "" if problem_id == "generic" else problem_id
+
+@app.get("/analytics/problems/{problem_id}/scores")
+async def problem_score_distribution(problem_id: str, bucket_width: int = Query(10, ge=1, le=100)):
+    """Score distribution of stored evaluations ("generic" for designs without a problem)"""
+    store = _get_store()
+    distribution = await asyncio.to_thread(store.score_distribution, _stored_problem_id(problem_id), bucket_width)
+    return {"problem_id": problem_id, **distribution}
+
+@app.get("/analytics/problems/{problem_id}/failing-tests")
+async def problem_failing_tests(problem_id: str, limit: int = Query(10, ge=1, le=100)):
+    """Most frequently failed tests across stored evaluations"""
+    store = _get_store()
+    tests = await asyncio.to_thread(store.failing_tests, _stored_problem_id(problem_id), limit)
+    return {"problem_id": problem_id, "tests": tests}
+
+def _require_admin(authorization: Optional[str]):
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (VALIDATOR_ADMIN_TOKEN)")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing admin token",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+@app.post("/catalog/reload")
+async def reload_catalog(authorization: Optional[str] = Header(None)):
+    """Reload the catalog file in this worker now instead of at the next poll (admin token required)"""
+    _require_admin(authorization)
+    try:
+        compiled = validator.catalog_watcher.reload()
+    except CatalogError as e:
+        raise HTTPException(status_code=422, detail={"path": e.path, "errors": e.errors})
     return {
-        "problems": PROBLEMS,
-        "count": len(PROBLEMS)
+        "version": compiled.version,
+        "problems": len(compiled.problems),
+        "component_types": len(compiled.component_types)
     }
 
+@app.get("/problems")
+async def get_problems(request: Request, offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1),
+                       fields: Optional[str] = Query(None)):
+    """Get available problems, optionally one page of them with only the selected fields"""
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    responses = validator.catalog.responses
+    body = responses.all_problems if (offset, limit, selected) == (0, None, None) else \
+        responses.problem_page(offset, limit, selected)
+    return body.response(request, CATALOG_CACHE_CONTROL)
+
 @app.get("/components")
-async def get_components():
+async def get_components(request: Request):
     """Get available component types"""
-    return {
-        "components": COMPONENT_TYPES,
-        "count": len(COMPONENT_TYPES)
-    }
+    return validator.catalog.responses.components.response(request, CATALOG_CACHE_CONTROL)
 
 if __name__ == "__main__":
     import uvicorn
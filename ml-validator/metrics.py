@@ -0,0 +1,211 @@
+"""
+Service Metrics
+Lightweight in-process counters and latency histograms
+"""
+
+from typing import Dict, List, Optional, Sequence
+import bisect
+import threading
+
+# Latency buckets in seconds, from sub-millisecond rule scoring up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Fixed-bucket histogram with interpolated quantile estimates"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class LabeledHistograms:
+    """One histogram per label value, created on first use"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def get(self, label: str) -> Histogram:
+        histogram = self.histograms.get(label)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(label, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, label: str, value: float):
+        self.get(label).observe(value)
+
+    def labels(self) -> List[str]:
+        return list(self.histograms)
+
+
+class TierMetrics:
+    """Requests and latency per evaluation tier (rules, llm-reduced, llm-full, ...)"""
+
+    # Tiers that answered without calling the LLM
+    NON_LLM_TIERS = ("rules",)
+    # Tiers where the LLM was wanted but the rule result stood in: the call
+    # failed, ran out of deadline, or was refused admission
+    FALLBACK_TIERS = ("fallback", "deadline", "overload")
+
+    def __init__(self):
+        self.latency = LabeledHistograms()
+        self.overall = Histogram()
+
+    def record(self, tier: str, seconds: float):
+        self.latency.observe(tier, seconds)
+        self.overall.observe(seconds)
+
+    def snapshot(self) -> Dict[str, object]:
+        tiers = {label: self.latency.get(label).snapshot() for label in self.latency.labels()}
+        total = sum(t["count"] for t in tiers.values())
+        without_llm = sum(tiers[t]["count"] for t in self.NON_LLM_TIERS if t in tiers)
+        fallback = sum(tiers[t]["count"] for t in self.FALLBACK_TIERS if t in tiers)
+        return {
+            "requests": total,
+            "served_without_llm": round(without_llm / total, 4) if total else 0.0,
+            "served_by_fallback": round(fallback / total, 4) if total else 0.0,
+            "p99": self.overall.quantile(0.99),
+            "tiers": tiers,
+        }
+
+
+class LLMCallMetrics:
+    """Prompt size and reply parsing outcomes for LLM calls"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.prompt_tokens = Counter()
+        self.retries = Counter()
+        self.parse_failures = Counter()
+        self.hedges = Counter()
+        self.hedge_wins = Counter()
+        # Duration of individual successful model calls; sets the hedge delay
+        self.call_latency = Histogram()
+
+    def record_call(self, prompt_tokens: int):
+        self.calls.inc()
+        self.prompt_tokens.inc(prompt_tokens)
+
+    def snapshot(self) -> Dict[str, object]:
+        calls = self.calls.value
+        return {
+            "calls": calls,
+            "prompt_tokens_per_call": round(self.prompt_tokens.value / calls, 1) if calls else None,
+            "retries": self.retries.value,
+            "parse_failures": self.parse_failures.value,
+            "parse_failure_rate": round(self.parse_failures.value / calls, 4) if calls else 0.0,
+            "hedges": self.hedges.value,
+            "hedge_wins": self.hedge_wins.value,
+            "call_p95": self.call_latency.quantile(0.95),
+        }
+
+
+def _label_text(labels: Optional[Dict[str, object]]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+class PrometheusWriter:
+    """Builds a Prometheus text-format (0.0.4) exposition"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._lines: List[str] = []
+        self._declared = set()
+
+    def _declare(self, name: str, kind: str, help_text: str):
+        if name not in self._declared:
+            self._declared.add(name)
+            self._lines.append(f"# HELP {name} {help_text}")
+            self._lines.append(f"# TYPE {name} {kind}")
+
+    def _sample(self, name: str, value: float, labels: Optional[Dict[str, object]] = None):
+        self._lines.append(f"{name}{_label_text(labels)} {float(value)!r}")
+
+    def counter(self, name: str, help_text: str, value: float, labels: Optional[Dict[str, object]] = None):
+        name = f"{self.prefix}{name}_total"
+        self._declare(name, "counter", help_text)
+        self._sample(name, value, labels)
+
+    def gauge(self, name: str, help_text: str, value: float, labels: Optional[Dict[str, object]] = None):
+        name = f"{self.prefix}{name}"
+        self._declare(name, "gauge", help_text)
+        self._sample(name, value, labels)
+
+    def histogram(self, name: str, help_text: str, histogram: Histogram,
+                  labels: Optional[Dict[str, object]] = None):
+        name = f"{self.prefix}{name}"
+        self._declare(name, "histogram", help_text)
+        labels = labels or {}
+        with histogram._lock:
+            counts = list(histogram.counts)
+            total = histogram.count
+            value_sum = histogram.sum
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            self._sample(f"{name}_bucket", cumulative, {**labels, "le": repr(float(bound))})
+        self._sample(f"{name}_bucket", total, {**labels, "le": "+Inf"})
+        self._sample(f"{name}_sum", value_sum, labels or None)
+        self._sample(f"{name}_count", total, labels or None)
+
+    def labeled_histograms(self, name: str, help_text: str, label: str, histograms: LabeledHistograms):
+        for value in histograms.labels():
+            self.histogram(name, help_text, histograms.get(value), {label: value})
+        if not histograms.labels():
+            self._declare(f"{self.prefix}{name}", "histogram", help_text)
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
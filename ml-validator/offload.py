@@ -0,0 +1,143 @@
+"""
+CPU Offload Pool
+Runs rule scoring and graph analysis of large designs outside the event
+loop, in a process or thread pool with bounded queuing
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import math
+import multiprocessing
+import time
+
+import numpy as np
+
+import columnar
+from graph_analysis import GraphReport, analyze, build_graph
+from rule_engine import RuleEngine, RuleEvaluation
+
+logger = logging.getLogger(__name__)
+
+POOL_MODES = ("process", "thread", "none")
+
+
+class PoolSaturated(Exception):
+    """Every pool slot is busy and the queue is full; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"CPU pool saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+# Rule tables of a pool worker, compiled once by _init_worker. Thread mode
+# shares the serving process's engine instead.
+_engine: Optional[RuleEngine] = None
+
+
+def _init_worker(component_types: Dict[str, Dict], problems: Dict[str, Dict]):
+    global _engine
+    _engine = RuleEngine(component_types, problems)
+
+
+def score_design(components: List[Tuple[str, str]], connections: List[Tuple[Optional[str], Optional[str]]],
+                 problem_id: Optional[str], engine: Optional[RuleEngine] = None) -> Tuple[RuleEvaluation, GraphReport]:
+    """Rule evaluation and graph analysis of one design, from plain tuples"""
+    engine = engine or _engine
+    evaluation = engine.evaluate(engine.profile(components, connections), problem_id)
+    report = analyze(*build_graph(components, connections))
+    return evaluation, report
+
+
+def score_columns(types: List[str], codes: np.ndarray, edges: np.ndarray, ids: Optional[List[str]],
+                  problem_id: Optional[str], engine: Optional[RuleEngine] = None) -> Tuple[RuleEvaluation, GraphReport]:
+    """score_design for a columnar design, from its arrays"""
+    engine = engine or _engine
+    evaluation = engine.evaluate(columnar.profile(engine, types, codes, edges), problem_id)
+    report = analyze(*columnar.graph(types, codes, edges, ids))
+    return evaluation, report
+
+
+class CPUPool:
+    """Bounded executor for CPU-heavy validation work.
+
+    At most `max_pending` calls may be running or queued; past that `run`
+    raises PoolSaturated instead of queuing without limit. The executor is
+    created on first use, so importing the service never forks.
+    """
+
+    def __init__(self, mode: str, max_workers: int, max_pending: int,
+                 initargs: Iterable[Any] = ()):
+        if mode not in POOL_MODES:
+            raise ValueError(f"Unknown CPU pool mode '{mode}' (expected one of {', '.join(POOL_MODES)})")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending)
+        self.initargs = tuple(initargs)
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        # Moving average of call duration, for Retry-After estimates
+        self._avg_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "none"
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                # spawn: forking a process that runs an event loop and threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=self.initargs
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cpu-pool")
+        return self._executor
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        return max(1, math.ceil(self._avg_seconds * self.pending / self.max_workers))
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturated(self.retry_after())
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            elapsed = time.perf_counter() - started
+            self._avg_seconds = elapsed if self.completed == 1 else 0.9 * self._avg_seconds + 0.1 * elapsed
+
+    def reinitialize(self, initargs: Iterable[Any]):
+        """Start new process workers with `initargs`; calls already submitted finish on the old ones"""
+        self.initargs = tuple(initargs)
+        if self.mode == "process" and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self._avg_seconds * 1000, 3),
+        }
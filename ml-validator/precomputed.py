@@ -0,0 +1,166 @@
+"""
+Precomputed Responses
+Catalog responses serialized and compressed once per catalog version,
+served with strong ETags, conditional 304s and content negotiation
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import gzip
+import hashlib
+import json
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+# Preference order when the client accepts several encodings equally
+ENCODINGS = ("br", "gzip", "identity") if brotli else ("gzip", "identity")
+
+# Problem fields a client may select; the problem id is always the key
+PROBLEM_FIELDS = ("title", "description", "min_score", "required_components", "optional_components", "test_cases")
+
+PAGE_CACHE_SIZE = 64
+
+
+def _dumps(content: Any) -> bytes:
+    # Same bytes JSONResponse would produce
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    """Content codings from an Accept-Encoding header with their q-values"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def _if_none_match(header: str) -> List[str]:
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+class EncodedBody:
+    """One JSON document, pre-compressed with every supported coding.
+
+    Each coding is its own representation with its own strong ETag
+    (`"<digest>"`, `"<digest>-gzip"`, `"<digest>-br"`); a compressed form
+    is only kept when it is smaller than the original.
+    """
+
+    __slots__ = ("digest", "bodies")
+
+    def __init__(self, content: Any):
+        payload = _dumps(content)
+        self.digest = hashlib.sha256(payload).hexdigest()[:32]
+        self.bodies: Dict[str, bytes] = {"identity": payload}
+        compressed = {"gzip": gzip.compress(payload, compresslevel=9, mtime=0)}
+        if brotli:
+            compressed["br"] = brotli.compress(payload, quality=11)
+        for coding, body in compressed.items():
+            if len(body) < len(payload):
+                self.bodies[coding] = body
+
+    def etag(self, coding: str) -> str:
+        return f'"{self.digest}"' if coding == "identity" else f'"{self.digest}-{coding}"'
+
+    def negotiate(self, accept_encoding: Optional[str]) -> str:
+        if not accept_encoding:
+            return "identity"
+        accepted = _accepted(accept_encoding)
+        wildcard = accepted.get("*")
+        # Highest q-value wins; ties go to the earlier (smaller) coding
+        best, best_q = "identity", 0.0
+        for coding in ENCODINGS:
+            if coding not in self.bodies:
+                continue
+            default = 1.0 if coding == "identity" and wildcard is None else (wildcard or 0.0)
+            q = accepted.get(coding, default)
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def response(self, request: Request, cache_control: str) -> Response:
+        coding = self.negotiate(request.headers.get("accept-encoding"))
+        etag = self.etag(coding)
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        match = request.headers.get("if-none-match")
+        if match is not None:
+            tags = _if_none_match(match)
+            if "*" in tags or etag in tags:
+                return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(self.bodies[coding], media_type="application/json", headers=headers)
+
+
+class CatalogResponses:
+    """Encoded /problems and /components bodies for one catalog version.
+
+    The full lists are encoded up front; paginated or field-selected
+    problem lists are encoded on first request and kept in a small LRU, so
+    repeated page loads never re-serialize.
+    """
+
+    def __init__(self, version: str, component_types: Dict[str, Dict], problems: Dict[str, Dict]):
+        self.version = version
+        self.problems = problems
+        self.problem_ids = list(problems)
+        self.components = EncodedBody({
+            "components": component_types,
+            "count": len(component_types),
+            "catalog_version": version,
+        })
+        self._pages: "OrderedDict[Tuple[int, Optional[int], Optional[Tuple[str, ...]]], EncodedBody]" = OrderedDict()
+        self.all_problems = self.problem_page(0, None, None)
+
+    def problem_page(self, offset: int, limit: Optional[int], fields: Optional[Tuple[str, ...]]) -> EncodedBody:
+        """Problems [offset, offset + limit) with only `fields` (all when None)"""
+        key = (offset, limit, fields)
+        body = self._pages.get(key)
+        if body is not None:
+            self._pages.move_to_end(key)
+            return body
+        ids = self.problem_ids[offset:None if limit is None else offset + limit]
+        if fields is None:
+            selected = {pid: self.problems[pid] for pid in ids}
+        else:
+            selected = {pid: {f: self.problems[pid][f] for f in fields if f in self.problems[pid]} for pid in ids}
+        body = EncodedBody({
+            "problems": selected,
+            "count": len(self.problems),
+            "offset": offset,
+            "limit": limit,
+            "catalog_version": self.version,
+        })
+        self._pages[key] = body
+        if len(self._pages) > PAGE_CACHE_SIZE:
+            self._pages.popitem(last=False)
+        return body
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Validated field selection in canonical order; raises ValueError on unknown fields"""
+    if fields is None:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested.difference(PROBLEM_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown problem fields: {', '.join(sorted(unknown))} (available: {', '.join(PROBLEM_FIELDS)})")
+    return tuple(f for f in PROBLEM_FIELDS if f in requested)
@@ -0,0 +1,309 @@
+"""
+LLM Prompt Templates
+Per-problem evaluation prompts compiled once from the problem catalog
+(one for the whole evaluation, and one per stress scenario), a compact
+design encoding, and the structured-output response schemas
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import json
+
+ROLE = "You are a Senior Staff System Design Interviewer evaluating a candidate's architecture."
+
+FRAMEWORK = (
+    "Judge: requirement coverage; component fit for the scale; "
+    "scalability and first bottleneck; single points of failure."
+)
+
+GENERIC_TEST_CASES = (
+    ('TC-01', 'High Scalability.', 'Is there a load balancer and caching?'),
+    ('TC-02', 'Single Point of Failure.', 'Are critical components redundant?'),
+    ('TC-03', 'Data Consistency vs Availability.', 'Did they choose the right DB strategy?'),
+)
+# Component types each generic scenario looks at (unlisted: the whole design)
+GENERIC_FOCUS = {
+    'TC-01': ('load-balancer', 'cache'),
+    'TC-03': ('database', 'cache'),
+}
+
+# Spelled out in the prompt only when the model cannot take a response schema
+OUTPUT_FORMAT = (
+    'Reply with JSON only: {"analysis": str (max 3 sentences), '
+    '"test_case_results": [{"name": "TC-xx: scenario", "passed": bool, "description": str}], '
+    '"detailed_results": {"scalability": 0-100, "reliability": 0-100, "completeness": 0-100, "correctness": 0-100}, '
+    '"score": 0-100}'
+)
+
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analysis": {"type": "string"},
+        "test_case_results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "passed": {"type": "boolean"},
+                    "description": {"type": "string"},
+                },
+                "required": ["name", "passed", "description"],
+            },
+        },
+        "detailed_results": {
+            "type": "object",
+            "properties": {
+                "scalability": {"type": "integer"},
+                "reliability": {"type": "integer"},
+                "completeness": {"type": "integer"},
+                "correctness": {"type": "integer"},
+            },
+        },
+        "score": {"type": "integer"},
+    },
+    "required": ["analysis", "test_case_results", "detailed_results", "score"],
+}
+
+# Per-scenario prompts ask for a single verdict
+TEST_CASE_HEADING = "Stress scenario (PASS/FAIL, with reason, and a 0-100 score for how well the design handles it):"
+TEST_CASE_OUTPUT_FORMAT = 'Reply with JSON only: {"passed": bool, "description": str (max 2 sentences), "score": 0-100}'
+
+TEST_CASE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "passed": {"type": "boolean"},
+        "description": {"type": "string"},
+        "score": {"type": "integer"},
+    },
+    "required": ["passed", "description", "score"],
+}
+
+RETRY_SUFFIX = "\nYour previous reply was not valid JSON. Reply with the JSON object only."
+
+
+def encode_design(components: Iterable[Tuple[str, str]],
+                  connections: Iterable[Tuple[Optional[str], Optional[str]]]) -> str:
+    """Token-lean design encoding.
+
+    Component ids are replaced by their position in the list and edges use
+    those indices, so long canvas ids never reach the model. Connections
+    to unknown components carry no information and are dropped.
+    """
+    index: Dict[str, int] = {}
+    nodes: List[str] = []
+    for i, (comp_id, comp_type) in enumerate(components):
+        index[comp_id] = i
+        nodes.append(f"{i}:{comp_type}")
+    edges: List[str] = []
+    for src, dst in connections:
+        u = index.get(src)
+        v = index.get(dst)
+        if u is not None and v is not None:
+            edges.append(f"{u}>{v}")
+    return f"Nodes: {' '.join(nodes) or 'none'}\nEdges: {' '.join(edges) or 'none'}"
+
+
+def focused_design(components: Iterable[Tuple[str, str]],
+                   connections: Iterable[Tuple[Optional[str], Optional[str]]],
+                   focus: Optional[Sequence[str]]) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """The part of a design a stress scenario looks at.
+
+    Components of the `focus` types, the components they connect to, and
+    the connections touching a focus component. Without a focus the whole
+    design is returned (connections to unknown components dropped).
+    """
+    components = list(components)
+    types = dict(components)
+    edges = [(u, v) for u, v in connections if u in types and v in types]
+    if not focus:
+        return components, edges
+    focus = set(focus)
+    edges = [(u, v) for u, v in edges if types[u] in focus or types[v] in focus]
+    keep = {c_id for c_id, c_type in components if c_type in focus}
+    keep.update(c_id for edge in edges for c_id in edge)
+    return [(c_id, c_type) for c_id, c_type in components if c_id in keep], edges
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+
+class TestCasePrompt(NamedTuple):
+    """One stress scenario's prompt; `focus` picks the part of the design it sees"""
+    id: str
+    name: str
+    focus: Optional[Tuple[str, ...]]
+    template: str
+
+    def render(self, design_text: str) -> str:
+        return self.template.format(design=design_text)
+
+
+class PromptTemplates:
+    """Evaluation prompts for every problem, pre-rendered up to the design.
+
+    Only the design encoding (and, for reduced prompts, the rule pre-check)
+    is substituted per request.
+    """
+
+    def __init__(self, problems: Dict[str, Dict], structured_output: bool = False):
+        self.structured_output = structured_output
+        self._templates: Dict[str, str] = {
+            problem_id: self._compile(
+                problem['title'], problem['description'],
+                [(tc['id'], tc['scenario'], tc['evaluation']) for tc in problem.get('test_cases', [])]
+            )
+            for problem_id, problem in problems.items()
+        }
+        self._test_cases: Dict[str, List[TestCasePrompt]] = {
+            problem_id: [
+                self._compile_test_case(problem['title'], problem['description'],
+                                        (tc['id'], tc['scenario'], tc['evaluation']), tc.get('focus'))
+                for tc in problem.get('test_cases', [])
+            ]
+            for problem_id, problem in problems.items()
+        }
+
+    @staticmethod
+    def _escape(text: str) -> str:
+        return text.replace("{", "{{").replace("}", "}}")
+
+    def _compile(self, title: str, description: str, test_cases: List[Tuple[str, str, str]]) -> str:
+        cases = "\n".join(f"{tc_id}: {scenario} Check: {check}" for tc_id, scenario, check in test_cases)
+        parts = [
+            ROLE,
+            f"Problem: {title}\n{description}",
+            "Design:\n{design}",
+            "{guidance}",
+            f"Stress scenarios (PASS/FAIL each, with reason):\n{cases}",
+        ]
+        if not self.structured_output:
+            parts.append(OUTPUT_FORMAT)
+        # Escape literal braces so only the placeholders are substituted
+        template = "\n\n".join(self._escape(p) for p in parts)
+        return template.replace("{{design}}", "{design}").replace("{{guidance}}", "{guidance}")
+
+    def _compile_test_case(self, title: str, description: str, test_case: Tuple[str, str, str],
+                           focus: Optional[Sequence[str]]) -> TestCasePrompt:
+        tc_id, scenario, check = test_case
+        parts = [
+            ROLE,
+            f"Problem: {title}\n{description}",
+            "Design (the components this scenario involves):\n{design}" if focus else "Design:\n{design}",
+            f"{TEST_CASE_HEADING}\n{tc_id}: {scenario} Check: {check}",
+        ]
+        if not self.structured_output:
+            parts.append(TEST_CASE_OUTPUT_FORMAT)
+        template = "\n\n".join(self._escape(p) for p in parts).replace("{{design}}", "{design}")
+        return TestCasePrompt(tc_id, f"{tc_id}: {scenario.rstrip('.')}", tuple(focus) if focus else None, template)
+
+    def template(self, problem_id: Optional[str]) -> str:
+        template = self._templates.get(problem_id) if problem_id else None
+        if template is None:
+            # Unknown problems get the generic scenarios; client-supplied ids
+            # are not cached so the table cannot grow without bound
+            template = self._compile(
+                f"System Design Problem ({problem_id})",
+                "Design a scalable system for this use case.",
+                list(GENERIC_TEST_CASES)
+            )
+        return template
+
+    def test_cases(self, problem_id: Optional[str]) -> List[TestCasePrompt]:
+        """One prompt per stress scenario of the problem (the generic ones for unknown problems)"""
+        cases = self._test_cases.get(problem_id) if problem_id else None
+        if cases is None:
+            title = f"System Design Problem ({problem_id})"
+            description = "Design a scalable system for this use case."
+            cases = [
+                self._compile_test_case(title, description, tc, GENERIC_FOCUS.get(tc[0]))
+                for tc in GENERIC_TEST_CASES
+            ]
+        return cases
+
+    def render(self, problem_id: Optional[str], design_text: str, precheck: Optional[str] = None) -> str:
+        guidance = FRAMEWORK if precheck is None else f"{precheck}\nFocus on the stress scenarios."
+        return self.template(problem_id).format(design=design_text, guidance=guidance)
+
+
+def legacy_prompt(title: str, description: str, test_cases: List[Tuple[str, str, str]],
+                  components: List[Tuple[str, str]], connections: List[Tuple[str, str]]) -> str:
+    """The pre-template prompt shape, kept only for the token report below"""
+    cases = "".join(f"- **{i}**: {s} (Check: {e})\n" for i, s, e in test_cases)
+    return f"""
+            Role: You are a Senior Staff System Design Interviewer. Your task is to evaluate a user's proposed architecture for a specific system design problem.
+
+            Problem: {title}
+            Description: {description}
+
+            User's Design:
+            - Components Used: {", ".join(t for _, t in components)}
+            - Full Component List: {json.dumps([{"type": t, "id": i} for i, t in components])}
+            - Connections: {", ".join(f"{a}->{b}" for a, b in connections)}
+
+            Evaluation Framework:
+            1. Requirement Coverage: Did the user address the core functional requirements?
+            2. Component Appropriateness: Are the chosen technologies (Databases, Load Balancers, Caching) correct for the scale?
+            3. Scalability & Bottlenecks: Can the system handle high traffic? Where will it fail first?
+            4. Reliability: Is there a single point of failure?
+
+            The "Stress Scenarios" (Test Cases):
+            Please run the design through the following scenarios. For each, state PASS/FAIL and why.
+            {cases}
+
+            Output Format (Strict JSON):
+            {{
+                "analysis": "Brief breakdown of strengths and weaknesses (max 2-3 sentences).",
+                "test_case_results": [
+                    {{
+                        "name": "TC-01: [Scenario Name]",
+                        "passed": true/false,
+                        "description": "Explanation of why it passed or failed."
+                    }}
+                ],
+                "detailed_results": {{
+                    "scalability": <score 0-100>,
+                    "reliability": <score 0-100>,
+                    "completeness": <score 0-100>,
+                    "correctness": <score 0-100>
+                }},
+                "score": <overall_percentage 0-100>
+            }}
+            """
+
+
+def token_report(problems: Dict[str, Dict], sizes: Iterable[int] = (5, 20, 100)) -> List[Dict[str, Any]]:
+    """Estimated input tokens per request, legacy prompt vs compiled templates"""
+    rows = []
+    for structured in (False, True):
+        templates = PromptTemplates(problems, structured_output=structured)
+        for problem_id, problem in problems.items():
+            types = problem['required_components'] + problem.get('optional_components', [])
+            cases = [(tc['id'], tc['scenario'], tc['evaluation']) for tc in problem.get('test_cases', [])]
+            for size in sizes:
+                # Canvas-style ids, as the frontend sends them
+                components = [(f"dndnode_{1700000000000 + i}", types[i % len(types)]) for i in range(size)]
+                connections = [(components[i][0], components[i + 1][0]) for i in range(size - 1)]
+                before = estimate_tokens(legacy_prompt(problem['title'], problem['description'], cases,
+                                                       components, connections))
+                after = estimate_tokens(templates.render(problem_id, encode_design(components, connections)))
+                rows.append({
+                    "problem_id": problem_id,
+                    "components": size,
+                    "structured_output": structured,
+                    "legacy_tokens": before,
+                    "template_tokens": after,
+                    "reduction": round(1 - after / before, 3),
+                })
+    return rows
+
+
+if __name__ == "__main__":
+    from catalog import load_catalog
+
+    PROBLEMS = load_catalog().problems
+    print(f"{'problem':<20}{'size':>6}{'schema':>8}{'legacy':>9}{'compact':>9}{'saved':>8}")
+    for row in token_report(PROBLEMS):
+        print(f"{row['problem_id']:<20}{row['components']:>6}{str(row['structured_output']):>8}"
+              f"{row['legacy_tokens']:>9}{row['template_tokens']:>9}{row['reduction']:>8.0%}")
@@ -0,0 +1,242 @@
+"""
+Validation Result Cache
+Content-addressed cache for design evaluations with in-process LRU/TTL
+eviction and an optional SQLite backing store, which worker processes
+pointed at the same file share
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_design_key(
+    components: Iterable[Tuple[str, str]],
+    connections: Iterable[Tuple[Optional[str], Optional[str]]],
+    problem_id: Optional[str],
+    prompt_version: str,
+) -> str:
+    """Hash a design into a stable cache key.
+
+    Components are (id, type) pairs and connections (from, to) pairs. Both
+    are sorted so canvas ordering does not matter; positions never enter the
+    key because they do not influence the evaluation.
+    """
+    canonical = {
+        "v": prompt_version,
+        "p": problem_id or "",
+        "c": sorted((c_type, c_id) for c_id, c_type in components),
+        "e": sorted((src or "", dst or "") for src, dst in connections),
+    }
+    payload = json.dumps(canonical, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Bounded LRU/TTL cache of serialized validation results.
+
+    On the event loop, disk reads go through `aget` in the default executor
+    and `set` only queues the disk write: a background task writes queued
+    entries in batches, one transaction each, off the loop, so another
+    worker holding the file's write lock never stalls requests. Without a
+    running loop (scripts), `get` and `set` use the disk directly.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 3600.0, db_path: Optional[str] = None,
+                 batch_size: int = 256, max_queue: int = 10000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # _lock guards the in-memory entries, _db_lock the connection
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_dropped = 0
+
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        try:
+            directory = os.path.dirname(os.path.abspath(db_path))
+            os.makedirs(directory, exist_ok=True)
+            # Other workers may hold the write lock briefly; wait rather than fail
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache disk store disabled: {e}")
+            self._db = None
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, value = entry
+            if self._expired(created_at):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _counted(self, value: Optional[Dict[str, Any]], from_disk: bool = False) -> Optional[Dict[str, Any]]:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if from_disk:
+                self.disk_hits += 1
+        return value
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result or None, counting the lookup (blocking disk read)"""
+        value = self._get_memory(key)
+        if value is not None:
+            return self._counted(value)
+        return self._counted(self._get_from_disk(key), from_disk=True)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """`get` for the event loop: a memory miss is read from disk in the executor"""
+        value = self._get_memory(key)
+        if value is not None or self._db is None:
+            return self._counted(value)
+        value = await asyncio.get_running_loop().run_in_executor(None, self._get_from_disk, key)
+        return self._counted(value, from_disk=True)
+
+    def _get_from_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache disk read failed: {e}")
+                return None
+        if row is None or self._expired(row[1]):
+            return None
+        value = json.loads(row[0])
+        with self._lock:
+            self._put_memory(key, value, row[1])
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a serialized result in memory and, if enabled, queue it for disk"""
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, value, now)
+        if self._db is None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._write([(key, value, now)])
+            return
+        if self._queue is None:
+            # Created on first use so both bind to the serving event loop
+            self._queue = asyncio.Queue(self.max_queue)
+            self._writer = asyncio.ensure_future(self._drain())
+        try:
+            self._queue.put_nowait((key, value, now))
+        except asyncio.QueueFull:
+            # Still cached in memory; only other workers miss out
+            self.disk_dropped += 1
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await loop.run_in_executor(None, self._write, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[Tuple[str, Dict[str, Any], float]]):
+        rows = [(key, json.dumps(value), created_at) for key, value, created_at in batch]
+        with self._db_lock:
+            if self._db is None:
+                return
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO results (key, value, created_at) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db.rollback()
+                logger.warning(f"Result cache disk write failed: {e}")
+
+    async def flush(self):
+        """Wait until every queued disk write has been made"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def _put_memory(self, key: str, value: Dict[str, Any], created_at: float):
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def close(self):
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_store": self.db_path if self._db is not None else None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_queued": self._queue.qsize() if self._queue is not None else 0,
+            "disk_dropped": self.disk_dropped,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,340 @@
+"""
+Compiled Rule Engine
+Integer-indexed form of the catalog's component types and problems with a
+single-pass rule evaluator for the deterministic scoring path
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Generic (no problem) validation: basic components and their points
+BASIC_COMPONENTS = ('web-server', 'database')
+BASIC_COMPONENT_POINTS = 10
+DIVERSITY_MIN_COMPONENTS = 4
+DIVERSITY_POINTS = 5
+REQUIRED_COMPONENT_POINTS = 5
+CONNECTED_POINTS = 10
+VALID_CONNECTION_POINTS = 3
+DEFAULT_MIN_SCORE = 70
+GROUP_MAX_SCORE = 25
+
+# (name, types that must all be present, points, description)
+ARCHITECTURE_PATTERNS = (
+    ('Layered architecture', ('api-gateway', 'web-server', 'database'), 15,
+     'Proper separation of presentation, application, and data layers'),
+    ('Scalability pattern', ('load-balancer',), 5,
+     'Load balancer present for horizontal scaling'),
+    ('Performance pattern', ('cache',), 5,
+     'Caching layer present for performance optimization'),
+)
+
+BEST_PRACTICES = (
+    ('Security layer', ('security',), 8, 'Security layer present'),
+    ('Content delivery', ('cdn',), 7, 'CDN present for content delivery'),
+    ('Asynchronous processing', ('message-queue',), 10, 'Message queue present for async processing'),
+)
+
+
+# Feedback for a score: (lowest score, message), highest band first
+FEEDBACK = (
+    (95, "🎉 PERFECT! You absolute legend! This is a masterpiece of system design!"),
+    (90, "🌟 Excellent work! Your architecture is solid and well-thought-out!"),
+    (80, "👏 Great job! You've got a strong design with good practices!"),
+    (70, "✅ You passed! Your design works, but there's room for improvement!"),
+    (60, "🤔 So close! Review the failed tests and try again!"),
+    (40, "😬 Not quite there yet! Focus on the basic components first!"),
+)
+FEEDBACK_FLOOR = "🤦‍♂️ Ouch! Let's start with the fundamentals - every system needs a web server and database!"
+
+
+def score_feedback(score: int) -> str:
+    """Motivational feedback for a score"""
+    for threshold, message in FEEDBACK:
+        if score >= threshold:
+            return message
+    return FEEDBACK_FLOOR
+
+
+class CompiledProblem(NamedTuple):
+    problem_id: str
+    required: Tuple[int, ...]
+    required_mask: int
+    min_score: int
+
+
+class DesignProfile(NamedTuple):
+    """Everything the rules need from a design, gathered in one pass"""
+    type_mask: int
+    type_counts: Dict[int, int]
+    component_count: int
+    connection_count: int
+    valid_edges: List[Tuple[int, int]]
+
+
+class RuleEvaluation(NamedTuple):
+    score: int
+    passed: bool
+    detailed_results: Dict[str, int]
+    test_results: List[Dict[str, Any]]
+
+
+class RuleEngine:
+    """Catalog component types and problems compiled into bitmask lookup tables.
+
+    Every component type (including ones only referenced by problems or
+    connection lists) gets an integer id; presence sets are int bitmasks and
+    connection validity is one bitmask of allowed targets per source type.
+    """
+
+    def __init__(self, component_types: Dict[str, Dict], problems: Dict[str, Dict]):
+        names: List[str] = list(component_types)
+        for rules in component_types.values():
+            names.extend(rules.get('required_connections', []))
+            names.extend(rules.get('optional_connections', []))
+        for problem in problems.values():
+            names.extend(problem.get('required_components', []))
+            names.extend(problem.get('optional_components', []))
+
+        self.type_ids: Dict[str, int] = {}
+        for name in names:
+            self.type_ids.setdefault(name, len(self.type_ids))
+        self.type_names: List[str] = [
+            component_types.get(name, {}).get('name', name) for name in self.type_ids
+        ]
+
+        # Connection-validity matrix: bit j of valid_targets[i] is set when
+        # an i -> j edge follows the component rules
+        self.valid_targets: List[int] = [0] * len(self.type_ids)
+        for name, rules in component_types.items():
+            mask = 0
+            for target in rules.get('required_connections', []) + rules.get('optional_connections', []):
+                mask |= 1 << self.type_ids[target]
+            self.valid_targets[self.type_ids[name]] = mask
+
+        self.problems: Dict[str, CompiledProblem] = {}
+        for problem_id, problem in problems.items():
+            required = tuple(self.type_ids[t] for t in problem['required_components'])
+            self.problems[problem_id] = CompiledProblem(
+                problem_id=problem_id,
+                required=required,
+                required_mask=self._mask(required),
+                min_score=problem.get('min_score', DEFAULT_MIN_SCORE),
+            )
+
+        self._basic = tuple(self.type_ids[t] for t in BASIC_COMPONENTS)
+        self._patterns = self._compile_checks(ARCHITECTURE_PATTERNS)
+        self._practices = self._compile_checks(BEST_PRACTICES)
+        self._edge_tests: Dict[Tuple[int, int], str] = {}
+
+    @staticmethod
+    def _mask(type_ids: Iterable[int]) -> int:
+        mask = 0
+        for tid in type_ids:
+            mask |= 1 << tid
+        return mask
+
+    def _compile_checks(self, checks) -> Tuple[Tuple[str, int, int, str], ...]:
+        return tuple(
+            (name, self._mask(self.type_ids[t] for t in types), points, description)
+            for name, types, points, description in checks
+        )
+
+    def problem(self, problem_id: Optional[str]) -> Optional[CompiledProblem]:
+        return self.problems.get(problem_id) if problem_id else None
+
+    def profile(self, components: Iterable[Tuple[str, str]],
+                connections: Iterable[Tuple[Optional[str], Optional[str]]]) -> DesignProfile:
+        """Build a design profile from (id, type) and (from, to) pairs in O(V+E)"""
+        type_ids = self.type_ids
+        id_to_type: Dict[str, int] = {}
+        type_counts: Dict[int, int] = {}
+        type_mask = 0
+        component_count = 0
+        for comp_id, comp_type in components:
+            tid = type_ids.get(comp_type, -1) if comp_type else -1
+            # Later duplicates win, like a dict built from the component list
+            id_to_type[comp_id] = tid
+            component_count += 1
+            if tid >= 0:
+                type_counts[tid] = type_counts.get(tid, 0) + 1
+                type_mask |= 1 << tid
+
+        valid_targets = self.valid_targets
+        valid_edges: List[Tuple[int, int]] = []
+        connection_count = 0
+        for src, dst in connections:
+            connection_count += 1
+            from_tid = id_to_type.get(src, -1)
+            if from_tid < 0:
+                continue
+            to_tid = id_to_type.get(dst, -1)
+            if to_tid >= 0 and valid_targets[from_tid] >> to_tid & 1:
+                valid_edges.append((from_tid, to_tid))
+
+        return DesignProfile(type_mask, type_counts, component_count, connection_count, valid_edges)
+
+    def profile_design(self, design) -> DesignProfile:
+        """Profile a DesignModel-like object (components with id/type, connections with endpoints)"""
+        return self.profile(
+            ((c.id, c.type) for c in design.components),
+            ((c.from_component, c.to_component) for c in design.connections),
+        )
+
+    # Rule groups. Each returns (score capped at 25, test results) and emits
+    # the same tests, in the same order, as the original list-based checks.
+
+    def required_components(self, profile: DesignProfile, problem: Optional[CompiledProblem]) -> Tuple[int, List[Dict]]:
+        score = 0
+        tests = []
+        mask = profile.type_mask
+        names = self.type_names
+        if problem:
+            for tid in problem.required:
+                name = names[tid]
+                if mask >> tid & 1:
+                    score += REQUIRED_COMPONENT_POINTS
+                    tests.append({
+                        'name': f'Required component: {name}',
+                        'passed': True,
+                        'points': REQUIRED_COMPONENT_POINTS,
+                        'description': f'{name} is present'
+                    })
+                else:
+                    tests.append({
+                        'name': f'Required component: {name}',
+                        'passed': False,
+                        'points': 0,
+                        'description': f'Missing required {name}'
+                    })
+        else:
+            for tid in self._basic:
+                if mask >> tid & 1:
+                    score += BASIC_COMPONENT_POINTS
+                    tests.append({
+                        'name': f'Basic component: {names[tid]}',
+                        'passed': True,
+                        'points': BASIC_COMPONENT_POINTS,
+                        'description': f'{names[tid]} is present'
+                    })
+            if profile.component_count >= DIVERSITY_MIN_COMPONENTS:
+                score += DIVERSITY_POINTS
+                tests.append({
+                    'name': 'Component diversity',
+                    'passed': True,
+                    'points': DIVERSITY_POINTS,
+                    'description': f'Good component diversity ({profile.component_count} components)'
+                })
+        return min(score, GROUP_MAX_SCORE), tests
+
+    def connections(self, profile: DesignProfile) -> Tuple[int, List[Dict]]:
+        score = 0
+        tests = []
+        if profile.connection_count > 0:
+            score += CONNECTED_POINTS
+            tests.append({
+                'name': 'Component connections',
+                'passed': True,
+                'points': CONNECTED_POINTS,
+                'description': f'{profile.connection_count} connections found'
+            })
+        else:
+            tests.append({
+                'name': 'Component connections',
+                'passed': False,
+                'points': 0,
+                'description': 'No connections between components'
+            })
+
+        score += VALID_CONNECTION_POINTS * len(profile.valid_edges)
+        for edge in profile.valid_edges:
+            tests.append({
+                'name': self._edge_test_name(edge),
+                'passed': True,
+                'points': VALID_CONNECTION_POINTS,
+                'description': 'Connection follows best practices'
+            })
+        return min(score, GROUP_MAX_SCORE), tests
+
+    def _edge_test_name(self, edge: Tuple[int, int]) -> str:
+        name = self._edge_tests.get(edge)
+        if name is None:
+            name = f'Valid connection: {self.type_names[edge[0]]} → {self.type_names[edge[1]]}'
+            self._edge_tests[edge] = name
+        return name
+
+    @staticmethod
+    def _presence_checks(profile: DesignProfile, checks) -> Tuple[int, List[Dict]]:
+        score = 0
+        tests = []
+        mask = profile.type_mask
+        for name, required_mask, points, description in checks:
+            if mask & required_mask == required_mask:
+                score += points
+                tests.append({
+                    'name': name,
+                    'passed': True,
+                    'points': points,
+                    'description': description
+                })
+        return min(score, GROUP_MAX_SCORE), tests
+
+    def architecture_patterns(self, profile: DesignProfile) -> Tuple[int, List[Dict]]:
+        return self._presence_checks(profile, self._patterns)
+
+    def best_practices(self, profile: DesignProfile) -> Tuple[int, List[Dict]]:
+        return self._presence_checks(profile, self._practices)
+
+    def score_counts(self, type_mask: int, component_count: int, connection_count: int,
+                     valid_edge_count: int, problem_id: Optional[str] = None) -> RuleEvaluation:
+        """Scores from aggregate counts alone, without per-test results.
+
+        Cost is independent of design size, which lets incrementally
+        maintained designs be re-scored after every edit.
+        """
+        problem = self.problem(problem_id)
+        profile = DesignProfile(type_mask, {}, component_count, connection_count, [])
+        component_score = self.required_components(profile, problem)[0]
+        connection_score = min(
+            CONNECTED_POINTS * (connection_count > 0) + VALID_CONNECTION_POINTS * valid_edge_count,
+            GROUP_MAX_SCORE
+        )
+        pattern_score = self.architecture_patterns(profile)[0]
+        practices_score = self.best_practices(profile)[0]
+
+        total_score = component_score + connection_score + pattern_score + practices_score
+        min_score = problem.min_score if problem else DEFAULT_MIN_SCORE
+        return RuleEvaluation(
+            score=total_score,
+            passed=total_score >= min_score,
+            detailed_results={
+                'required_components': component_score,
+                'connections': connection_score,
+                'architecture_patterns': pattern_score,
+                'best_practices': practices_score,
+            },
+            test_results=[],
+        )
+
+    def evaluate(self, profile: DesignProfile, problem_id: Optional[str] = None) -> RuleEvaluation:
+        """Run all four rule groups against one profile"""
+        problem = self.problem(problem_id)
+        component_score, tests = self.required_components(profile, problem)
+        connection_score, connection_tests = self.connections(profile)
+        pattern_score, pattern_tests = self.architecture_patterns(profile)
+        practices_score, practices_tests = self.best_practices(profile)
+        tests.extend(connection_tests)
+        tests.extend(pattern_tests)
+        tests.extend(practices_tests)
+
+        total_score = component_score + connection_score + pattern_score + practices_score
+        min_score = problem.min_score if problem else DEFAULT_MIN_SCORE
+        return RuleEvaluation(
+            score=total_score,
+            passed=total_score >= min_score,
+            detailed_results={
+                'required_components': component_score,
+                'connections': connection_score,
+                'architecture_patterns': pattern_score,
+                'best_practices': practices_score,
+            },
+            test_results=tests,
+        )
@@ -0,0 +1,179 @@
+"""
+LLM Call Scheduler
+Bounded-concurrency asyncio scheduler with token-bucket rate limiting,
+admission control, per-call timeouts and hedged calls for Gemini requests
+"""
+
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """The scheduler's wait queue is full"""
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # The lock keeps waiters in FIFO order while one of them sleeps
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def try_acquire(self) -> bool:
+        """Take a token only if one is available right now"""
+        if self.rate <= 0:
+            return True
+        if self._lock.locked():
+            return False
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class LLMScheduler:
+    """Runs LLM calls under a concurrency cap and a shared rate limit"""
+
+    def __init__(self, max_concurrency: int = 8, requests_per_minute: float = 60, burst: Optional[float] = None,
+                 bucket: Optional[Any] = None, max_queue: Optional[int] = None):
+        self.max_concurrency = max_concurrency
+        # Bounded calls beyond this many waiters are rejected (None: unbounded)
+        self.max_queue = max_queue
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # A caller-supplied bucket (e.g. one shared across worker processes)
+        # replaces the in-process one
+        self.bucket = bucket or TokenBucket(requests_per_minute / 60.0, burst or max(1.0, float(max_concurrency)))
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.rejected = 0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self, bounded: bool = True):
+        """Hold a concurrency slot and one rate-limit token for the body.
+
+        Used directly for streaming calls that cannot be wrapped in `run`.
+        A bounded call raises AdmissionRejected instead of joining a full
+        wait queue; unbounded ones (batch work) always wait.
+        """
+        if (bounded and self.max_queue is not None and self.semaphore.locked()
+                and self.waiting >= self.max_queue):
+            self.rejected += 1
+            raise AdmissionRejected(f"LLM wait queue full ({self.waiting} waiting)")
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            await self.bucket.acquire()
+            self.running += 1
+            try:
+                yield
+                self.completed += 1
+            except asyncio.TimeoutError:
+                raise
+            except Exception:
+                self.failures += 1
+                raise
+            finally:
+                self.running -= 1
+        finally:
+            self.semaphore.release()
+
+    async def run(self, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None,
+                  bounded: bool = True) -> Any:
+        """Wait for a slot and a rate-limit token, then await `fn()`.
+
+        The timeout covers only the call itself, not time spent queued.
+        """
+        async with self.slot(bounded):
+            try:
+                return await asyncio.wait_for(fn(), timeout) if timeout else await fn()
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                logger.warning(f"LLM call exceeded {timeout}s timeout")
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": self.bucket.rate * 60,
+            "max_queue": self.max_queue,
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+async def hedged(call: Callable[[], Awaitable[Any]], delay: Optional[float],
+                 may_hedge: Callable[[], Awaitable[bool]]) -> Tuple[Any, bool, bool]:
+    """Await `call()`, starting a second copy if the first is slow or fails early.
+
+    If the first call has not succeeded within `delay` seconds and
+    `may_hedge()` allows it, the call is issued again and whichever copy
+    succeeds first wins; the other is cancelled. Returns (result, hedged,
+    hedge_won). With `delay` None the call is never duplicated.
+    """
+    primary = asyncio.ensure_future(call())
+    pending = {primary}
+    hedged_call = None
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if (not done or primary.exception() is not None) and await may_hedge():
+                hedged_call = asyncio.ensure_future(call())
+                pending.add(hedged_call)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), hedged_call is not None, task is hedged_call
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,70 @@
+"""
+Production Launcher
+Runs the validator under N uvicorn worker processes that share one result
+cache and one global LLM rate limit
+
+    python serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+
+Workers default to the CPU count. Shared state lives in SQLite files in
+--state-dir (a fresh temporary directory unless given), so no external
+services are needed. On SIGINT/SIGTERM each worker stops accepting
+connections and finishes in-flight requests, for up to --graceful-timeout
+seconds, before it exits.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the validation service with multiple workers")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("VALIDATOR_WORKERS") or os.cpu_count() or 1))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--state-dir", default=os.getenv("VALIDATOR_STATE_DIR"),
+                        help="Directory for the shared cache and rate limiter databases")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0,
+                        help="Seconds to let in-flight requests finish on shutdown")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    state_dir = args.state_dir
+    owns_state_dir = state_dir is None
+    if owns_state_dir:
+        state_dir = tempfile.mkdtemp(prefix="ml-validator-")
+
+    # Workers read their configuration from the environment when main is imported
+    os.environ["VALIDATOR_WORKERS"] = str(args.workers)
+    os.environ["VALIDATOR_STATE_DIR"] = state_dir
+    if args.workers > 1:
+        logger.warning("Incremental sessions (/sessions) are held per worker; "
+                       "route a session's requests to one worker or use --workers 1")
+    logger.info(f"Starting {args.workers} worker(s); shared state in {state_dir}")
+
+    try:
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            log_level=args.log_level,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            app_dir=os.path.dirname(os.path.abspath(__file__))
+        )
+    finally:
+        if owns_state_dir:
+            shutil.rmtree(state_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
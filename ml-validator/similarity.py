@@ -0,0 +1,178 @@
+"""
+Design Similarity Index
+Id-invariant feature vectors for designs and a bounded NumPy
+nearest-neighbour index, so near-duplicate submissions can reuse an
+earlier LLM evaluation
+"""
+
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from graph_analysis import build_graph
+
+# One relabeling round keeps a single added edge from disturbing most of
+# the vector, while still separating unrelated designs
+WL_ITERATIONS = 1
+WL_BUCKETS = 64
+
+
+class DesignFeatures:
+    """Maps a design to a unit-length float32 vector.
+
+    Equally weighted blocks, each L2-normalized: the component type
+    histogram, then one per round of Weisfeiler-Lehman relabeling (a node's
+    label combined with its sorted in- and out-neighbour labels) hashed into
+    `wl_buckets` buckets. Component ids never enter the vector, so renamed
+    designs map to the same point; the dot product of two vectors is the
+    mean cosine similarity of their blocks.
+    """
+
+    def __init__(self, component_types: Iterable[str], wl_iterations: int = WL_ITERATIONS,
+                 wl_buckets: int = WL_BUCKETS):
+        self.type_index = {t: i for i, t in enumerate(component_types)}
+        # Unknown component types share one extra slot
+        self.type_slots = len(self.type_index) + 1
+        self.wl_iterations = wl_iterations
+        self.wl_buckets = wl_buckets
+        self.dims = self.type_slots + wl_iterations * wl_buckets
+        self._scale = 1.0 / np.sqrt(1 + wl_iterations)
+
+    def vector(self, components: Iterable[Tuple[str, str]],
+               connections: Iterable[Tuple[Optional[str], Optional[str]]]) -> np.ndarray:
+        ids, types, edges = build_graph(components, connections)
+        n = len(ids)
+        other = self.type_slots - 1
+        labels = [self.type_index.get(t, other) for t in types]
+        out_adj: List[List[int]] = [[] for _ in range(n)]
+        in_adj: List[List[int]] = [[] for _ in range(n)]
+        for u, v in edges:
+            out_adj[u].append(v)
+            in_adj[v].append(u)
+
+        blocks = [np.bincount(labels, minlength=self.type_slots)]
+        for _ in range(self.wl_iterations):
+            # hash() of int tuples is stable across processes (no hash seed)
+            labels = [
+                hash((labels[v],
+                      tuple(sorted(labels[u] for u in out_adj[v])),
+                      tuple(sorted(labels[u] for u in in_adj[v]))))
+                for v in range(n)
+            ]
+            blocks.append(np.bincount([label % self.wl_buckets for label in labels], minlength=self.wl_buckets))
+
+        vector = np.empty(self.dims, dtype=np.float32)
+        offset = 0
+        for block in blocks:
+            norm = np.sqrt(float(np.dot(block, block)))
+            vector[offset:offset + block.size] = block / norm * self._scale if norm else 0.0
+            offset += block.size
+        return vector
+
+
+class Neighbour(NamedTuple):
+    similarity: float
+    key: str
+    rule_score: int
+
+
+class _Partition:
+    """Ring buffer of vectors that grows by doubling"""
+
+    def __init__(self, dims: int, capacity: int = 64):
+        self.vectors = np.zeros((capacity, dims), dtype=np.float32)
+        self.rule_scores = np.zeros(capacity, dtype=np.int16)
+        self.keys: List[Optional[str]] = [None] * capacity
+        self.start = 0
+        self.count = 0
+
+    def _grow(self):
+        capacity = len(self.keys)
+        order = (np.arange(self.count) + self.start) % capacity
+        vectors = np.zeros((capacity * 2, self.vectors.shape[1]), dtype=np.float32)
+        vectors[:self.count] = self.vectors[order]
+        rule_scores = np.zeros(capacity * 2, dtype=np.int16)
+        rule_scores[:self.count] = self.rule_scores[order]
+        self.keys = [self.keys[i] for i in order] + [None] * (capacity * 2 - self.count)
+        self.vectors, self.rule_scores, self.start = vectors, rule_scores, 0
+
+    def append(self, vector: np.ndarray, key: str, rule_score: int):
+        if self.count == len(self.keys):
+            self._grow()
+        slot = (self.start + self.count) % len(self.keys)
+        self.vectors[slot] = vector
+        self.rule_scores[slot] = rule_score
+        self.keys[slot] = key
+        self.count += 1
+
+    def pop_oldest(self):
+        # Zeroed so the freed row can never be the best match
+        self.vectors[self.start] = 0.0
+        self.keys[self.start] = None
+        self.start = (self.start + 1) % len(self.keys)
+        self.count -= 1
+
+    def best(self, query: np.ndarray) -> Optional[Neighbour]:
+        if self.count == 0:
+            return None
+        # Unused rows are zero vectors and can only score 0
+        scores = self.vectors @ query
+        i = int(np.argmax(scores))
+        if self.keys[i] is None:
+            return None
+        return Neighbour(float(scores[i]), self.keys[i], int(self.rule_scores[i]))
+
+
+class SimilarityIndex:
+    """Nearest previously evaluated design, by cosine similarity.
+
+    Vectors are partitioned by (scope, component count) and a lookup only
+    scans partitions within `size_tolerance` components of the query, so
+    its cost depends on how many stored designs have about the same size,
+    not on the total. At most `max_entries` vectors are held; inserting
+    beyond that evicts the oldest vector of the target partition, or of
+    the largest partition when the target is empty.
+    """
+
+    def __init__(self, dims: int, max_entries: int = 200_000, size_tolerance: int = 1):
+        self.dims = dims
+        self.max_entries = max_entries
+        self.size_tolerance = size_tolerance
+        self._partitions: Dict[Tuple[Hashable, int], _Partition] = {}
+        self.entries = 0
+        self.evictions = 0
+
+    def add(self, scope: Hashable, size: int, vector: np.ndarray, key: str, rule_score: int):
+        partition = self._partitions.get((scope, size))
+        if partition is None:
+            partition = self._partitions[(scope, size)] = _Partition(self.dims)
+        if self.entries >= self.max_entries:
+            victim = partition if partition.count else max(self._partitions.values(), key=lambda p: p.count)
+            victim.pop_oldest()
+            self.entries -= 1
+            self.evictions += 1
+        partition.append(vector, key, rule_score)
+        self.entries += 1
+
+    def nearest(self, scope: Hashable, size: int, vector: np.ndarray) -> Optional[Neighbour]:
+        best = None
+        for candidate_size in range(size - self.size_tolerance, size + self.size_tolerance + 1):
+            partition = self._partitions.get((scope, candidate_size))
+            if partition is None:
+                continue
+            found = partition.best(vector)
+            if found is not None and (best is None or found.similarity > best.similarity):
+                best = found
+        return best
+
+    def memory_bytes(self) -> int:
+        return sum(p.vectors.nbytes + p.rule_scores.nbytes for p in self._partitions.values())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": self.entries,
+            "max_entries": self.max_entries,
+            "partitions": len(self._partitions),
+            "evictions": self.evictions,
+            "memory_bytes": self.memory_bytes(),
+        }
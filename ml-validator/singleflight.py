@@ -0,0 +1,68 @@
+"""
+Single-Flight Request Coalescing
+Collapses concurrent identical async calls into one shared execution
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Deduplicate in-flight calls by key.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and receive its result or exception.
+    A cancelled waiter only stops waiting: the shared task keeps running for
+    the others and is cancelled once nobody is left to receive its result.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalescing request onto in-flight call {key[:12]}")
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Last waiter gone: nobody needs the result any more
+            if not task.done() and self._waiters.get(key, 0) <= 1:
+                task.cancel()
+            raise
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved by the waiters; mark it handled for the event loop
+            logger.debug(f"In-flight call {key[:12]} failed: {task.exception()}")
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
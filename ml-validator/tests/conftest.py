@@ -0,0 +1,26 @@
+"""
+Test configuration: the service modules are imported from the parent
+directory, and a service imported by a test keeps no state files and
+calls the mock LLM backend
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Read when main is imported, so set before any test imports it
+os.environ.update({
+    "VALIDATOR_LLM_BACKEND": "mock",
+    "VALIDATOR_MOCK_LATENCY_MS": "50",
+    "VALIDATOR_MOCK_JITTER_MS": "0",
+    "VALIDATOR_MOCK_LATENCY_DIST": "fixed",
+    "VALIDATOR_EVAL_DB": "",
+    "VALIDATOR_JOB_DB": "",
+    "VALIDATOR_CACHE_DB": "",
+    "VALIDATOR_CATALOG_POLL_INTERVAL": "0",
+    "VALIDATOR_CPU_POOL": "thread",
+    "VALIDATOR_LLM_WARMUP_RETRY": "0",
+    "VALIDATOR_SIMILAR_THRESHOLD": "0",
+})
+os.environ.pop("VALIDATOR_STATE_DIR", None)
@@ -0,0 +1,108 @@
+"""
+Hedged LLM calls: when a second copy starts, which result wins, and that
+the losing copy is always cancelled
+"""
+
+import asyncio
+
+import pytest
+
+from scheduler import hedged
+
+
+class Calls:
+    """Scripted calls: each entry is (delay, result or exception) for one copy"""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.started = 0
+        self.cancelled = []
+
+    async def __call__(self):
+        index = self.started
+        self.started += 1
+        delay, outcome = self.script[index]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(index)
+            raise
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+async def _allow():
+    return True
+
+
+async def _refuse():
+    return False
+
+
+def _run(calls, delay, may_hedge=_allow):
+    """hedged's result, and the copies cancelled by the time it returned"""
+    async def run():
+        result = await hedged(calls, delay, may_hedge)
+        # Checked before asyncio.run cancels leftover tasks on its own
+        await asyncio.sleep(0)
+        return result, sorted(calls.cancelled)
+    return asyncio.run(run())
+
+
+def test_fast_call_is_not_hedged():
+    calls = Calls((0.01, "first"))
+    result = _run(calls, 0.1)[0]
+    assert result == ("first", False, False)
+    assert calls.started == 1
+
+
+def test_no_delay_never_hedges():
+    calls = Calls((0.05, "first"))
+    assert _run(calls, None)[0] == ("first", False, False)
+    assert calls.started == 1
+
+
+def test_slow_call_is_hedged_and_the_loser_cancelled():
+    calls = Calls((1.0, "slow"), (0.01, "hedge"))
+    assert _run(calls, 0.02) == (("hedge", True, True), [0])
+
+
+def test_primary_can_still_win_after_hedging():
+    calls = Calls((0.05, "first"), (1.0, "hedge"))
+    assert _run(calls, 0.02) == (("first", True, False), [1])
+
+
+def test_hedge_refused_waits_for_the_primary():
+    calls = Calls((0.05, "first"))
+    assert _run(calls, 0.01, _refuse)[0] == ("first", False, False)
+    assert calls.started == 1
+
+
+def test_early_failure_is_hedged():
+    calls = Calls((0.0, RuntimeError("down")), (0.01, "hedge"))
+    assert _run(calls, 0.05)[0] == ("hedge", True, True)
+
+
+def test_error_raised_when_every_copy_fails():
+    calls = Calls((0.0, RuntimeError("first")), (0.01, RuntimeError("hedge")))
+    with pytest.raises(RuntimeError):
+        _run(calls, 0.05)
+
+
+def test_cancelling_the_caller_cancels_both_copies():
+    calls = Calls((1.0, "slow"), (1.0, "slower"))
+
+    async def run():
+        task = asyncio.ensure_future(hedged(calls, 0.01, _allow))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Let the copies process their cancellation, then check before
+        # asyncio.run cancels whatever is left on its own
+        await asyncio.sleep(0)
+        return sorted(calls.cancelled)
+
+    assert asyncio.run(run()) == [0, 1]
+    assert calls.started == 2
@@ -0,0 +1,218 @@
+"""
+Job queue: lane priority and the bulk-worker limit, lease reclaim after a
+worker stalls, and workers surviving failed result writes
+"""
+
+import asyncio
+import sqlite3
+from collections import Counter
+
+import pytest
+
+from job_queue import BULK, INTERACTIVE, JobQueue, QueueFull, check_callback_url
+
+
+def _queue(tmp_path, handler, **kwargs):
+    kwargs.setdefault("poll_interval", 0.02)
+    return JobQueue(str(tmp_path / "jobs.db"), handler, **kwargs)
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached in time")
+        await asyncio.sleep(0.02)
+
+
+def test_bulk_jobs_never_exceed_their_workers(tmp_path):
+    running = Counter()
+    peak = Counter()
+
+    async def run():
+        bulk_gate = asyncio.Event()
+
+        async def handler(payload, lane):
+            running[lane] += 1
+            peak[lane] = max(peak[lane], running[lane])
+            if lane == BULK:
+                await bulk_gate.wait()
+            await asyncio.sleep(0.05)
+            running[lane] -= 1
+            return b"{}"
+
+        queue = _queue(tmp_path, handler, workers=4, bulk_workers=1)
+        # A bulk backlog every idle worker races for, then interactive
+        # traffic arriving while the one bulk job allowed is still running
+        bulk = [(await queue.enqueue(b"{}", BULK))["job_id"] for _ in range(4)]
+        queue.start()
+        await asyncio.sleep(0.1)
+        interactive = [(await queue.enqueue(b"{}", INTERACTIVE))["job_id"] for _ in range(6)]
+
+        def all_done(ids):
+            async def check():
+                return all([(await queue.get(job_id))["status"] == "done" for job_id in ids])
+            return check
+
+        await _wait_for(all_done(interactive))
+        bulk_running = running[BULK]
+        bulk_gate.set()
+        await _wait_for(all_done(bulk))
+        await queue.close()
+        # Every slot handed back, including by workers stopped mid-claim
+        return bulk_running, queue._bulk_slots
+
+    bulk_running, slots = asyncio.run(run())
+    assert peak[BULK] == 1
+    # The other workers kept serving the interactive lane meanwhile
+    assert bulk_running == 1
+    assert peak[INTERACTIVE] == 3
+    assert slots == 0
+
+
+def test_interactive_jobs_are_claimed_before_bulk(tmp_path):
+    order = []
+
+    async def handler(payload, lane):
+        order.append(lane)
+        return b"{}"
+
+    async def run():
+        queue = _queue(tmp_path, handler, workers=1)
+        for _ in range(2):
+            await queue.enqueue(b"{}", BULK)
+        for _ in range(2):
+            await queue.enqueue(b"{}", INTERACTIVE)
+        queue.start()
+
+        async def drained():
+            return len(order) == 4
+        await _wait_for(drained)
+        await queue.close()
+
+    asyncio.run(run())
+    assert order == [INTERACTIVE, INTERACTIVE, BULK, BULK]
+
+
+def test_stalled_worker_loses_its_job_and_its_result(tmp_path):
+    async def run():
+        gate = asyncio.Event()
+        runs = []
+
+        async def handler(payload, lane):
+            runs.append(len(runs))
+            attempt = len(runs)
+            await gate.wait()
+            return b'{"attempt": %d}' % attempt
+
+        queue = _queue(tmp_path, handler, workers=2, lease_seconds=0.2)
+        # No heartbeat: the first worker's lease lapses while it still runs
+        queue._extend = lambda job, lease_until: None
+        queue.start()
+        job_id = (await queue.enqueue(b"{}"))["job_id"]
+
+        async def reclaimed():
+            return len(runs) == 2
+        await _wait_for(reclaimed)
+        gate.set()
+
+        async def done():
+            return (await queue.get(job_id))["status"] == "done"
+        await _wait_for(done)
+        await asyncio.sleep(0.05)
+        job = await queue.get(job_id)
+        stats = await queue.stats()
+        await queue.close()
+        return job, stats
+
+    job, stats = asyncio.run(run())
+    # The second claim owns the job: the stale first run cannot overwrite it
+    assert job["result"] == {"attempt": 2}
+    assert job["attempts"] == 2
+    assert stats["requeued"] == 1
+    assert stats["lanes"][INTERACTIVE]["completed"] == 1
+
+
+def test_job_whose_worker_keeps_dying_fails(tmp_path):
+    async def handler(payload, lane):
+        return b"{}"
+
+    async def run():
+        queue = _queue(tmp_path, handler, workers=1, max_attempts=2)
+        job_id = (await queue.enqueue(b"{}"))["job_id"]
+        # As left behind by a worker that died on its second attempt
+        queue._db.execute("UPDATE jobs SET status = 'running', attempts = 2, lease_until = 0 WHERE id = ?", (job_id,))
+        queue._db.commit()
+        queue.start()
+
+        async def finished():
+            return (await queue.get(job_id))["status"] != "running"
+        await _wait_for(finished)
+        job = await queue.get(job_id)
+        await queue.close()
+        return job
+
+    job = asyncio.run(run())
+    assert job["status"] == "failed"
+    assert "Worker stopped" in job["error"]
+
+
+def test_worker_survives_a_failed_result_write(tmp_path):
+    async def handler(payload, lane):
+        return b'{"ok": true}'
+
+    async def run():
+        queue = _queue(tmp_path, handler, workers=1, lease_seconds=0.2)
+        finish = queue._finish
+        failures = []
+
+        def flaky_finish(*args):
+            if not failures:
+                failures.append(1)
+                raise sqlite3.OperationalError("database is locked")
+            return finish(*args)
+
+        queue._finish = flaky_finish
+        queue.start()
+        job_id = (await queue.enqueue(b"{}"))["job_id"]
+
+        # The result is lost, so the job is run again once its lease lapses
+        async def done():
+            return (await queue.get(job_id))["status"] == "done"
+        await _wait_for(done)
+        job = await queue.get(job_id)
+        alive = all(not task.done() for task in queue._tasks)
+        await queue.close()
+        return job, alive
+
+    job, alive = asyncio.run(run())
+    assert alive
+    assert job["result"] == {"ok": True}
+    assert job["attempts"] == 2
+
+
+def test_full_queue_refuses_jobs(tmp_path):
+    async def handler(payload, lane):
+        return b"{}"
+
+    async def run():
+        queue = _queue(tmp_path, handler, max_queued=2)
+        await queue.enqueue(b"{}")
+        await queue.enqueue(b"{}", BULK)
+        try:
+            with pytest.raises(QueueFull):
+                await queue.enqueue(b"{}")
+        finally:
+            await queue.close()
+
+    asyncio.run(run())
+
+
+def test_callbacks_only_go_to_allowed_hosts():
+    with pytest.raises(ValueError):
+        check_callback_url("http://169.254.169.254/latest", ())
+    with pytest.raises(ValueError):
+        check_callback_url("http://internal.example/hook", ("hooks.example",))
+    with pytest.raises(ValueError):
+        check_callback_url("ftp://hooks.example/hook", ("hooks.example",))
+    assert check_callback_url("https://Hooks.Example/hook", ("hooks.example",)) == "https://Hooks.Example/hook"
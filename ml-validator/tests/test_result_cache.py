@@ -0,0 +1,127 @@
+"""
+Result cache: LRU and TTL eviction in memory, and the SQLite store shared
+between workers, written synchronously from scripts and behind a queue on
+the event loop
+"""
+
+import asyncio
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, canonical_design_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() as seen by the cache"""
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2, ttl_seconds=0)
+    cache.set("a", {"score": 1})
+    cache.set("b", {"score": 2})
+    assert cache.get("a") == {"score": 1}
+    cache.set("c", {"score": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"score": 1}
+    assert cache.get("c") == {"score": 3}
+    assert cache.evictions == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_replacing_an_entry_does_not_evict():
+    cache = ResultCache(max_entries=2, ttl_seconds=0)
+    cache.set("a", {"score": 1})
+    cache.set("b", {"score": 2})
+    cache.set("a", {"score": 10})
+    assert cache.evictions == 0
+    assert cache.get("a") == {"score": 10}
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    cache.set("a", {"score": 1})
+    clock[0] += 59
+    assert cache.get("a") == {"score": 1}
+    clock[0] += 2
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.stats()["entries"] == 0
+
+
+def test_zero_ttl_never_expires(clock):
+    cache = ResultCache(max_entries=10, ttl_seconds=0)
+    cache.set("a", {"score": 1})
+    clock[0] += 10 ** 9
+    assert cache.get("a") == {"score": 1}
+
+
+def test_disk_store_is_shared_between_instances(tmp_path, clock):
+    path = str(tmp_path / "results.db")
+    writer = ResultCache(max_entries=10, ttl_seconds=60, db_path=path)
+    # No running event loop: written through at once
+    writer.set("a", {"score": 1})
+    reader = ResultCache(max_entries=10, ttl_seconds=60, db_path=path)
+    assert reader.get("a") == {"score": 1}
+    assert reader.disk_hits == 1
+    # Now in the reader's memory
+    assert reader.get("a") == {"score": 1}
+    assert reader.disk_hits == 1
+    clock[0] += 61
+    assert ResultCache(max_entries=10, ttl_seconds=60, db_path=path).get("a") is None
+
+
+def test_writes_on_the_event_loop_are_queued_and_flushed(tmp_path):
+    path = str(tmp_path / "results.db")
+
+    async def run():
+        writer = ResultCache(max_entries=10, ttl_seconds=60, db_path=path)
+        reader = ResultCache(max_entries=10, ttl_seconds=60, db_path=path)
+        writer.set("a", {"score": 1})
+        writer.set("b", {"score": 2})
+        await writer.flush()
+        found = [await reader.aget("a"), await reader.aget("b"), await reader.aget("c")]
+        await writer.close()
+        await reader.close()
+        return found, reader.disk_hits, writer.stats()["disk_queued"]
+
+    found, disk_hits, queued = asyncio.run(run())
+    assert found == [{"score": 1}, {"score": 2}, None]
+    assert disk_hits == 2
+    assert queued == 0
+
+
+def test_full_write_queue_drops_disk_writes_but_keeps_memory(tmp_path):
+    async def run():
+        cache = ResultCache(max_entries=10, ttl_seconds=60, db_path=str(tmp_path / "results.db"), max_queue=1)
+        for key in "abc":
+            cache.set(key, {"key": key})
+        dropped = cache.disk_dropped
+        in_memory = [cache.get(key) for key in "abc"]
+        await cache.close()
+        return dropped, in_memory
+
+    dropped, in_memory = asyncio.run(run())
+    assert dropped >= 1
+    assert in_memory == [{"key": "a"}, {"key": "b"}, {"key": "c"}]
+
+
+def test_unusable_disk_store_falls_back_to_memory(tmp_path):
+    # A directory cannot be opened as a database file
+    cache = ResultCache(max_entries=10, ttl_seconds=60, db_path=str(tmp_path))
+    cache.set("a", {"score": 1})
+    assert cache.get("a") == {"score": 1}
+    assert cache.stats()["disk_store"] is None
+
+
+def test_design_key_ignores_order():
+    components = [("a", "web-server"), ("b", "database")]
+    connections = [("a", "b"), ("b", None)]
+    key = canonical_design_key(components, connections, "p", "v1")
+    assert canonical_design_key(components[::-1], connections[::-1], "p", "v1") == key
+    assert canonical_design_key(components, connections, "p", "v2") != key
+    assert canonical_design_key(components, connections, None, "v1") != key
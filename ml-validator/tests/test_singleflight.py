@@ -0,0 +1,134 @@
+"""
+Single-flight coalescing, and the keys the validator coalesces LLM calls on
+"""
+
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def _counting_call(calls, result="ok", delay=0.05, error=None):
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+    return call
+
+
+def test_identical_calls_share_one_execution():
+    async def run():
+        flight, calls = SingleFlight(), []
+        call = _counting_call(calls)
+        results = await asyncio.gather(*(flight.do("k", call) for _ in range(5)))
+        return results, calls, flight.stats()
+
+    results, calls, stats = asyncio.run(run())
+    assert results == ["ok"] * 5
+    assert len(calls) == 1
+    assert stats == {"in_flight": 0, "executions": 1, "coalesced": 4}
+
+
+def test_distinct_keys_run_separately():
+    async def run():
+        flight, calls = SingleFlight(), []
+        results = await asyncio.gather(
+            flight.do("a", _counting_call(calls, "a")), flight.do("b", _counting_call(calls, "b"))
+        )
+        return results, calls, flight.stats()
+
+    results, calls, stats = asyncio.run(run())
+    assert results == ["a", "b"]
+    assert len(calls) == 2
+    assert stats["coalesced"] == 0
+
+
+def test_error_reaches_every_waiter_and_is_not_remembered():
+    async def run():
+        flight, calls = SingleFlight(), []
+        failing = _counting_call(calls, error=ValueError("boom"))
+        outcomes = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+        # The failed call is forgotten, so the next caller runs it again
+        retried = await flight.do("k", _counting_call(calls))
+        return outcomes, retried, calls
+
+    outcomes, retried, calls = asyncio.run(run())
+    assert all(isinstance(o, ValueError) for o in outcomes)
+    assert retried == "ok"
+    assert len(calls) == 2
+
+
+def test_cancelled_waiter_leaves_the_call_to_the_others():
+    async def run():
+        flight, calls = SingleFlight(), []
+        call = _counting_call(calls, delay=0.1)
+        first = asyncio.ensure_future(flight.do("k", call))
+        second = asyncio.ensure_future(flight.do("k", call))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        return await second, first.cancelled(), calls
+
+    result, first_cancelled, calls = asyncio.run(run())
+    assert first_cancelled
+    assert result == "ok"
+    assert len(calls) == 1
+
+
+def test_last_waiter_cancelling_cancels_the_call():
+    async def run():
+        flight = SingleFlight()
+        finished = []
+
+        async def call():
+            await asyncio.sleep(0.1)
+            finished.append(1)
+
+        waiter = asyncio.ensure_future(flight.do("k", call))
+        await asyncio.sleep(0.02)
+        waiter.cancel()
+        await asyncio.sleep(0.15)
+        return finished, flight.in_flight()
+
+    finished, in_flight = asyncio.run(run())
+    assert finished == []
+    assert in_flight == 0
+
+
+def test_flight_key_separates_admission_and_timeout():
+    from main import _flight_key
+
+    assert _flight_key("k", None, True) == _flight_key("k", None, True)
+    assert _flight_key("k", None, True) != _flight_key("k", None, False)
+    assert _flight_key("k", 30.0, False) != _flight_key("k", None, False)
+
+
+@pytest.mark.parametrize("prompt_mode", ["combined", "per-test"])
+def test_bounded_and_unbounded_validations_do_not_share_a_call(monkeypatch, prompt_mode):
+    import main
+
+    monkeypatch.setattr(main, "LLM_PROMPT_MODE", prompt_mode)
+    design = main.DesignModel(
+        components=[main.ComponentModel("a", "web-server", {"x": 0, "y": 0}),
+                    main.ComponentModel("b", "database", {"x": 1, "y": 0})],
+        connections=[main.ConnectionModel("a", "b")],
+        problem_id="url-shortener"
+    )
+
+    async def run():
+        validator = main.DesignValidator()
+        await asyncio.gather(
+            validator.validate_design(design, design.problem_id),
+            validator.validate_design(design, design.problem_id),
+            validator.validate_design(design, design.problem_id, bounded=False),
+        )
+        return validator
+
+    validator = asyncio.run(run())
+    # Only the two bounded requests coalesce; the unbounded one runs its own
+    # evaluation (and, per test, its own scenario calls)
+    assert validator.inflight.coalesced == 1
+    if prompt_mode == "combined":
+        assert validator.inflight.executions == 2
@@ -0,0 +1,134 @@
+"""
+Request Timing
+Per-stage latency recording shared by the request pipeline, and the ASGI
+middleware that exports it as histograms and Server-Timing headers
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+import time
+
+from metrics import Counter, LabeledHistograms
+
+# Pipeline stages, in request order
+STAGES = (
+    "request_parse", "cache_lookup", "similar_lookup", "rule_engine", "graph_analysis",
+    "prompt_build", "llm_queue", "llm_wait", "response_parse", "serialization",
+)
+
+# Latency of every stage across all requests
+stage_latency = LabeledHistograms()
+
+
+class RequestTimings:
+    """Stage durations accumulated for one request"""
+
+    __slots__ = ("started", "stages")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.stages.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_stage(stage: str, seconds: float):
+    """Add a measured duration to the stage histogram and the current request"""
+    stage_latency.observe(stage, seconds)
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def request_parsed():
+    """Record the time from the request's arrival to its handler being called.
+
+    Covers body receipt, routing and model validation; call it first thing
+    in a handler.
+    """
+    timings = _current.get()
+    if timings is not None:
+        record_stage("request_parse", time.perf_counter() - timings.started)
+
+
+class RequestMetrics:
+    """Request counts and latency per route, plus the number in flight"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = LabeledHistograms()
+        self.responses: Dict[Tuple[str, int], Counter] = {}
+
+    def record(self, route: str, status: int, seconds: float):
+        self.latency.observe(route, seconds)
+        key = (route, status)
+        counter = self.responses.get(key)
+        if counter is None:
+            counter = self.responses.setdefault(key, Counter())
+        counter.inc()
+
+
+class TimingMiddleware:
+    """Pure ASGI middleware: request latency, in-flight count, Server-Timing.
+
+    Route templates (not raw paths) label the histograms so session ids do
+    not create new series. The Server-Timing header is added when `mode` is
+    "always", or when it is "request" and the client sent
+    `X-Server-Timing: 1`; "off" never adds it.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics, mode: str = "request"):
+        self.app = app
+        self.metrics = metrics
+        self.mode = mode
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        wants_header = self.mode == "always" or (
+            self.mode == "request" and (b"x-server-timing", b"1") in scope.get("headers", [])
+        )
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if wants_header:
+                    headers: List = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_flight -= 1
+            _current.reset(token)
+            route = scope.get("route")
+            label = getattr(route, "path", None) or "unmatched"
+            self.metrics.record(label, status, time.perf_counter() - timings.started)